@@ -0,0 +1,632 @@
+"""Benchmark suite for the reader, writer, size calculator and message codecs.
+
+Each case times one call of a small workload and reports the best time per
+item – per field, array element or message – over several repeats.  Results
+are printed and can be saved as JSON, together with the interpreter, NumPy
+version and git commit, so that runs can be compared across commits.  Run
+from the ``python_cdr`` directory::
+
+    python benchmarks/run.py --output before.json
+    python benchmarks/run.py --compare before.json --filter array
+
+Array cases run in the machine's native byte order and in the swapped one,
+with list and, when NumPy is installed, NumPy input and output.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from cdr._numpy import import_numpy  # noqa: E402
+from cdr.decoder import MessageDecoder  # noqa: E402
+from cdr.encapsulation_kind import EncapsulationKind  # noqa: E402
+from cdr.encoder import MessageEncoder  # noqa: E402
+from cdr.idl import parse_idl  # noqa: E402
+from cdr.member_index import index_members  # noqa: E402
+from cdr.reader import CdrReader  # noqa: E402
+from cdr.schema import parse_message_definition  # noqa: E402
+from cdr.size_calculator import CdrSizeCalculator  # noqa: E402
+from cdr.string_cache import StringCache  # noqa: E402
+from cdr.transcoder import MessageTranscoder  # noqa: E402
+from cdr.writer import CdrWriter  # noqa: E402
+
+try:
+    np: Any = import_numpy()
+except ImportError:
+    np = None
+
+#: Number of fields written or read per call of the primitive cases.
+FIELDS = 1000
+#: Number of elements per call of the array cases.
+ELEMENTS = 4096
+
+NATIVE = "native"
+SWAPPED = "swapped"
+if sys.byteorder == "little":
+    KIND_FOR_ORDER = {
+        NATIVE: EncapsulationKind.CDR_LE,
+        SWAPPED: EncapsulationKind.CDR_BE,
+    }
+else:
+    KIND_FOR_ORDER = {
+        NATIVE: EncapsulationKind.CDR_BE,
+        SWAPPED: EncapsulationKind.CDR_LE,
+    }
+
+PRIMITIVES: Dict[str, Any] = {
+    "int8": -7,
+    "uint8": 7,
+    "int16": -300,
+    "uint16": 300,
+    "int32": -70000,
+    "uint32": 70000,
+    "int64": -(1 << 40),
+    "uint64": 1 << 40,
+    "float32": 1.5,
+    "float64": 2.25,
+}
+ARRAY_TYPES = {
+    "int8": "b",
+    "uint8": "B",
+    "int16": "h",
+    "uint16": "H",
+    "int32": "i",
+    "uint32": "I",
+    "int64": "q",
+    "uint64": "Q",
+    "float32": "f",
+    "float64": "d",
+}
+
+TF2_MSG_TFMESSAGE = (
+    "0001000001000000cce0d158f08cf9060a000000626173655f6c696e6b0000000600000072616461"
+    "72000000ae47e17a14ae0e4000000000000000000000000000000000000000000000000000000000"
+    "000000000000000000000000000000000000f03f"
+)
+
+TF2_MSG_DEFINITION = """
+geometry_msgs/TransformStamped[] transforms
+================================================================================
+MSG: geometry_msgs/TransformStamped
+std_msgs/Header header
+string child_frame_id # the frame id of the child frame
+Transform transform
+================================================================================
+MSG: std_msgs/Header
+builtin_interfaces/Time stamp
+string frame_id
+================================================================================
+MSG: geometry_msgs/Transform
+Vector3 translation
+Quaternion rotation
+================================================================================
+MSG: geometry_msgs/Vector3
+float64 x
+float64 y
+float64 z
+================================================================================
+MSG: geometry_msgs/Quaternion
+float64 x 0
+float64 y 0
+float64 z 0
+float64 w 1
+"""
+
+STRINGS_DEFINITION = """
+std_msgs/Header header
+string[] names
+KeyValue[] values
+================================================================================
+MSG: std_msgs/Header
+builtin_interfaces/Time stamp
+string frame_id
+================================================================================
+MSG: diagnostic_msgs/KeyValue
+string key
+string value
+"""
+
+POINT_CLOUD_DEFINITION = """
+std_msgs/Header header
+uint32 height
+uint32 width
+PointField[] fields
+bool is_bigendian
+uint32 point_step
+uint32 row_step
+uint8[] data
+bool is_dense
+================================================================================
+MSG: std_msgs/Header
+builtin_interfaces/Time stamp
+string frame_id
+================================================================================
+MSG: sensor_msgs/PointField
+string name
+uint32 offset
+uint8 datatype
+uint32 count
+"""
+
+SCAN_DEFINITION = """
+std_msgs/Header header
+float32 angle_min
+float32 angle_max
+float64 scan_time
+float32[] ranges
+float32[] intensities
+================================================================================
+MSG: std_msgs/Header
+builtin_interfaces/Time stamp
+string frame_id
+"""
+
+IMAGE_DEFINITION = """
+std_msgs/Header header
+uint32 height
+uint32 width
+string encoding
+uint8 is_bigendian
+uint32 step
+uint8[] data
+================================================================================
+MSG: std_msgs/Header
+builtin_interfaces/Time stamp
+string frame_id
+"""
+
+
+@dataclass
+class Case:
+    """A benchmark case: ``run`` performs ``items`` units of work."""
+
+    name: str
+    run: Callable[[], Any]
+    items: int
+    unit: str
+
+
+# ----------------------------------------------------------------------
+# Primitive fields
+# ----------------------------------------------------------------------
+def _primitive_cases() -> Iterator[Case]:
+    for order, kind in KIND_FOR_ORDER.items():
+        for name, value in PRIMITIVES.items():
+            writer = CdrWriter(kind=kind)
+            write = getattr(writer, name)
+            for _ in range(FIELDS):
+                write(value)
+            reader = CdrReader(writer.data)
+            yield Case(
+                f"read.{name}.{order}",
+                _repeat_read(reader, getattr(reader, name)),
+                FIELDS,
+                "field",
+            )
+            yield Case(
+                f"write.{name}.{order}",
+                _repeat_write(writer, write, value),
+                FIELDS,
+                "field",
+            )
+
+    for name in PRIMITIVES:
+        yield Case(f"size.{name}", _repeat_size(name), FIELDS, "field")
+
+    writer = CdrWriter()
+    for _ in range(FIELDS):
+        writer.string("base_link")
+    reader = CdrReader(writer.data)
+    yield Case("read.string", _repeat_read(reader, reader.string), FIELDS, "field")
+    yield Case(
+        "write.string",
+        _repeat_write(writer, writer.string, "base_link"),
+        FIELDS,
+        "field",
+    )
+
+    names = [f"joint_{index}" for index in range(FIELDS)]
+    writer = CdrWriter()
+    writer.stringArray(names, True)
+    reader = CdrReader(writer.data)
+
+    def read_array() -> None:
+        reader.seek_to(4)
+        reader.string_array()
+
+    yield Case("read.string_array", read_array, FIELDS, "element")
+    yield Case(
+        "write.stringArray",
+        lambda: writer.reset().stringArray(names, True),
+        FIELDS,
+        "element",
+    )
+
+
+def _repeat_read(reader: CdrReader, read: Callable[[], Any]) -> Callable[[], None]:
+    def run() -> None:
+        reader.seek_to(4)
+        for _ in range(FIELDS):
+            read()
+
+    return run
+
+
+def _repeat_write(
+    writer: CdrWriter, write: Callable[[Any], Any], value: Any
+) -> Callable[[], None]:
+    def run() -> None:
+        writer.reset()
+        for _ in range(FIELDS):
+            write(value)
+
+    return run
+
+
+def _repeat_size(method: str) -> Callable[[], None]:
+    def run() -> None:
+        account = getattr(CdrSizeCalculator(), method)
+        for _ in range(FIELDS):
+            account()
+
+    return run
+
+
+# ----------------------------------------------------------------------
+# Alignment
+# ----------------------------------------------------------------------
+def _padding_cases() -> Iterator[Case]:
+    """Alternate ``uint8`` and ``float64`` so every ``float64`` is padded."""
+
+    def write(writer: CdrWriter) -> None:
+        for _ in range(FIELDS // 2):
+            writer.uint8(1)
+            writer.float64(2.5)
+
+    def write_fused(writer: CdrWriter) -> None:
+        for _ in range(FIELDS // 2):
+            writer.write_fields("Bd", 1, 2.5)
+
+    calculator = CdrSizeCalculator()
+    for _ in range(FIELDS // 2):
+        calculator.uint8()
+        calculator.float64()
+    size = calculator.size
+    reused = CdrWriter(size=size)
+
+    yield Case("write.padding.growing", lambda: write(CdrWriter()), FIELDS, "field")
+    yield Case(
+        "write.padding.presized", lambda: write(CdrWriter(size=size)), FIELDS, "field"
+    )
+    yield Case("write.padding.reset", lambda: write(reused.reset()), FIELDS, "field")
+    yield Case(
+        "write.padding.fused", lambda: write_fused(reused.reset()), FIELDS, "field"
+    )
+
+
+# ----------------------------------------------------------------------
+# Arrays
+# ----------------------------------------------------------------------
+def _array_cases() -> Iterator[Case]:
+    calculator = CdrSizeCalculator()
+    for name, char in ARRAY_TYPES.items():
+        values = [PRIMITIVES[name]] * ELEMENTS
+        inputs: Dict[str, Any] = {"list": values}
+        if np is not None:
+            inputs["numpy"] = np.array(values, dtype=char)
+        method = name + "Array"
+
+        for order, kind in KIND_FOR_ORDER.items():
+            for input_name, value in inputs.items():
+                writer = CdrWriter(kind=kind)
+                write = getattr(writer, method)
+
+                def run_write(
+                    writer: CdrWriter = writer, write: Any = write, value: Any = value
+                ) -> None:
+                    writer.reset()
+                    write(value)
+
+                yield Case(
+                    f"write.{method}.{input_name}.{order}",
+                    run_write,
+                    ELEMENTS,
+                    "element",
+                )
+
+            reader = CdrReader(writer.data)
+            for output_name in inputs:
+                read = getattr(reader, f"{name}_array")
+                as_numpy = output_name == "numpy"
+
+                def run_read(
+                    reader: CdrReader = reader,
+                    read: Any = read,
+                    as_numpy: bool = as_numpy,
+                ) -> None:
+                    reader.seek_to(4)
+                    read(ELEMENTS, as_numpy=as_numpy)
+
+                yield Case(
+                    f"read.{name}_array.{output_name}.{order}",
+                    run_read,
+                    ELEMENTS,
+                    "element",
+                )
+
+        account = getattr(calculator, f"{name}_array")
+        yield Case(
+            f"size.{name}_array", lambda account=account: account(ELEMENTS), 1, "call"
+        )
+
+
+# ----------------------------------------------------------------------
+# Messages
+# ----------------------------------------------------------------------
+def _message_cases() -> Iterator[Case]:
+    tf2 = parse_message_definition(TF2_MSG_DEFINITION, "tf2_msgs/TFMessage")
+    yield from _codec_cases("tf2", tf2, bytes.fromhex(TF2_MSG_TFMESSAGE))
+
+    strings = parse_message_definition(STRINGS_DEFINITION, "pkg/Strings")
+    message = {
+        "header": {"stamp": {"sec": 1, "nanosec": 2}, "frame_id": "base_link"},
+        "names": [f"joint_{index}" for index in range(256)],
+        "values": [
+            {"key": f"key_{index}", "value": f"value_{index}"} for index in range(256)
+        ],
+    }
+    yield from _codec_cases("strings", strings, MessageEncoder(strings).encode(message))
+
+    cloud = parse_message_definition(POINT_CLOUD_DEFINITION, "sensor_msgs/PointCloud2")
+    width = 65536
+    message = {
+        "header": {"stamp": {"sec": 1, "nanosec": 2}, "frame_id": "lidar"},
+        "height": 1,
+        "width": width,
+        "fields": [
+            {"name": axis, "offset": 4 * index, "datatype": 7, "count": 1}
+            for index, axis in enumerate(("x", "y", "z", "intensity"))
+        ],
+        "is_bigendian": False,
+        "point_step": 16,
+        "row_step": 16 * width,
+        "data": bytes(16 * width),
+        "is_dense": True,
+    }
+    yield from _codec_cases("point_cloud", cloud, MessageEncoder(cloud).encode(message))
+
+    image = parse_message_definition(IMAGE_DEFINITION, "sensor_msgs/Image")
+    message = {
+        "header": {"stamp": {"sec": 1, "nanosec": 2}, "frame_id": "camera"},
+        "height": 480,
+        "width": 640,
+        "encoding": "rgb8",
+        "is_bigendian": 0,
+        "step": 640 * 3,
+        "data": bytes(640 * 480 * 3),
+    }
+    yield from _codec_cases("image", image, MessageEncoder(image).encode(message))
+
+
+def _codec_cases(name: str, schema: Any, data: bytes) -> Iterator[Case]:
+    decoder = MessageDecoder(schema)
+    encoder = MessageEncoder(schema)
+    message = decoder.decode(data)
+    interning = MessageDecoder(schema, string_cache=StringCache())
+    yield Case(f"decode.{name}", lambda: decoder.decode(data), 1, "message")
+    yield Case(f"decode.{name}.interned", lambda: interning.decode(data), 1, "message")
+    yield Case(f"skip.{name}", lambda: CdrReader(data).skip(schema), 1, "message")
+    yield Case(f"encode.{name}", lambda: encoder.encode(message), 1, "message")
+    yield Case(f"size.{name}", lambda: encoder.size(message), 1, "message")
+
+
+# ----------------------------------------------------------------------
+# Mutable structs
+# ----------------------------------------------------------------------
+#: Number of members of the mutable struct cases, of which three are read.
+MEMBERS = 32
+
+
+def _mutable_cases() -> Iterator[Case]:
+    members_idl = "".join(
+        f"double m{i};" if i % 2 else f"string m{i};" for i in range(MEMBERS)
+    )
+    schema = parse_idl(f"@mutable struct Members {{ {members_idl} }};")
+    for name, kind in (
+        ("pl_cdr", EncapsulationKind.PL_CDR_LE),
+        ("pl_cdr2", EncapsulationKind.PL_CDR2_LE),
+    ):
+        members = CdrWriter(kind=kind)
+        for member_id in range(MEMBERS):
+            if member_id % 2:
+                members.emHeader(False, member_id, 8).float64(member_id)
+            else:
+                members.emHeader(False, member_id, 12, 4).string("member_")
+        members.sentinelHeader()
+        writer = CdrWriter(kind=kind)
+        if kind == EncapsulationKind.PL_CDR2_LE:
+            writer.dHeader(members.size - 4)
+        data = bytes(writer.data) + bytes(members.data)[4:]
+
+        def read_all(data: bytes = data) -> None:
+            reader = CdrReader(data)
+            if reader.is_cdr2:
+                reader.d_header()
+            for _ in range(MEMBERS):
+                header = reader.em_header()
+                if header.id % 2:
+                    reader.float64()
+                else:
+                    reader.string()
+            reader.sentinel_header()
+
+        def read_indexed(data: bytes = data) -> None:
+            index = index_members(CdrReader(data))
+            index.reader(3).float64()
+            index.reader(10).string()
+            index.reader(29).float64()
+
+        yield Case(f"read.{name}.all_members", read_all, 1, "message")
+        yield Case(f"read.{name}.indexed_3", read_indexed, 1, "message")
+
+        decoder = MessageDecoder(schema)
+        encoder = MessageEncoder(schema, kind=kind)
+        message = decoder.decode(data)
+        yield Case(
+            f"decode.{name}.idl", lambda d=decoder, b=data: d.decode(b), 1, "message"
+        )
+        yield Case(
+            f"encode.{name}.idl", lambda e=encoder, m=message: e.encode(m), 1, "message"
+        )
+
+
+# ----------------------------------------------------------------------
+# Transcoding
+# ----------------------------------------------------------------------
+def _transcode_cases() -> Iterator[Case]:
+    tf2 = parse_message_definition(TF2_MSG_DEFINITION, "tf2_msgs/TFMessage")
+    tf2_message = MessageDecoder(tf2).decode(bytes.fromhex(TF2_MSG_TFMESSAGE))
+    scan = parse_message_definition(SCAN_DEFINITION, "sensor_msgs/LaserScan")
+    scan_message = {
+        "header": {"stamp": {"sec": 1, "nanosec": 2}, "frame_id": "laser"},
+        "angle_min": -1.5,
+        "angle_max": 1.5,
+        "scan_time": 0.1,
+        "ranges": [float(index) for index in range(1080)],
+        "intensities": [0.5] * 1080,
+    }
+    for name, schema, message in (
+        ("tf2", tf2, tf2_message),
+        ("scan", scan, scan_message),
+    ):
+        for source, target in (
+            (EncapsulationKind.CDR_BE, EncapsulationKind.CDR_LE),
+            (EncapsulationKind.CDR_LE, EncapsulationKind.CDR2_LE),
+        ):
+            data = bytes(MessageEncoder(schema, kind=source).encode(message))
+            transcoder = MessageTranscoder(schema, kind=target)
+            decoder = MessageDecoder(schema)
+            encoder = MessageEncoder(schema, kind=target)
+            label = f"{name}.{source.name.lower()}_to_{target.name.lower()}"
+            yield Case(
+                f"transcode.{label}",
+                lambda t=transcoder, d=data: t.transcode(d),
+                1,
+                "message",
+            )
+            yield Case(
+                f"transcode.{label}.decode_encode",
+                lambda e=encoder, c=decoder, d=data: e.encode(c.decode(d)),
+                1,
+                "message",
+            )
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+SUITES: List[Callable[[], Iterator[Case]]] = [
+    _primitive_cases,
+    _padding_cases,
+    _array_cases,
+    _message_cases,
+    _mutable_cases,
+    _transcode_cases,
+]
+
+
+def _calls_per_repeat(run: Callable[[], Any], budget: float) -> int:
+    """Return how many calls of ``run`` take roughly ``budget`` seconds."""
+
+    number = 1
+    while True:
+        elapsed = timeit.timeit(run, number=number)
+        if elapsed >= budget / 10 or number >= 1 << 20:
+            return max(1, int(number * budget / max(elapsed, 1e-9)))
+        number *= 10
+
+
+def measure(case: Case, repeat: int, budget: float) -> Dict[str, Any]:
+    """Time ``case`` and return its JSON result entry."""
+
+    number = _calls_per_repeat(case.run, budget)
+    seconds = min(timeit.repeat(case.run, number=number, repeat=repeat)) / number
+    return {
+        "seconds_per_call": seconds,
+        "ns_per_item": seconds / case.items * 1e9,
+        "items": case.items,
+        "unit": case.unit,
+    }
+
+
+def _metadata() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "byteorder": sys.byteorder,
+        "numpy": None if np is None else np.__version__,
+    }
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare")
+    parser.add_argument(
+        "--filter", default="", help="only run cases whose name contains this"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats")
+    parser.add_argument(
+        "--budget", type=float, default=0.05, help="seconds per timing repeat"
+    )
+    args = parser.parse_args(argv)
+
+    baseline: Dict[str, Any] = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+
+    results: Dict[str, Any] = {}
+    for suite in SUITES:
+        for case in suite():
+            if args.filter not in case.name:
+                continue
+            result = results[case.name] = measure(case, args.repeat, args.budget)
+            line = f"{case.name:<40} {result['ns_per_item']:12.1f} ns/{case.unit}"
+            if case.name in baseline:
+                ratio = result["ns_per_item"] / baseline[case.name]["ns_per_item"]
+                line += f"  {ratio:6.2f}x"
+            print(line, flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"metadata": _metadata(), "results": results}, file, indent=2)
+            file.write("\n")
+
+
+if __name__ == "__main__":
+    main()
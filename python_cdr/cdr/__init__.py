@@ -8,8 +8,14 @@ implemented components.
 
 from __future__ import annotations
 
+from .batch import decode_batch
+from .decoder import MessageDecoder
 from .encapsulation_kind import EncapsulationKind
+from .encoder import MessageEncoder
+from .fixed_layout import FixedLayout, fixed_layout
 from .get_encapsulation_kind_info import EncapsulationInfo, get_encapsulation_kind_info
+from .idl import encapsulation_kind, parse_idl
+from .instrumentation import CdrStats, InstrumentedCdrReader, InstrumentedCdrWriter
 from .is_big_endian import is_big_endian
 from .length_codes import (
     LengthCode,
@@ -17,10 +23,25 @@ from .length_codes import (
     get_length_code_for_object_size,
     length_code_to_object_sizes,
 )
+from .member_index import MemberIndex, index_members
+from .parallel import decode_parallel
 from .reader import CdrReader
 from .reserved_pids import EXTENDED_PID, SENTINEL_PID
+from .schema import (
+    ConstantDefinition,
+    FieldDefinition,
+    MessageDefinition,
+    MessageSchema,
+    parse_message_definition,
+)
 from .size_calculator import CdrSizeCalculator
+from .stream_reader import CdrStreamReader
+from .string_cache import StringCache
+from .struct_array import read_struct_array
+from .transcoder import MessageTranscoder
+from .view import MessageView
 from .writer import CdrWriter
+from .writer_pool import CdrWriterPool
 
 __all__ = [
     "EncapsulationKind",
@@ -32,8 +53,32 @@ __all__ = [
     "get_length_code_for_object_size",
     "length_code_to_object_sizes",
     "CdrReader",
+    "CdrStreamReader",
+    "StringCache",
     "CdrWriter",
+    "CdrWriterPool",
     "CdrSizeCalculator",
+    "CdrStats",
+    "InstrumentedCdrReader",
+    "InstrumentedCdrWriter",
     "EXTENDED_PID",
     "SENTINEL_PID",
+    "MessageSchema",
+    "MessageDefinition",
+    "FieldDefinition",
+    "ConstantDefinition",
+    "parse_message_definition",
+    "parse_idl",
+    "encapsulation_kind",
+    "MessageDecoder",
+    "MessageEncoder",
+    "MessageTranscoder",
+    "MessageView",
+    "FixedLayout",
+    "fixed_layout",
+    "decode_batch",
+    "decode_parallel",
+    "read_struct_array",
+    "MemberIndex",
+    "index_members",
 ]
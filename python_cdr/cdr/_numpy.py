@@ -0,0 +1,41 @@
+"""Lazy access to the optional NumPy dependency."""
+
+from __future__ import annotations
+
+import sys
+from types import ModuleType
+
+
+def import_numpy() -> ModuleType:
+    """Return the :mod:`numpy` module or raise a helpful ``ImportError``."""
+
+    try:
+        import numpy
+    except ImportError as error:  # pragma: no cover - depends on environment
+        raise ImportError(
+            "NumPy support requires the optional 'numpy' dependency; "
+            "install it with 'pip install cdr[numpy]'"
+        ) from error
+    return numpy
+
+
+def numpy_array_bytes(
+    value: object, fmt: str, little_endian: bool
+) -> memoryview | None:
+    """Return the raw bytes of a NumPy array converted for serialisation.
+
+    ``fmt`` is the ``struct`` format character of the target element type.
+    The array is cast (using ``same_kind`` casting) and byteswapped to the
+    requested byte order in one vectorised step; no copy is made when it
+    already matches.  Returns ``None`` if ``value`` is not a NumPy array.
+    NumPy is not imported by this function, so callers that never pass NumPy
+    arrays do not pay for the import.
+    """
+
+    numpy = sys.modules.get("numpy")
+    if numpy is None or not isinstance(value, numpy.ndarray):
+        return None
+
+    dtype = numpy.dtype(("<" if little_endian else ">") + fmt)
+    array = value.astype(dtype, order="C", casting="same_kind", copy=False)
+    return memoryview(array.reshape(-1).view(numpy.uint8))
@@ -0,0 +1,446 @@
+"""Serialisation plans shared by the compiled message codecs.
+
+A plan describes how the fields of a :class:`~cdr.schema.MessageDefinition`
+are laid out on the wire.  Consecutive fixed-size fields – primitives, small
+fixed-size arrays of primitives and nested messages consisting only of such
+fields – are merged into a :class:`FixedRun`.  Everything else (strings,
+sequences and nested messages of variable size) becomes a separate step.
+
+Types parsed from IDL additionally follow the XTypes encoding rules: every
+member of a mutable type and every optional member becomes a
+:class:`MemberStep`, and the plan and its collection steps record where
+XCDR2 inserts delimiter headers.
+
+The padding between the members of a run depends on the alignment of the
+run's first byte relative to the stream origin.  :func:`run_structs` therefore
+precompiles one :class:`struct.Struct` per possible starting phase, each with
+the padding baked into the format string, so decoding or encoding a run is a
+single ``unpack_from``/``pack_into`` call regardless of where it starts.
+"""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Union
+from weakref import WeakKeyDictionary
+
+from .schema import PRIMITIVE_TYPES, FieldDefinition, MessageDefinition, MessageSchema
+
+# ``struct`` format character for each primitive type.
+PRIMITIVE_FORMATS = {
+    "bool": "?",
+    "byte": "B",
+    "char": "B",
+    "int8": "b",
+    "uint8": "B",
+    "int16": "h",
+    "uint16": "H",
+    "int32": "i",
+    "uint32": "I",
+    "int64": "q",
+    "uint64": "Q",
+    "float32": "f",
+    "float64": "d",
+}
+
+# Name of the ``CdrReader``/``CdrSizeCalculator`` method for each primitive.
+PRIMITIVE_METHODS = {
+    "bool": "uint8",
+    "byte": "uint8",
+    "char": "uint8",
+    "int8": "int8",
+    "uint8": "uint8",
+    "int16": "int16",
+    "uint16": "uint16",
+    "int32": "int32",
+    "uint32": "uint32",
+    "int64": "int64",
+    "uint64": "uint64",
+    "float32": "float32",
+    "float64": "float64",
+}
+
+FORMAT_SIZES = {
+    "?": 1,
+    "b": 1,
+    "B": 1,
+    "h": 2,
+    "H": 2,
+    "i": 4,
+    "I": 4,
+    "q": 8,
+    "Q": 8,
+    "f": 4,
+    "d": 8,
+}
+
+# Fixed-size arrays with more elements than this are read through the array
+# readers (which can return zero-copy views) instead of being merged into a
+# run, where every element would become a separate Python object.
+MAX_MERGED_ARRAY_LENGTH = 64
+
+
+@dataclass(frozen=True)
+class ShapeEntry:
+    """Describe how a slice of a run's flat value tuple maps onto a field.
+
+    ``count`` is ``None`` for scalars and the element count for fixed-size
+    arrays.  ``shape`` is set for nested messages and describes the layout of
+    a single element.
+    """
+
+    name: str
+    count: int | None = None
+    shape: tuple[ShapeEntry, ...] | None = None
+
+
+@dataclass(frozen=True)
+class FixedRun:
+    """A sequence of fixed-size fields packed by a single ``struct`` call."""
+
+    formats: str
+    shape: tuple[ShapeEntry, ...]
+
+    @property
+    def is_flat(self) -> bool:
+        """``True`` when every field maps onto exactly one value."""
+
+        return all(entry.count is None and entry.shape is None for entry in self.shape)
+
+    @property
+    def names(self) -> tuple[str, ...]:
+        return tuple(entry.name for entry in self.shape)
+
+
+@dataclass(frozen=True)
+class StringStep:
+    """A string or an array of strings.
+
+    ``delimited`` arrays are preceded by a DHEADER under XCDR2.
+    """
+
+    name: str
+    count: int | None = None
+    is_array: bool = False
+    delimited: bool = False
+
+
+@dataclass(frozen=True)
+class ArrayStep:
+    """A primitive array read through the bulk array helpers."""
+
+    name: str
+    type: str
+    count: int | None = None
+
+
+@dataclass(frozen=True)
+class MessageStep:
+    """A nested message or an array of messages.
+
+    ``delimited`` arrays are preceded by a DHEADER under XCDR2.
+    """
+
+    name: str
+    type: str
+    count: int | None = None
+    is_array: bool = False
+    delimited: bool = False
+
+
+@dataclass(frozen=True)
+class MemberStep:
+    """A member encoded with a member header or a presence flag.
+
+    Every member of a mutable type and every optional member of a final or
+    appendable type is wrapped in a ``MemberStep``.  ``step`` encodes the
+    value itself.  ``size`` is set for primitive members of 1, 2, 4 or 8
+    bytes, whose XCDR2 member header carries the size in its length code
+    instead of a NEXTINT.
+    """
+
+    name: str
+    member_id: int
+    step: Step
+    must_understand: bool = False
+    optional: bool = False
+    size: int | None = None
+
+
+Step = Union[FixedRun, StringStep, ArrayStep, MessageStep, MemberStep]
+
+
+@dataclass(frozen=True)
+class Plan:
+    """The ordered steps making up one message type."""
+
+    type: str
+    steps: tuple[Step, ...]
+    extensibility: str | None = None
+
+    @property
+    def delimited(self) -> bool:
+        """``True`` when XCDR2 precedes the message with a DHEADER."""
+
+        return self.extensibility in ("appendable", "mutable")
+
+    @property
+    def fixed_run(self) -> FixedRun | None:
+        """Return the single run of a fixed-size message, if it is one."""
+
+        if (
+            len(self.steps) == 1
+            and isinstance(self.steps[0], FixedRun)
+            and not self.delimited
+        ):
+            return self.steps[0]
+        return None
+
+    def is_plain(self, cdr2: bool) -> bool:
+        """Return whether the message is encoded without XTypes headers.
+
+        Plain messages are laid out exactly like ``.msg`` types; only the
+        compiled codecs support the others.
+        """
+
+        if any(isinstance(step, MemberStep) for step in self.steps):
+            return False
+        if not cdr2:
+            return True
+        return not self.delimited and not any(
+            getattr(step, "delimited", False) for step in self.steps
+        )
+
+
+def build_plans(schema: MessageSchema) -> Dict[str, Plan]:
+    """Build a :class:`Plan` for every type defined in ``schema``."""
+
+    cache = _plan_cache(schema)
+    for name in schema.definitions:
+        _build_plan(schema, name, cache)
+    return cache
+
+
+def get_plan(schema: MessageSchema, type_name: str) -> Plan:
+    """Return the (cached) :class:`Plan` for ``type_name`` in ``schema``."""
+
+    return _build_plan(schema, type_name, _plan_cache(schema))
+
+
+def moves_origin(
+    schema: MessageSchema, type_name: str, eight_byte_alignment: int
+) -> bool:
+    """Return whether a message of ``type_name`` can move the alignment origin.
+
+    As in :meth:`CdrReader.em_header <cdr.reader.CdrReader.em_header>` and
+    :meth:`CdrWriter.emHeader <cdr.writer.CdrWriter.emHeader>`, an XCDR1
+    parameter header moves the origin to the start of its member, where it
+    stays after the member.
+    """
+
+    if eight_byte_alignment == 4:
+        return False
+    return any(
+        isinstance(step, MemberStep)
+        or (
+            isinstance(step, MessageStep)
+            and moves_origin(schema, step.type, eight_byte_alignment)
+        )
+        for step in get_plan(schema, type_name).steps
+    )
+
+
+@lru_cache(maxsize=None)
+def run_structs(
+    formats: str, little_endian: bool, eight_byte_alignment: int
+) -> tuple[struct.Struct, ...]:
+    """Return one precompiled ``Struct`` per starting phase of a run.
+
+    The phase is the offset of the run's first byte relative to the alignment
+    origin, modulo the largest alignment required by any member of the run.
+    Each ``Struct`` includes the leading and inner padding required by the CDR
+    alignment rules for that phase.
+    """
+
+    prefix = "<" if little_endian else ">"
+    result = []
+    for phase in range(run_alignment(formats, eight_byte_alignment)):
+        parts = [prefix]
+        position = 0
+        offsets = run_offsets(formats, phase, eight_byte_alignment)
+        for char, offset in zip(formats, offsets):
+            if offset > position:
+                parts.append(f"{offset - position}x")
+            parts.append(char)
+            position = offset + FORMAT_SIZES[char]
+        result.append(struct.Struct("".join(parts)))
+    return tuple(result)
+
+
+@lru_cache(maxsize=None)
+def run_offsets(formats: str, phase: int, eight_byte_alignment: int) -> tuple[int, ...]:
+    """Return the offset of each member of a run relative to the run's start."""
+
+    offsets = []
+    position = phase
+    for char in formats:
+        position += -position % format_alignment(char, eight_byte_alignment)
+        offsets.append(position - phase)
+        position += FORMAT_SIZES[char]
+    return tuple(offsets)
+
+
+def run_alignment(formats: str, eight_byte_alignment: int) -> int:
+    """Return the largest alignment required by any member of a run."""
+
+    return max(
+        (format_alignment(char, eight_byte_alignment) for char in formats), default=1
+    )
+
+
+def format_alignment(char: str, eight_byte_alignment: int) -> int:
+    size = FORMAT_SIZES[char]
+    return eight_byte_alignment if size == 8 else size
+
+
+# ----------------------------------------------------------------------
+# Plan construction
+# ----------------------------------------------------------------------
+_PLAN_CACHES: WeakKeyDictionary[MessageSchema, Dict[str, Plan]] = WeakKeyDictionary()
+
+# Empty structures are serialised with a single placeholder octet, mirroring
+# the member that ``rosidl`` adds to empty messages.
+EMPTY_STRUCT_FIELDS = (FieldDefinition("structure_needs_at_least_one_member", "uint8"),)
+
+
+def wire_fields(definition: MessageDefinition) -> tuple[FieldDefinition, ...]:
+    """Return the fields serialised for ``definition``.
+
+    Empty ``.msg`` types get the placeholder octet; empty IDL types have no
+    members on the wire.
+    """
+
+    if definition.extensibility is not None:
+        return tuple(definition.fields)
+    return tuple(definition.fields) or EMPTY_STRUCT_FIELDS
+
+
+def _plan_cache(schema: MessageSchema) -> Dict[str, Plan]:
+    cache = _PLAN_CACHES.get(schema)
+    if cache is None:
+        cache = _PLAN_CACHES[schema] = {}
+    return cache
+
+
+def _build_plan(schema: MessageSchema, type_name: str, cache: Dict[str, Plan]) -> Plan:
+    plan = cache.get(type_name)
+    if plan is not None:
+        return plan
+
+    definition = schema[type_name]
+    # XTypes rules apply to IDL types only.
+    xtypes = definition.extensibility is not None
+    mutable = definition.extensibility == "mutable"
+    steps: list[Step] = []
+    formats: list[str] = []
+    shape: list[ShapeEntry] = []
+
+    def flush() -> None:
+        if shape:
+            steps.append(FixedRun("".join(formats), tuple(shape)))
+            formats.clear()
+            shape.clear()
+
+    for field in wire_fields(definition):
+        if mutable or field.is_optional:
+            flush()
+            steps.append(_member_step(schema, field, cache, xtypes))
+            continue
+
+        fixed = _fixed_entry(schema, field, cache, xtypes)
+        if fixed is not None:
+            formats.append(fixed[0])
+            shape.append(fixed[1])
+            continue
+
+        flush()
+        steps.append(_field_step(field, xtypes))
+    flush()
+
+    plan = Plan(type_name, tuple(steps), definition.extensibility)
+    cache[type_name] = plan
+    return plan
+
+
+def _field_step(field: FieldDefinition, xtypes: bool) -> Step:
+    """Return the step of a field that is not part of a fixed-size run."""
+
+    if field.type in ("string", "wstring"):
+        if field.type == "wstring":
+            raise ValueError(f"Field {field.name!r}: wstring is not supported")
+        return StringStep(
+            field.name, field.array_length, field.is_array, xtypes and field.is_array
+        )
+    if not field.is_complex:
+        return ArrayStep(field.name, field.type, field.array_length)
+    return MessageStep(
+        field.name,
+        field.type,
+        field.array_length,
+        field.is_array,
+        xtypes and field.is_array,
+    )
+
+
+def _member_step(
+    schema: MessageSchema, field: FieldDefinition, cache: Dict[str, Plan], xtypes: bool
+) -> MemberStep:
+    fixed = _fixed_entry(schema, field, cache, xtypes)
+    size = None
+    if fixed is not None:
+        step: Step = FixedRun(fixed[0], (fixed[1],))
+        if field.type in PRIMITIVE_TYPES and field.array_length is None:
+            size = FORMAT_SIZES[fixed[0]]
+    else:
+        step = _field_step(field, xtypes)
+    return MemberStep(
+        field.name,
+        0 if field.member_id is None else field.member_id,
+        step,
+        must_understand=field.is_key,
+        optional=field.is_optional,
+        size=size,
+    )
+
+
+def _fixed_entry(
+    schema: MessageSchema, field: FieldDefinition, cache: Dict[str, Plan], xtypes: bool
+) -> tuple[str, ShapeEntry] | None:
+    """Return the run formats and shape of ``field`` if it has a fixed size."""
+
+    if field.is_sequence:
+        return None
+    count = field.array_length
+    if count is not None and count > MAX_MERGED_ARRAY_LENGTH:
+        return None
+    if count is not None and field.is_complex and xtypes:
+        # XCDR2 delimits arrays of messages.
+        return None
+
+    if field.type in PRIMITIVE_TYPES:
+        char = PRIMITIVE_FORMATS[field.type]
+        return (
+            char * (count if count is not None else 1),
+            ShapeEntry(field.name, count),
+        )
+    if not field.is_complex:
+        return None
+
+    run = _build_plan(schema, field.type, cache).fixed_run
+    if run is None:
+        return None
+    return run.formats * (count if count is not None else 1), ShapeEntry(
+        field.name, count, run.shape
+    )
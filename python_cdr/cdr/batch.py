@@ -0,0 +1,199 @@
+"""Columnar decoding of many messages of one type.
+
+:func:`decode_batch` decodes a collection of CDR payloads that share a
+schema and returns one column per field.  Nested (non-array) messages are
+flattened into dotted column names such as ``"header.stamp.sec"``.  Numeric
+fields become NumPy arrays, fixed-size primitive arrays become 2-D arrays and
+all other fields – strings, sequences, arrays of messages and the members
+of IDL types that can be absent, optional ones and those of mutable types –
+become lists with one entry per message, holding ``None`` for absent
+members.
+
+When the message type has a fixed layout and all payloads share the same
+size and encapsulation kind, the payloads are concatenated into a single
+buffer and every column is a strided NumPy view over it, so no per-message
+Python code runs at all.  Other message types are decoded message by message
+with :class:`~cdr.decoder.MessageDecoder`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Union
+
+from ._numpy import import_numpy
+from ._plan import PRIMITIVE_FORMATS
+from .decoder import MessageDecoder
+from .encapsulation_kind import EncapsulationKind
+from .fixed_layout import fixed_layout
+from .get_encapsulation_kind_info import get_encapsulation_kind_info
+from .reader import CdrReader
+from .schema import MessageSchema
+
+Payload = Union[bytes, bytearray, memoryview]
+
+
+@dataclass(frozen=True)
+class _Column:
+    """A column of the batch result and where its values live in a message."""
+
+    name: str
+    path: tuple[str, ...]
+    format: str | None = None
+    count: int | None = None
+
+
+def decode_batch(
+    payloads: Iterable[Payload],
+    schema: MessageSchema,
+    type_name: str | None = None,
+) -> Dict[str, Any]:
+    """Decode ``payloads`` of one message type into columns.
+
+    Parameters
+    ----------
+    payloads:
+        Complete CDR payloads, each including its encapsulation header.
+    schema:
+        The schema describing the messages.
+    type_name:
+        Type of the messages, defaulting to the schema root.
+
+    Returns
+    -------
+    dict
+        A mapping from column name to a NumPy array (numeric fields) or a
+        list (all other fields).  Columns of the vectorised path are strided
+        views over one buffer holding all payloads and use the stream byte
+        order.
+    """
+
+    np = import_numpy()
+    type_name = schema.root if type_name is None else type_name
+    payloads = list(payloads)
+    columns = _columns(schema, type_name, ())
+
+    if payloads and _is_vectorisable(columns):
+        result = _decode_fixed(np, payloads, schema, type_name, columns)
+        if result is not None:
+            return result
+
+    decoder = MessageDecoder(schema, type_name)
+    values: List[List[Any]] = [[] for _ in columns]
+    accessors = list(zip([column.path for column in columns], values))
+    for payload in payloads:
+        message = decoder.read(CdrReader(payload, as_numpy=True))
+        for path, column_values in accessors:
+            value = message
+            for key in path:
+                value = value[key]
+            column_values.append(value)
+
+    result = {}
+    for column, column_values in zip(columns, values):
+        if column.format is None:
+            result[column.name] = column_values
+        else:
+            dtype = np.dtype(column.format)
+            if column.count is None:
+                result[column.name] = np.array(column_values, dtype=dtype)
+            else:
+                result[column.name] = np.array(column_values, dtype=dtype).reshape(
+                    len(column_values), column.count
+                )
+    return result
+
+
+# ----------------------------------------------------------------------
+# Internal helpers
+# ----------------------------------------------------------------------
+def _columns(
+    schema: MessageSchema, type_name: str, prefix: tuple[str, ...]
+) -> list[_Column]:
+    definition = schema[type_name]
+    # Members missing from a mutable type's payload decode as ``None`` too.
+    mutable = definition.extensibility == "mutable"
+    columns = []
+    for field in definition.fields:
+        path = prefix + (field.name,)
+        if field.is_optional or mutable:
+            # Absent members are ``None``, which numeric columns cannot hold
+            # and whose members cannot be flattened.
+            columns.append(_Column(".".join(path), path))
+        elif field.is_complex and not field.is_array:
+            columns += _columns(schema, field.type, path)
+        elif field.type in PRIMITIVE_FORMATS and not field.is_sequence:
+            columns.append(
+                _Column(
+                    ".".join(path),
+                    path,
+                    PRIMITIVE_FORMATS[field.type],
+                    field.array_length,
+                )
+            )
+        else:
+            columns.append(_Column(".".join(path), path))
+    return columns
+
+
+def _is_vectorisable(columns: list[_Column]) -> bool:
+    """``True`` if every column is numeric.
+
+    Whether the type has a fixed layout depends on the encapsulation kind of
+    the payloads, which :func:`_decode_fixed` checks.
+    """
+
+    return bool(columns) and all(column.format is not None for column in columns)
+
+
+def _decode_fixed(
+    np: Any,
+    payloads: list[Payload],
+    schema: MessageSchema,
+    type_name: str,
+    columns: list[_Column],
+) -> Dict[str, Any] | None:
+    """Decode fixed-layout payloads with strided views, if they are uniform.
+
+    Returns ``None`` when the payloads differ in size or kind, or when the
+    type has no fixed layout in their kind.
+    """
+
+    sizes = set(map(len, payloads))
+    if len(sizes) != 1:
+        return None
+    stride = sizes.pop()
+    buffer = b"".join(payloads)
+    kinds = np.frombuffer(buffer, dtype=np.uint8)[1::stride]
+    kind_value = kinds[0]
+    if not (kinds == kind_value).all():
+        return None
+
+    kind = EncapsulationKind(int(kind_value))
+    prefix = "<" if get_encapsulation_kind_info(kind).little_endian else ">"
+    layout = fixed_layout(schema, type_name, kind)
+    if layout is None:
+        return None
+    if layout.size > stride:
+        raise ValueError(f"Payload size {stride} is too small for {type_name}")
+
+    names, formats, field_offsets = [], [], []
+    for column in columns:
+        assert column.format is not None
+        names.append(column.name)
+        field_offsets.append(layout.offsets[column.name])
+        if column.count is None:
+            formats.append(prefix + column.format)
+        else:
+            formats.append((prefix + column.format, (column.count,)))
+
+    dtype = np.dtype(
+        {
+            "names": names,
+            "formats": formats,
+            "offsets": field_offsets,
+            "itemsize": stride,
+        }
+    )
+    records = np.frombuffer(buffer, dtype=dtype)
+    return {name: records[name] for name in names}
@@ -0,0 +1,480 @@
+"""Schema-compiled message decoder.
+
+:class:`MessageDecoder` turns a :class:`~cdr.schema.MessageSchema` into a
+specialised decoding function per message type.  The function is generated
+as straight-line Python source: runs of fixed-size fields are read with one
+precompiled :class:`struct.Struct` each (see :mod:`cdr._plan`), strings and
+sequence lengths are decoded inline and primitive arrays are read through
+:class:`~cdr.reader.CdrReader`, so the results and alignment behaviour are
+identical to decoding the message field by field.
+"""
+
+from __future__ import annotations
+
+import struct
+from functools import partial
+from typing import Any, Callable, Dict, Tuple
+
+from ._plan import (
+    PRIMITIVE_METHODS,
+    ArrayStep,
+    FixedRun,
+    MemberStep,
+    MessageStep,
+    Plan,
+    ShapeEntry,
+    StringStep,
+    get_plan,
+    moves_origin,
+    run_structs,
+)
+from .reader import CdrReader
+from .reserved_pids import EXTENDED_PID, SENTINEL_PID
+from .schema import MessageSchema
+from .string_cache import COPY_FREE_LENGTH, StringCache
+from .struct_array import is_struct_array_type, read_struct_array
+
+# Generated decoders take ``(reader, view, offset, origin)`` and return the
+# decoded message together with the offset following it.  A decoder that
+# moves the alignment origin leaves the new origin in ``reader.origin``.
+DecodeFunction = Callable[[CdrReader, memoryview, int, int], Tuple[Dict[str, Any], int]]
+
+_UINT32_LE = struct.Struct("<I")
+_UINT32_BE = struct.Struct(">I")
+_UINT16_LE = struct.Struct("<H")
+_UINT16_BE = struct.Struct(">H")
+# Multiplier of the NEXTINT following an EMHEADER, by length code.
+_NEXTINT_SCALE = (1, 1, 1, 1, 1, 1, 4, 8)
+
+
+class MessageDecoder:
+    """Decode CDR payloads of a single message type into dictionaries.
+
+    Nested messages are decoded into nested dictionaries and arrays into
+    lists, except for primitive sequences which are returned exactly as
+    :meth:`CdrReader.float32_array` and friends return them.  Decoding
+    functions are compiled lazily for each combination of byte order and
+    ``eight_byte_alignment`` encountered.
+
+    With a ``string_cache``, decoded strings are interned in the given
+    :class:`~cdr.string_cache.StringCache`.  With ``struct_arrays``,
+    sequences of fixed-size messages are returned as NumPy structured arrays
+    by :func:`~cdr.struct_array.read_struct_array`.
+    """
+
+    def __init__(
+        self,
+        schema: MessageSchema,
+        type_name: str | None = None,
+        *,
+        string_cache: StringCache | None = None,
+        struct_arrays: bool = False,
+    ) -> None:
+        self._schema = schema
+        self._type_name = schema.root if type_name is None else type_name
+        self._string_cache = string_cache
+        self._struct_arrays = struct_arrays
+        # Validate the schema eagerly so that errors surface on construction.
+        get_plan(schema, self._type_name)
+        self._compiled: Dict[tuple[bool, int], DecodeFunction] = {}
+
+    @property
+    def schema(self) -> MessageSchema:
+        return self._schema
+
+    @property
+    def type_name(self) -> str:
+        return self._type_name
+
+    def decode(self, data: bytes | bytearray | memoryview) -> Dict[str, Any]:
+        """Decode a complete payload including its encapsulation header."""
+
+        return self.read(CdrReader(data, string_cache=self._string_cache))
+
+    def read(self, reader: CdrReader) -> Dict[str, Any]:
+        """Decode one message at the current offset of ``reader``."""
+
+        function = self.function_for(reader.little_endian, reader.eight_byte_alignment)
+        message, reader.offset = function(
+            reader, reader._view, reader.offset, reader.origin
+        )
+        return message
+
+    def function_for(
+        self, little_endian: bool, eight_byte_alignment: int
+    ) -> DecodeFunction:
+        """Return the compiled decoding function for the given stream layout."""
+
+        key = (little_endian, eight_byte_alignment)
+        function = self._compiled.get(key)
+        if function is None:
+            function = _Compiler(
+                self._schema,
+                little_endian,
+                eight_byte_alignment,
+                self._string_cache,
+                self._struct_arrays,
+            ).get(self._type_name)
+            self._compiled[key] = function
+        return function
+
+
+# ----------------------------------------------------------------------
+# Code generation
+# ----------------------------------------------------------------------
+class _Compiler:
+    """Generate decoding functions for the types of one schema and layout."""
+
+    def __init__(
+        self,
+        schema: MessageSchema,
+        little_endian: bool,
+        eight_byte_alignment: int,
+        string_cache: StringCache | None,
+        struct_arrays: bool,
+    ) -> None:
+        self._schema = schema
+        self._little_endian = little_endian
+        self._eight_byte_alignment = eight_byte_alignment
+        self._string_cache = string_cache
+        self._struct_arrays = struct_arrays
+        self._functions: Dict[str, DecodeFunction] = {}
+
+    def get(self, type_name: str) -> DecodeFunction:
+        function = self._functions.get(type_name)
+        if function is None:
+            function = self._compile(type_name)
+            self._functions[type_name] = function
+        return function
+
+    def _compile(self, type_name: str) -> DecodeFunction:
+        namespace: Dict[str, Any] = {
+            "_u32": (_UINT32_LE if self._little_endian else _UINT32_BE).unpack_from,
+            "_u16": (_UINT16_LE if self._little_endian else _UINT16_BE).unpack_from,
+            "_unknown_member": partial(_unknown_member, type_name),
+            "_NEXTINT_SCALE": _NEXTINT_SCALE,
+        }
+        if self._string_cache is not None:
+            namespace["_strings"] = self._string_cache._strings
+            namespace["_intern"] = self._string_cache._insert
+        plan = get_plan(self._schema, type_name)
+        cdr2 = self._eight_byte_alignment == 4
+        lines = ["def decode(reader, view, offset, origin):"]
+        values: list[tuple[str, str]] = []
+
+        if cdr2 and plan.delimited:
+            lines += _inline_sequence_length("end") + ["    end += offset"]
+        if plan.extensibility == "mutable":
+            lines += self._mutable_code(plan, namespace, values, cdr2)
+        else:
+            for index, step in enumerate(plan.steps):
+                if isinstance(step, MemberStep):
+                    lines += self._optional_code(index, step, namespace, values, cdr2)
+                else:
+                    lines += self._step_code(index, step, namespace, values)
+        if cdr2 and plan.delimited:
+            # Skips members appended by newer versions of appendable types.
+            lines.append("    offset = end")
+
+        fields = ", ".join(f"{name!r}: {expression}" for name, expression in values)
+        lines.append(f"    return {{{fields}}}, offset")
+
+        exec(compile("\n".join(lines), f"<decoder {type_name}>", "exec"), namespace)
+        return namespace["decode"]
+
+    def _step_code(
+        self,
+        index: int,
+        step: Any,
+        namespace: Dict[str, Any],
+        values: list[tuple[str, str]],
+    ) -> list[str]:
+        """Return the code decoding one step and add its values to ``values``."""
+
+        interned = self._string_cache is not None
+        if isinstance(step, FixedRun):
+            structs = run_structs(
+                step.formats, self._little_endian, self._eight_byte_alignment
+            )
+            namespace[f"_r{index}"] = structs
+            position = 0
+            for entry in step.shape:
+                expression, position = _shape_expression(entry, f"v{index}", position)
+                values.append((entry.name, expression))
+            return [
+                f"    s = _r{index}[(offset - origin) % {len(structs)}]",
+                f"    v{index} = s.unpack_from(view, offset)",
+                "    offset += s.size",
+            ]
+
+        local = f"f{index}"
+        values.append((step.name, local))
+        lines = []
+        if getattr(step, "delimited", False) and self._eight_byte_alignment == 4:
+            # The DHEADER of a collection is not needed to decode it.
+            lines.append("    offset += -(offset - origin) % 4 + 4")
+        if isinstance(step, StringStep):
+            if step.is_array:
+                lines += _inline_string_array(local, step.count, interned)
+            else:
+                lines += _inline_string(local, interned, "    ")
+        elif isinstance(step, ArrayStep):
+            method = f"reader.{PRIMITIVE_METHODS[step.type]}_array({step.count})"
+            if step.type == "bool":
+                method = f"[bool(b) for b in {method}]"
+            lines += _reader_call(local, method)
+        elif (
+            step.is_array
+            and self._struct_arrays
+            and is_struct_array_type(
+                self._schema, step.type, self._eight_byte_alignment
+            )
+        ):
+            namespace[f"_a{index}"] = partial(
+                read_struct_array, schema=self._schema, type_name=step.type
+            )
+            lines += _reader_call(local, f"_a{index}(reader, count={step.count})")
+        else:
+            namespace[f"_m{index}"] = self.get(step.type)
+            lines += _nested_call(
+                step,
+                local,
+                f"_m{index}",
+                moves_origin(self._schema, step.type, self._eight_byte_alignment),
+            )
+        return lines
+
+    def _member_value(
+        self,
+        index: int,
+        step: MemberStep,
+        namespace: Dict[str, Any],
+        values: list[tuple[str, str]],
+        indent: str,
+    ) -> list[str]:
+        """Return the code decoding a member into the local ``m<index>``."""
+
+        member_values: list[tuple[str, str]] = []
+        lines = self._step_code(index, step.step, namespace, member_values)
+        lines.append(f"    m{index} = {member_values[0][1]}")
+        values.append((step.name, f"m{index}"))
+        return [indent + line[4:] for line in lines]
+
+    def _optional_code(
+        self,
+        index: int,
+        step: MemberStep,
+        namespace: Dict[str, Any],
+        values: list[tuple[str, str]],
+        cdr2: bool,
+    ) -> list[str]:
+        """Return the code decoding an optional member of a final or
+        appendable type.
+
+        XCDR2 precedes the member with a presence flag; XCDR1 wraps it in a
+        parameter header whose size is zero for absent members.
+        """
+
+        lines = [f"    m{index} = None"]
+        if cdr2:
+            lines += [
+                "    present = view[offset]",
+                "    offset += 1",
+                "    if present:",
+            ]
+            return lines + self._member_value(
+                index, step, namespace, values, "        "
+            )
+        lines += _inline_parameter_header() + [
+            "    origin = reader.origin = offset",
+            "    if size:",
+            "        member_end = offset + size",
+        ]
+        lines += self._member_value(index, step, namespace, values, "        ")
+        return lines + ["        offset = member_end"]
+
+    def _mutable_code(
+        self,
+        plan: Plan,
+        namespace: Dict[str, Any],
+        values: list[tuple[str, str]],
+        cdr2: bool,
+    ) -> list[str]:
+        """Return the loop decoding the members of a mutable type in any order.
+
+        Absent members decode as ``None`` and unknown members are skipped
+        unless their must understand flag is set.
+        """
+
+        lines = [f"    m{index} = None" for index in range(len(plan.steps))]
+        if cdr2:
+            lines += [
+                "    while offset < end:",
+                "        offset += -(offset - origin) % 4",
+                "        header = _u32(view, offset)[0]",
+                "        offset += 4",
+                "        code = header >> 28 & 7",
+                "        if code < 4:",
+                "            size = 1 << code",
+                "        else:",
+                "            size = _NEXTINT_SCALE[code] * _u32(view, offset)[0]",
+                "            offset += 4",
+                "        member_id = header & 0x0FFFFFFF",
+                "        must_understand = header & 0x80000000",
+            ]
+        else:
+            lines += [
+                "    while True:",
+                "        offset += -(offset - origin) % 4",
+                "        header = _u16(view, offset)[0]",
+                "        member_id = header & 0x3FFF",
+                f"        if member_id == {SENTINEL_PID:#x}:",
+                "            offset += 4",
+                "            break",
+                f"        if member_id > {SENTINEL_PID:#x} or header & 0x8000:",
+                "            raise _unknown_member(member_id, header)",
+                f"        if member_id == {EXTENDED_PID:#x}:",
+                "            member_id = _u32(view, offset + 4)[0]",
+                "            size = _u32(view, offset + 8)[0]",
+                "            offset += 12",
+                "        else:",
+                "            size = _u16(view, offset + 2)[0]",
+                "            offset += 4",
+                "        must_understand = header & 0x4000",
+                "        origin = reader.origin = offset",
+            ]
+        lines.append("        member_end = offset + size")
+        keyword = "if"
+        for index, step in enumerate(plan.steps):
+            lines.append(f"        {keyword} member_id == {step.member_id}:")
+            lines += self._member_value(index, step, namespace, values, "            ")
+            keyword = "elif"
+        lines += [
+            f"        {'elif' if plan.steps else 'if'} must_understand:",
+            "            raise _unknown_member(member_id)",
+            "        offset = member_end",
+        ]
+        return lines
+
+
+def _shape_expression(entry: ShapeEntry, values: str, position: int) -> tuple[str, int]:
+    """Return a Python expression building ``entry`` from a run's values."""
+
+    if entry.shape is None:
+        if entry.count is None:
+            return f"{values}[{position}]", position + 1
+        end = position + entry.count
+        return f"list({values}[{position}:{end}])", end
+
+    elements = []
+    for _ in range(1 if entry.count is None else entry.count):
+        fields = []
+        for nested in entry.shape:
+            expression, position = _shape_expression(nested, values, position)
+            fields.append(f"{nested.name!r}: {expression}")
+        elements.append("{" + ", ".join(fields) + "}")
+    if entry.count is None:
+        return elements[0], position
+    return "[" + ", ".join(elements) + "]", position
+
+
+def _nested_call(
+    step: MessageStep, local: str, function_name: str, moving: bool
+) -> list[str]:
+    call = f"{function_name}(reader, view, offset, origin)"
+    # Decoders keep ``reader.origin`` in step with a moved origin.
+    update = ["origin = reader.origin"] if moving else []
+    if not step.is_array:
+        return [f"    {line}" for line in [f"{local}, offset = {call}", *update]]
+
+    if step.count is None:
+        lines = _inline_sequence_length("n")
+    else:
+        lines = [f"    n = {step.count}"]
+    return lines + [
+        f"    {local} = []",
+        "    for _ in range(n):",
+        f"        item, offset = {call}",
+        *[f"        {line}" for line in update],
+        f"        {local}.append(item)",
+    ]
+
+
+def _inline_sequence_length(local: str) -> list[str]:
+    return [
+        "    offset += -(offset - origin) % 4",
+        f"    {local} = _u32(view, offset)[0]",
+        "    offset += 4",
+    ]
+
+
+def _inline_string(local: str, interned: bool, indent: str) -> list[str]:
+    # Mirrors ``CdrReader.string``: the length includes the null terminator.
+    text = "view[offset:offset + n - 1]"
+    if interned:
+        decode = [
+            f"        k = {text}.tobytes()",
+            f"        {local} = _strings.get(k)",
+            f"        if {local} is None:",
+            f"            {local} = _intern(k)",
+        ]
+    else:
+        decode = [f"        {local} = {text}.tobytes().decode()"]
+    lines = (
+        _inline_sequence_length("n")
+        + [
+            f"    if n > {COPY_FREE_LENGTH}:",
+            f"        {local} = str({text}, 'utf-8')",
+            "    elif n > 1:",
+        ]
+        + decode
+        + ["    else:", f"        {local} = ''", "    offset += n"]
+    )
+    return [indent + line[4:] for line in lines]
+
+
+def _inline_string_array(local: str, count: int | None, interned: bool) -> list[str]:
+    if count is None:
+        lines = _inline_sequence_length("c")
+    else:
+        lines = [f"    c = {count}"]
+    return (
+        lines
+        + [f"    {local} = []", "    for _ in range(c):"]
+        + _inline_string("s", interned, "        ")
+        + [f"        {local}.append(s)"]
+    )
+
+
+def _inline_parameter_header() -> list[str]:
+    """Read an XCDR1 parameter header into ``size``, skipping its ID."""
+
+    return [
+        "    offset += -(offset - origin) % 4",
+        f"    if _u16(view, offset)[0] & 0x3FFF == {EXTENDED_PID:#x}:",
+        "        size = _u32(view, offset + 8)[0]",
+        "        offset += 12",
+        "    else:",
+        "        size = _u16(view, offset + 2)[0]",
+        "        offset += 4",
+    ]
+
+
+def _unknown_member(
+    type_name: str, member_id: int, header: int | None = None
+) -> ValueError:
+    if header is not None:
+        return ValueError(
+            f"Unsupported parameter ID header {header:04x} in {type_name}"
+        )
+    return ValueError(
+        f"Unknown member {member_id} of {type_name} is marked must understand"
+    )
+
+
+def _reader_call(local: str, expression: str) -> list[str]:
+    return [
+        "    reader.offset = offset",
+        f"    {local} = {expression}",
+        "    offset = reader.offset",
+    ]
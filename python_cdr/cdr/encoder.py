@@ -0,0 +1,626 @@
+"""Schema-compiled message encoder.
+
+:class:`MessageEncoder` is the counterpart of :class:`~cdr.decoder.MessageDecoder`.
+For each message type two functions are generated: one computing the exact
+serialised size in the manner of :class:`~cdr.size_calculator.CdrSizeCalculator`
+and one writing the message into a preallocated buffer.  Runs of fixed-size
+fields are packed with a single ``pack_into`` call using the precompiled
+structs of :mod:`cdr._plan`, so a message is serialised with one allocation
+and without per-field method dispatch.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Tuple, Union
+
+from ._numpy import numpy_array_bytes
+from ._plan import (
+    FORMAT_SIZES,
+    PRIMITIVE_FORMATS,
+    ArrayStep,
+    FixedRun,
+    MemberStep,
+    MessageStep,
+    ShapeEntry,
+    StringStep,
+    format_alignment,
+    get_plan,
+    moves_origin,
+    run_structs,
+)
+from .encapsulation_kind import EncapsulationKind
+from .fixed_layout import fixed_layout
+from .get_encapsulation_kind_info import get_encapsulation_kind_info
+from .is_big_endian import is_big_endian
+from .reserved_pids import EXTENDED_PID, SENTINEL_PID
+from .schema import MessageSchema
+from .writer import CdrWriter
+
+# ``size(message, offset, origin, strings)`` returns the offset following the
+# message and appends every encoded string to ``strings``;
+# ``write(message, buffer, offset, origin, strings)`` consumes them again.
+# Both return ``(offset, origin)`` instead for types that can move the
+# alignment origin (see :func:`cdr._plan.moves_origin`).
+_End = Union[int, Tuple[int, int]]
+SizeFunction = Callable[[Mapping[str, Any], int, int, List[bytes]], _End]
+WriteFunction = Callable[
+    [Mapping[str, Any], bytearray, int, int, Iterator[bytes]], _End
+]
+
+_UINT32_LE = struct.Struct("<I")
+_UINT32_BE = struct.Struct(">I")
+_UINT16_LE = struct.Struct("<H")
+_UINT16_BE = struct.Struct(">H")
+# EMHEADER length code of primitive members, by size.
+_LENGTH_CODES = {1: 0, 2: 1, 4: 2, 8: 3}
+_HOST_LITTLE_ENDIAN = not is_big_endian()
+_PADDING = tuple(bytes(n) for n in range(8))
+
+
+class MessageEncoder:
+    """Encode dictionaries of a single message type into CDR payloads.
+
+    Messages use the same representation that :class:`MessageDecoder`
+    produces: nested messages are mappings and arrays are sequences.
+    Primitive arrays may also be passed as :class:`array.array`,
+    ``memoryview`` or other buffer objects; matching buffers are copied in
+    bulk.
+    """
+
+    def __init__(
+        self,
+        schema: MessageSchema,
+        type_name: str | None = None,
+        *,
+        kind: EncapsulationKind = EncapsulationKind.CDR_LE,
+    ) -> None:
+        self._schema = schema
+        self._type_name = schema.root if type_name is None else type_name
+        self._kind = kind
+        info = get_encapsulation_kind_info(kind)
+        self._little_endian = info.little_endian
+        self._eight_byte_alignment = 4 if info.is_cdr2 else 8
+        self._compiled: Dict[tuple[bool, int], tuple[SizeFunction, WriteFunction]] = {}
+        self._size, self._write = self.functions_for(
+            self._little_endian, self._eight_byte_alignment
+        )
+        self._moves_origin = moves_origin(
+            schema, self._type_name, self._eight_byte_alignment
+        )
+        # Fixed-size types are allocated without walking the message.
+        layout = fixed_layout(schema, self._type_name, kind)
+        self._fixed_size = None if layout is None else layout.size
+
+    @property
+    def schema(self) -> MessageSchema:
+        return self._schema
+
+    @property
+    def type_name(self) -> str:
+        return self._type_name
+
+    @property
+    def kind(self) -> EncapsulationKind:
+        return self._kind
+
+    def size(self, message: Mapping[str, Any]) -> int:
+        """Return the size of the encoded payload including its header."""
+
+        if self._fixed_size is not None:
+            return self._fixed_size
+        end = self._size(message, 4, 4, [])
+        return end[0] if self._moves_origin else end
+
+    def encode(self, message: Mapping[str, Any]) -> bytearray:
+        """Serialise ``message`` into a new, exactly sized buffer."""
+
+        if self._fixed_size is not None:
+            buffer = bytearray(self._fixed_size)
+            buffer[1] = self._kind.value
+            self._write(message, buffer, 4, 4, iter(()))
+            return buffer
+
+        strings: List[bytes] = []
+        end = self._size(message, 4, 4, strings)
+        buffer = bytearray(end[0] if self._moves_origin else end)
+        buffer[1] = self._kind.value
+        self._write(message, buffer, 4, 4, iter(strings))
+        return buffer
+
+    def write(self, writer: CdrWriter, message: Mapping[str, Any]) -> CdrWriter:
+        """Append ``message`` to ``writer``, growing its buffer at most once."""
+
+        size, write = self.functions_for(
+            writer._little_endian, writer._eight_byte_alignment
+        )
+        strings: List[bytes] = []
+        end = size(message, writer._offset, writer._origin, strings)
+        arguments = (message, writer._buffer, writer._offset, writer._origin)
+        if moves_origin(self._schema, self._type_name, writer._eight_byte_alignment):
+            writer._resize_if_needed(end[0] - writer._offset)
+            writer._offset, writer._origin = write(*arguments, iter(strings))
+        else:
+            writer._resize_if_needed(end - writer._offset)
+            writer._offset = write(*arguments, iter(strings))
+        return writer
+
+    def functions_for(
+        self, little_endian: bool, eight_byte_alignment: int
+    ) -> tuple[SizeFunction, WriteFunction]:
+        """Return the compiled size and write functions for a stream layout."""
+
+        key = (little_endian, eight_byte_alignment)
+        functions = self._compiled.get(key)
+        if functions is None:
+            compiler = _Compiler(self._schema, little_endian, eight_byte_alignment)
+            functions = compiler.get(self._type_name)
+            self._compiled[key] = functions
+        return functions
+
+
+# ----------------------------------------------------------------------
+# Code generation
+# ----------------------------------------------------------------------
+class _Compiler:
+    """Generate size and write functions for one schema and layout."""
+
+    def __init__(
+        self, schema: MessageSchema, little_endian: bool, eight_byte_alignment: int
+    ) -> None:
+        self._schema = schema
+        self._little_endian = little_endian
+        self._eight_byte_alignment = eight_byte_alignment
+        self._functions: Dict[str, tuple[SizeFunction, WriteFunction]] = {}
+
+    def get(self, type_name: str) -> tuple[SizeFunction, WriteFunction]:
+        functions = self._functions.get(type_name)
+        if functions is None:
+            functions = self._compile(type_name)
+            self._functions[type_name] = functions
+        return functions
+
+    def _compile(self, type_name: str) -> tuple[SizeFunction, WriteFunction]:
+        namespace: Dict[str, Any] = {
+            "_pack_u32": (_UINT32_LE if self._little_endian else _UINT32_BE).pack_into,
+            "_pack_u16": (_UINT16_LE if self._little_endian else _UINT16_BE).pack_into,
+            "_pack_array": _pack_array,
+            "_array_error": _array_error,
+            "_fixed": _fixed,
+            "_PADDING": _PADDING,
+            "_little_endian": self._little_endian,
+        }
+        plan = get_plan(self._schema, type_name)
+        cdr2 = self._eight_byte_alignment == 4
+        mutable = plan.extensibility == "mutable"
+        moving = moves_origin(self._schema, type_name, self._eight_byte_alignment)
+        size_lines = ["def size(message, offset, origin, strings):"]
+        write_lines = ["def write(message, buffer, offset, origin, strings):"]
+
+        if cdr2 and plan.delimited:
+            size_lines += _sequence_length_size()
+            write_lines += _align_write(4, "    ") + [
+                "    d = offset",
+                "    offset += 4",
+            ]
+        for index, step in enumerate(plan.steps):
+            if isinstance(step, MemberStep):
+                size_body, write_body = self._member_code(
+                    index, step, namespace, mutable
+                )
+            else:
+                size_body, write_body = self._step_code(index, step, namespace)
+            size_lines += size_body
+            write_lines += write_body
+        if mutable and not cdr2:
+            size_lines += _sequence_length_size()
+            write_lines += _align_write(4, "    ") + [
+                f"    _pack_u16(buffer, offset, {SENTINEL_PID:#x})",
+                "    _pack_u16(buffer, offset + 2, 0)",
+                "    offset += 4",
+            ]
+        if cdr2 and plan.delimited:
+            write_lines.append("    _pack_u32(buffer, d, offset - d - 4)")
+
+        returned = "offset, origin" if moving else "offset"
+        size_lines.append(f"    return {returned}")
+        write_lines.append(f"    return {returned}")
+        source = "\n".join(size_lines + write_lines)
+        exec(compile(source, f"<encoder {type_name}>", "exec"), namespace)
+        return namespace["size"], namespace["write"]
+
+    def _step_code(
+        self, index: int, step: Any, namespace: Dict[str, Any]
+    ) -> tuple[list[str], list[str]]:
+        """Return the size and write code of one step."""
+
+        if isinstance(step, FixedRun):
+            structs = run_structs(
+                step.formats, self._little_endian, self._eight_byte_alignment
+            )
+            namespace[f"_r{index}"] = structs
+            select = f"    s = _r{index}[(offset - origin) % {len(structs)}]"
+            values = ", ".join(
+                expression
+                for entry in step.shape
+                for expression in _shape_values(entry, "message")
+            )
+            return [select, "    offset += s.size"], [
+                select,
+                f"    s.pack_into(buffer, offset, {values})",
+                "    offset += s.size",
+            ]
+
+        value = f"message[{step.name!r}]"
+        if isinstance(step, StringStep):
+            size_lines, write_lines = _string_code(step, value)
+        elif isinstance(step, ArrayStep):
+            size_lines, write_lines = self._array_code(step, value)
+        else:
+            size_function, write_function = self.get(step.type)
+            namespace[f"_s{index}"] = size_function
+            namespace[f"_w{index}"] = write_function
+            size_lines, write_lines = _nested_code(
+                step,
+                value,
+                index,
+                moves_origin(self._schema, step.type, self._eight_byte_alignment),
+            )
+
+        if getattr(step, "delimited", False) and self._eight_byte_alignment == 4:
+            size_lines = _sequence_length_size() + size_lines
+            write_lines = (
+                _align_write(4, "    ")
+                + [f"    d{index} = offset", "    offset += 4"]
+                + write_lines
+                + [f"    _pack_u32(buffer, d{index}, offset - d{index} - 4)"]
+            )
+        return size_lines, write_lines
+
+    def _member_code(
+        self, index: int, step: MemberStep, namespace: Dict[str, Any], mutable: bool
+    ) -> tuple[list[str], list[str]]:
+        """Return the size and write code of a member with a header or flag.
+
+        Members of mutable types get a member header and are omitted when
+        optional and ``None``.  Optional members of other types are preceded
+        by a presence flag under XCDR2 and by a parameter header, empty for
+        absent members, under XCDR1.
+        """
+
+        size_body, write_body = self._step_code(index, step.step, namespace)
+        cdr2 = self._eight_byte_alignment == 4
+        if cdr2:
+            size_lines, write_lines = _emheader_code(index, step, size_body, write_body)
+        else:
+            size_lines, write_lines = _parameter_code(
+                index, step, size_body, write_body
+            )
+        if not step.optional:
+            return size_lines, write_lines
+
+        present = f"message.get({step.name!r}) is not None"
+        if mutable:
+            return (
+                [f"    if {present}:"] + _indent(size_lines),
+                [f"    if {present}:"] + _indent(write_lines),
+            )
+        if cdr2:
+            return ["    offset += 1", f"    if {present}:"] + _indent(size_body), [
+                f"    present = {present}",
+                "    buffer[offset] = present",
+                "    offset += 1",
+                "    if present:",
+            ] + _indent(write_body)
+
+        absent_size, absent_write = _parameter_code(index, step, [], [])
+        return (
+            [f"    if {present}:"]
+            + _indent(size_lines)
+            + ["    else:"]
+            + _indent(absent_size),
+            [f"    if {present}:"]
+            + _indent(write_lines)
+            + ["    else:"]
+            + _indent(absent_write),
+        )
+
+    def _array_code(self, step: ArrayStep, value: str) -> tuple[list[str], list[str]]:
+        char = PRIMITIVE_FORMATS[step.type]
+        alignment = format_alignment(char, self._eight_byte_alignment)
+        itemsize = FORMAT_SIZES[char]
+        size_lines = [f"    v = {value}", "    n = len(v)"]
+        write_lines = [f"    v = {value}", "    n = len(v)"]
+        if step.count is None:
+            size_lines += _sequence_length_size()
+            write_lines += _sequence_length_write("n")
+        else:
+            check = [
+                f"    if n != {step.count}:",
+                f"        raise _array_error({step.name!r}, {step.count}, n)",
+            ]
+            size_lines += check
+            write_lines += check
+        size_lines += [
+            "    if n:",
+            f"        offset += -(offset - origin) % {alignment} + n * {itemsize}",
+        ]
+        write_lines += (
+            ["    if n:"]
+            + _align_write(alignment, "        ")
+            + [
+                f"        offset = _pack_array(buffer, offset, v, n, {char!r}, "
+                "_little_endian)",
+            ]
+        )
+        return size_lines, write_lines
+
+
+def _shape_values(entry: ShapeEntry, container: str) -> list[str]:
+    """Return the expressions producing the flat run values of ``entry``."""
+
+    value = f"{container}[{entry.name!r}]"
+    if entry.shape is None:
+        if entry.count is None:
+            return [value]
+        return [f"*_fixed({value}, {entry.count})"]
+
+    if entry.count is None:
+        elements = [value]
+    else:
+        checked = f"_fixed({value}, {entry.count})"
+        elements = [f"{checked}[{i}]" for i in range(entry.count)]
+    expressions = []
+    for element in elements:
+        for nested in entry.shape:
+            expressions += _shape_values(nested, element)
+    return expressions
+
+
+def _string_code(step: StringStep, value: str) -> tuple[list[str], list[str]]:
+    encode = [
+        "    offset += -(offset - origin) % 4",
+        "    e = s.encode('utf-8')",
+        "    strings.append(e)",
+        "    offset += len(e) + 5",
+    ]
+    write = (
+        ["    e = next(strings)", "    n = len(e)"]
+        + _align_write(4, "    ")
+        + [
+            "    _pack_u32(buffer, offset, n + 1)",
+            "    offset += 4",
+            "    buffer[offset:offset + n] = e",
+            "    buffer[offset + n] = 0",
+            "    offset += n + 1",
+        ]
+    )
+    if not step.is_array:
+        return [f"    s = {value}"] + encode, write
+
+    size_lines = [f"    v = {value}"]
+    write_lines = [f"    v = {value}"]
+    if step.count is None:
+        size_lines += _sequence_length_size()
+        write_lines += _sequence_length_write("len(v)")
+    else:
+        check = [
+            f"    if len(v) != {step.count}:",
+            f"        raise _array_error({step.name!r}, {step.count}, len(v))",
+        ]
+        size_lines += check
+        write_lines += check
+    size_lines += ["    for s in v:"] + ["    " + line for line in encode]
+    write_lines += ["    for _ in range(len(v)):"] + ["    " + line for line in write]
+    return size_lines, write_lines
+
+
+def _nested_code(
+    step: MessageStep, value: str, index: int, moving: bool
+) -> tuple[list[str], list[str]]:
+    size_call = f"_s{index}(m, offset, origin, strings)"
+    write_call = f"_w{index}(m, buffer, offset, origin, strings)"
+    result = "offset, origin" if moving else "offset"
+    if not step.is_array:
+        return (
+            [f"    m = {value}", f"    {result} = {size_call}"],
+            [f"    m = {value}", f"    {result} = {write_call}"],
+        )
+
+    size_lines = [f"    v = {value}"]
+    write_lines = [f"    v = {value}"]
+    if step.count is None:
+        size_lines += _sequence_length_size()
+        write_lines += _sequence_length_write("len(v)")
+    else:
+        check = [
+            f"    if len(v) != {step.count}:",
+            f"        raise _array_error({step.name!r}, {step.count}, len(v))",
+        ]
+        size_lines += check
+        write_lines += check
+    size_lines += ["    for m in v:", f"        {result} = {size_call}"]
+    write_lines += ["    for m in v:", f"        {result} = {write_call}"]
+    return size_lines, write_lines
+
+
+def _emheader_code(
+    index: int, step: MemberStep, size_body: list[str], write_body: list[str]
+) -> tuple[list[str], list[str]]:
+    """Wrap a member in an XCDR2 EMHEADER.
+
+    Primitive members use the length code for their size; the size of any
+    other member is patched into a NEXTINT once the member is written.
+    """
+
+    header = ((1 << 31) if step.must_understand else 0) | step.member_id
+    if step.size is not None:
+        header |= _LENGTH_CODES[step.size] << 28
+        return ["    offset += -(offset - origin) % 4 + 4"] + size_body, (
+            _align_write(4, "    ")
+            + [f"    _pack_u32(buffer, offset, {header:#x})", "    offset += 4"]
+            + write_body
+        )
+
+    header |= 4 << 28
+    position = f"h{index}"
+    return ["    offset += -(offset - origin) % 4 + 8"] + size_body, (
+        _align_write(4, "    ")
+        + [
+            f"    {position} = offset",
+            f"    _pack_u32(buffer, offset, {header:#x})",
+            "    offset += 8",
+        ]
+        + write_body
+        + [f"    _pack_u32(buffer, {position} + 4, offset - {position} - 8)"]
+    )
+
+
+def _parameter_code(
+    index: int, step: MemberStep, size_body: list[str], write_body: list[str]
+) -> tuple[list[str], list[str]]:
+    """Wrap a member in an XCDR1 parameter header.
+
+    As with :meth:`CdrWriter.emHeader`, the alignment origin moves to the
+    start of the member and stays there.  IDs above ``0x3f00`` always use an
+    extended header; other members are moved by 8 bytes to make room for one
+    if they turn out larger than 65535 bytes.
+    """
+
+    flag = 0x4000 if step.must_understand else 0
+    position = f"h{index}"
+    start = f"b{index}"
+    extended = step.member_id > 0x3F00
+    size_lines = [
+        f"    offset += -(offset - origin) % 4 + {12 if extended else 4}",
+        f"    origin = {start} = offset",
+        *size_body,
+    ]
+    if not extended:
+        size_lines += [
+            f"    if offset - {start} > 0xFFFF:",
+            "        offset += 8",
+            "        origin += 8",
+        ]
+
+    write_lines = _align_write(4, "    ") + [f"    {position} = offset"]
+    if extended:
+        write_lines += _extended_header(position, flag, step.member_id, "0") + [
+            "    offset += 12"
+        ]
+    else:
+        write_lines += ["    offset += 4"]
+    write_lines += [f"    origin = {start} = offset", *write_body]
+    if extended:
+        write_lines.append(f"    _pack_u32(buffer, {position} + 8, offset - {start})")
+    else:
+        write_lines += (
+            [
+                f"    if offset - {start} > 0xFFFF:",
+                f"        buffer[{position} + 12:offset + 8] = "
+                f"buffer[{position} + 4:offset]",
+            ]
+            + _indent(
+                _extended_header(position, flag, step.member_id, f"offset - {start}")
+            )
+            + [
+                "        offset += 8",
+                "        origin += 8",
+                "    else:",
+                f"        _pack_u16(buffer, {position}, {flag | step.member_id:#x})",
+                f"        _pack_u16(buffer, {position} + 2, offset - {start})",
+            ]
+        )
+    return size_lines, write_lines
+
+
+def _extended_header(position: str, flag: int, member_id: int, size: str) -> list[str]:
+    return [
+        f"    _pack_u16(buffer, {position}, {flag | EXTENDED_PID:#x})",
+        f"    _pack_u16(buffer, {position} + 2, 8)",
+        f"    _pack_u32(buffer, {position} + 4, {member_id})",
+        f"    _pack_u32(buffer, {position} + 8, {size})",
+    ]
+
+
+def _indent(lines: list[str]) -> list[str]:
+    return ["    " + line for line in lines]
+
+
+def _sequence_length_size() -> list[str]:
+    return ["    offset += -(offset - origin) % 4 + 4"]
+
+
+def _sequence_length_write(length: str) -> list[str]:
+    return _align_write(4, "    ") + [
+        f"    _pack_u32(buffer, offset, {length})",
+        "    offset += 4",
+    ]
+
+
+def _align_write(alignment: int, indent: str) -> list[str]:
+    # Padding is written explicitly so that reused buffers never leak stale
+    # bytes into the output.
+    return [
+        f"{indent}p = -(offset - origin) % {alignment}",
+        f"{indent}buffer[offset:offset + p] = _PADDING[p]",
+        f"{indent}offset += p",
+    ]
+
+
+# ----------------------------------------------------------------------
+# Runtime helpers used by the generated code
+# ----------------------------------------------------------------------
+def _array_error(name: str, expected: int, actual: int) -> ValueError:
+    return ValueError(f"Field {name!r} expects {expected} elements, got {actual}")
+
+
+def _fixed(value: Any, count: int) -> Any:
+    if len(value) != count:
+        raise ValueError(f"Expected {count} array elements, got {len(value)}")
+    return value
+
+
+def _pack_array(
+    buffer: bytearray,
+    offset: int,
+    value: Any,
+    count: int,
+    char: str,
+    little_endian: bool,
+) -> int:
+    """Write ``count`` primitives at ``offset`` and return the new offset.
+
+    Contiguous buffers whose element type and byte order match the stream are
+    copied directly and NumPy arrays are converted in one vectorised step;
+    anything else is packed with a single ``pack_into``.
+    """
+
+    nbytes = count * FORMAT_SIZES[char]
+    try:
+        view = memoryview(value)
+    except TypeError:
+        view = None
+    if view is not None and view.c_contiguous and view.nbytes == nbytes:
+        base = view.format[-1:]
+        prefix = view.format[:-1]
+        if view.itemsize == 1 and FORMAT_SIZES[char] == 1:
+            buffer[offset : offset + nbytes] = view.cast("B")
+            return offset + nbytes
+        if base == char and prefix in ("", "@", "=", "<", ">", "!"):
+            view_little = (
+                _HOST_LITTLE_ENDIAN if prefix in ("", "@", "=") else prefix == "<"
+            )
+            if view_little == little_endian:
+                buffer[offset : offset + nbytes] = view.cast("B")
+                return offset + nbytes
+
+    data = numpy_array_bytes(value, char, little_endian)
+    if data is not None and data.nbytes == nbytes:
+        buffer[offset : offset + nbytes] = data
+        return offset + nbytes
+
+    struct.pack_into(
+        f"{'<' if little_endian else '>'}{count}{char}", buffer, offset, *value
+    )
+    return offset + nbytes
@@ -0,0 +1,128 @@
+"""Closed-form layout of fixed-size message types.
+
+A message type without strings or sequences – directly or in any nested
+message – always serialises to the same number of bytes for a given
+encapsulation kind, with every field at the same offset.
+:func:`fixed_layout` computes that size and the offset of every field once
+per ``(schema, type, kind)`` using :class:`~cdr.size_calculator.CdrSizeCalculator`
+and caches the result, so encoders can allocate exactly without walking the
+message and batch decoders can use the size as the stride between payloads.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Mapping
+from weakref import WeakKeyDictionary
+
+from ._plan import (
+    FORMAT_SIZES,
+    PRIMITIVE_FORMATS,
+    PRIMITIVE_METHODS,
+    get_plan,
+    wire_fields,
+)
+from .encapsulation_kind import EncapsulationKind
+from .get_encapsulation_kind_info import get_encapsulation_kind_info
+from .schema import MessageSchema
+from .size_calculator import CdrSizeCalculator
+
+
+@dataclass(frozen=True)
+class FixedLayout:
+    """Size and field offsets of a fixed-size message type.
+
+    ``size`` is the size of a complete payload holding one message,
+    including the four byte encapsulation header.  ``offsets`` maps dotted
+    field paths – ``"header.stamp.sec"``, or ``"corners[1].x"`` for elements
+    of arrays of messages – to the payload offset of the field's first byte.
+    Primitive arrays map to the offset of their first element.
+    """
+
+    type: str
+    kind: EncapsulationKind
+    size: int
+    offsets: Mapping[str, int]
+
+
+def fixed_layout(
+    schema: MessageSchema,
+    type_name: str | None = None,
+    kind: EncapsulationKind = EncapsulationKind.CDR_LE,
+) -> FixedLayout | None:
+    """Return the :class:`FixedLayout` of a message type or ``None``.
+
+    ``None`` is returned when the type, or a type nested in it, contains a
+    string or a sequence, or is encoded with XTypes member or delimiter
+    headers.  The layout describes a message at the start of a
+    payload, which is where the alignment origin lies.
+    """
+
+    type_name = schema.root if type_name is None else type_name
+    cache = _LAYOUTS.get(schema)
+    if cache is None:
+        cache = _LAYOUTS[schema] = {}
+    key = (type_name, kind)
+    if key not in cache:
+        cache[key] = _compute(schema, type_name, kind)
+    return cache[key]
+
+
+# ----------------------------------------------------------------------
+# Internal helpers
+# ----------------------------------------------------------------------
+_LAYOUTS: WeakKeyDictionary[
+    MessageSchema, Dict[tuple[str, EncapsulationKind], FixedLayout | None]
+] = WeakKeyDictionary()
+
+
+def _compute(
+    schema: MessageSchema, type_name: str, kind: EncapsulationKind
+) -> FixedLayout | None:
+    calculator = CdrSizeCalculator(kind)
+    offsets: Dict[str, int] = {}
+    cdr2 = get_encapsulation_kind_info(kind).is_cdr2
+    if not _account(schema, type_name, calculator, offsets, "", cdr2):
+        return None
+    return FixedLayout(type_name, kind, calculator.size, MappingProxyType(offsets))
+
+
+def _account(
+    schema: MessageSchema,
+    type_name: str,
+    calculator: CdrSizeCalculator,
+    offsets: Dict[str, int],
+    prefix: str,
+    cdr2: bool,
+) -> bool:
+    """Account for one message; return ``False`` if it has no fixed size."""
+
+    if not get_plan(schema, type_name).is_plain(cdr2):
+        return False
+    for field in wire_fields(schema[type_name]):
+        if field.is_sequence or field.type in ("string", "wstring"):
+            return False
+        path = prefix + field.name
+        count = field.array_length
+
+        if not field.is_complex:
+            method = PRIMITIVE_METHODS[field.type]
+            item_size = FORMAT_SIZES[PRIMITIVE_FORMATS[field.type]]
+            if count is None:
+                end = getattr(calculator, method)()
+                offsets[path] = end - item_size
+            else:
+                end = getattr(calculator, f"{method}_array")(count)
+                offsets[path] = end - item_size * count
+            continue
+
+        if count is None:
+            if not _account(schema, field.type, calculator, offsets, path + ".", cdr2):
+                return False
+            continue
+        for index in range(count):
+            element = f"{path}[{index}]."
+            if not _account(schema, field.type, calculator, offsets, element, cdr2):
+                return False
+    return True
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 
 from .encapsulation_kind import EncapsulationKind
 
@@ -22,6 +23,7 @@ class EncapsulationInfo:
     uses_member_header: bool
 
 
+@lru_cache(maxsize=None)
 def get_encapsulation_kind_info(kind: EncapsulationKind) -> EncapsulationInfo:
     """Return information about a given ``EncapsulationKind``.
 
@@ -34,7 +36,8 @@ def get_encapsulation_kind_info(kind: EncapsulationKind) -> EncapsulationInfo:
     -------
     EncapsulationInfo
         A data object describing whether the kind is CDR2, little endian
-        and whether it uses delimiter or member headers.
+        and whether it uses delimiter or member headers.  Results are cached
+        as the information is looked up for every reader and writer.
     """
 
     # ``Enum`` members do not support ordering comparisons directly, so we
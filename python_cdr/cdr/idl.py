@@ -0,0 +1,561 @@
+"""Parsing of OMG IDL type definitions.
+
+:func:`parse_idl` turns the ``struct`` definitions of an IDL document into a
+:class:`~cdr.schema.MessageSchema`, so DDS types are decoded and encoded by
+the same compiled codecs as ROS 2 ``.msg`` types.  The XTypes annotations
+that affect the wire format are kept on the definitions:
+
+* ``@final``, ``@appendable``, ``@mutable`` and ``@extensibility(...)`` set
+  :attr:`MessageDefinition.extensibility`.  Final types are encoded without
+  any headers, appendable types get a delimiter header under XCDR2 and
+  mutable types a header per member.
+* ``@id(N)`` sets member IDs, which are otherwise assigned sequentially.
+* ``@key`` and ``@optional`` set :attr:`FieldDefinition.is_key` and
+  :attr:`FieldDefinition.is_optional`.  Absent optional members are
+  represented by ``None``.
+
+Modules, typedefs, enums, constants (usable as bounds), bounded strings,
+sequences and multi-dimensional arrays, which are flattened into a single
+list, are supported.  The MCAP ``ros2idl`` format, where the definitions of
+several files are separated by a line of ``=`` characters and an
+``IDL: package/msg/Type`` marker, is accepted as well.  Unions, inheritance,
+``wchar``, ``long double`` and sequences of sequences are rejected.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterator
+
+from .encapsulation_kind import EncapsulationKind
+from .schema import FieldDefinition, MessageDefinition, MessageSchema
+
+EXTENSIBILITY_KINDS = ("final", "appendable", "mutable")
+
+# IDL primitive types and their ``.msg`` equivalents.
+_PRIMITIVES = {
+    "boolean": "bool",
+    "octet": "byte",
+    "char": "char",
+    "short": "int16",
+    "unsigned short": "uint16",
+    "long": "int32",
+    "unsigned long": "uint32",
+    "long long": "int64",
+    "unsigned long long": "uint64",
+    "float": "float32",
+    "double": "float64",
+    "int8": "int8",
+    "uint8": "uint8",
+    "int16": "int16",
+    "uint16": "uint16",
+    "int32": "int32",
+    "uint32": "uint32",
+    "int64": "int64",
+    "uint64": "uint64",
+}
+
+_INTEGER_TYPES = frozenset(
+    value for value in _PRIMITIVES.values() if value.startswith(("int", "uint"))
+) | {"byte"}
+
+_UNSUPPORTED_TYPES = frozenset({"wchar", "long double", "any", "fixed"})
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<space>\s+)
+    | (?P<comment>//[^\n]*|/\*.*?\*/)
+    | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+    | (?P<number>0[xX][0-9a-fA-F]+|\d+(?:\.\d*)?(?:[eE][+-]?\d+)?)
+    | (?P<name>::|[A-Za-z_][A-Za-z0-9_]*)
+    | (?P<symbol>[{}();,<>\[\]=@+\-*/%|&^~:])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_SEPARATOR_RE = re.compile(r"^={3,}\s*$")
+_MARKER_RE = re.compile(r"^IDL:\s*\S+\s*$")
+
+
+def parse_idl(
+    text: str, name: str = "", *, default_extensibility: str = "appendable"
+) -> MessageSchema:
+    """Parse the structures of an IDL document into a :class:`MessageSchema`.
+
+    Parameters
+    ----------
+    text:
+        The IDL document.  Preprocessor directives are ignored, so included
+        files must be concatenated into ``text``.
+    name:
+        Scoped name of the root type, e.g. ``"pkg::msg::Type"`` or
+        ``"pkg/msg/Type"``.  Defaults to the last structure defined.
+    default_extensibility:
+        Extensibility of structures without an extensibility annotation.
+        XTypes defaults to ``"appendable"``; use ``"final"`` for types from
+        tools that default to final, such as the ROS 2 IDL generators.
+
+    Returns
+    -------
+    MessageSchema
+        A schema whose definitions are keyed by fully scoped names such as
+        ``"pkg::msg::Type"``.
+
+    Raises
+    ------
+    ValueError
+        If the document cannot be parsed or uses an unsupported construct.
+    """
+
+    if default_extensibility not in EXTENSIBILITY_KINDS:
+        raise ValueError(f"Unknown extensibility {default_extensibility!r}")
+    parser = _Parser(_tokenize(text), default_extensibility)
+    parser.parse()
+    if not parser.definitions:
+        raise ValueError("IDL document defines no structures")
+    for definition in parser.definitions.values():
+        for field in definition.fields:
+            if field.is_complex and field.type not in parser.definitions:
+                raise ValueError(
+                    f"Structure {field.type!r} is declared but never defined"
+                )
+
+    if name:
+        root = name.strip().replace("/", "::").lstrip(":")
+        if root not in parser.definitions:
+            raise ValueError(f"Structure {root!r} is not defined")
+    else:
+        root = parser.last
+    return MessageSchema(root=root, definitions=parser.definitions)
+
+
+def encapsulation_kind(
+    schema: MessageSchema,
+    type_name: str | None = None,
+    *,
+    xcdr2: bool = True,
+    little_endian: bool = True,
+) -> EncapsulationKind:
+    """Return the encapsulation kind for payloads of an IDL type.
+
+    XCDR2 payloads use ``CDR2``, ``DELIMITED_CDR2`` or ``PL_CDR2`` for final,
+    appendable and mutable types; XCDR1 payloads use ``PL_CDR`` for mutable
+    types and ``CDR`` otherwise.
+    """
+
+    definition = schema[schema.root if type_name is None else type_name]
+    kind = definition.extensibility or "final"
+    if xcdr2:
+        prefix = {"final": "CDR2", "appendable": "DELIMITED_CDR2"}.get(kind, "PL_CDR2")
+    else:
+        prefix = "PL_CDR" if kind == "mutable" else "CDR"
+    return EncapsulationKind[f"{prefix}_{'LE' if little_endian else 'BE'}"]
+
+
+# ----------------------------------------------------------------------
+# Internal helpers
+# ----------------------------------------------------------------------
+@dataclass(frozen=True)
+class _Type:
+    """A resolved type specifier, possibly named by a typedef."""
+
+    base: str
+    is_complex: bool = False
+    is_sequence: bool = False
+    sequence_bound: int | None = None
+    string_bound: int | None = None
+    dimensions: tuple[int, ...] = ()
+
+
+@dataclass(frozen=True)
+class _Annotation:
+    name: str
+    arguments: tuple[str, ...]
+
+
+def _tokenize(text: str) -> list[str]:
+    lines = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if (
+            stripped.startswith("#")
+            or _SEPARATOR_RE.match(stripped)
+            or _MARKER_RE.match(stripped)
+        ):
+            lines.append("")
+        else:
+            lines.append(line)
+    source = "\n".join(lines)
+
+    tokens = []
+    position = 0
+    while position < len(source):
+        match = _TOKEN_RE.match(source, position)
+        if match is None:
+            line = source.count("\n", 0, position) + 1
+            raise ValueError(
+                f"Unexpected character {source[position]!r} on line {line}"
+            )
+        if match.lastgroup not in ("space", "comment"):
+            tokens.append(match.group())
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser over the tokens of an IDL document."""
+
+    def __init__(self, tokens: list[str], default_extensibility: str) -> None:
+        self._tokens = tokens
+        self._position = 0
+        self._default_extensibility = default_extensibility
+        self._scope: list[str] = []
+        self._types: Dict[str, _Type] = {}
+        self._constants: Dict[str, int] = {}
+        self._declared: set[str] = set()
+        self.definitions: Dict[str, MessageDefinition] = {}
+        self.last = ""
+
+    # -- token helpers -------------------------------------------------
+    def _peek(self, ahead: int = 0) -> str:
+        index = self._position + ahead
+        return self._tokens[index] if index < len(self._tokens) else ""
+
+    def _next(self) -> str:
+        token = self._peek()
+        if not token:
+            raise ValueError("Unexpected end of IDL document")
+        self._position += 1
+        return token
+
+    def _expect(self, expected: str) -> None:
+        token = self._next()
+        if token != expected:
+            raise ValueError(f"Expected {expected!r}, got {token!r}")
+
+    def _accept(self, token: str) -> bool:
+        if self._peek() == token:
+            self._position += 1
+            return True
+        return False
+
+    def _identifier(self) -> str:
+        token = self._next()
+        if not re.match(r"^[A-Za-z_]\w*$", token):
+            raise ValueError(f"Expected an identifier, got {token!r}")
+        return token
+
+    def _scoped_name(self) -> str:
+        parts = ["" if self._accept("::") else None]
+        parts.append(self._identifier())
+        while self._accept("::"):
+            parts.append(self._identifier())
+        return "::".join(part for part in parts if part is not None)
+
+    # -- definitions ---------------------------------------------------
+    def parse(self) -> None:
+        while self._peek():
+            self._definition()
+
+    def _definition(self) -> None:
+        annotations = self._annotations()
+        keyword = self._next()
+        if keyword == "module":
+            self._scope.append(self._identifier())
+            self._expect("{")
+            while not self._accept("}"):
+                self._definition()
+            self._scope.pop()
+        elif keyword == "struct":
+            self._struct(annotations)
+        elif keyword == "enum":
+            self._enum(annotations)
+        elif keyword == "typedef":
+            type_ = self._type_spec()
+            while True:
+                name, dimensions = self._declarator()
+                self._types[self._qualify(name)] = _with_dimensions(
+                    type_, dimensions, name
+                )
+                if not self._accept(","):
+                    break
+        elif keyword == "const":
+            type_ = self._type_spec()
+            name = self._identifier()
+            self._expect("=")
+            if type_.base in _INTEGER_TYPES:
+                self._constants[self._qualify(name)] = self._expression(";")
+            else:
+                # Only integer constants can be used as bounds.
+                while self._peek() != ";":
+                    self._next()
+        elif keyword in ("union", "interface", "valuetype", "bitmask", "bitset"):
+            raise ValueError(f"IDL {keyword} definitions are not supported")
+        else:
+            raise ValueError(f"Unexpected {keyword!r} in IDL document")
+        self._expect(";")
+
+    def _struct(self, annotations: list[_Annotation]) -> None:
+        name = self._qualify(self._identifier())
+        if self._accept(";"):
+            # Forward declaration.
+            self._declared.add(name)
+            self._position -= 1
+            return
+        if self._accept(":"):
+            raise ValueError(f"Structure {name!r}: inheritance is not supported")
+        self._declared.add(name)
+        extensibility = self._default_extensibility
+        for annotation in annotations:
+            if annotation.name in EXTENSIBILITY_KINDS:
+                extensibility = annotation.name
+            elif annotation.name == "extensibility":
+                extensibility = _argument(annotation).lower()
+                if extensibility == "extensible":
+                    extensibility = "appendable"
+                if extensibility not in EXTENSIBILITY_KINDS:
+                    raise ValueError(
+                        f"Structure {name!r}: unknown extensibility {extensibility!r}"
+                    )
+            elif annotation.name == "autoid" and _argument(annotation) == "HASH":
+                raise ValueError(f"Structure {name!r}: @autoid(HASH) is not supported")
+
+        self._expect("{")
+        fields: list[FieldDefinition] = []
+        member_id = 0
+        while not self._accept("}"):
+            member_annotations = self._annotations()
+            type_ = self._type_spec()
+            while True:
+                field_name, dimensions = self._declarator()
+                field_type = _with_dimensions(type_, dimensions, field_name)
+                flags = {a.name: a for a in member_annotations}
+                if "id" in flags:
+                    member_id = int(_argument(flags["id"]), 0)
+                fields.append(
+                    _field(
+                        field_name,
+                        field_type,
+                        member_id,
+                        is_key=_flag(flags.get("key")),
+                        is_optional=_flag(flags.get("optional")),
+                    )
+                )
+                member_id += 1
+                if not self._accept(","):
+                    break
+            self._expect(";")
+
+        ids = [field.member_id for field in fields]
+        if len(set(ids)) != len(ids):
+            raise ValueError(f"Structure {name!r} has duplicate member IDs")
+        self.definitions[name] = MessageDefinition(
+            name, tuple(fields), extensibility=extensibility
+        )
+        self.last = name
+
+    def _enum(self, annotations: list[_Annotation]) -> None:
+        name = self._qualify(self._identifier())
+        bits = 32
+        for annotation in annotations:
+            if annotation.name == "bit_bound":
+                bits = int(_argument(annotation), 0)
+        self._expect("{")
+        value = 0
+        while True:
+            for annotation in self._annotations():
+                if annotation.name == "value":
+                    value = int(_argument(annotation), 0)
+            enumerator = self._identifier()
+            self._constants[self._qualify(enumerator)] = value
+            value += 1
+            if not self._accept(","):
+                break
+        self._expect("}")
+        base = "int8" if bits <= 8 else "int16" if bits <= 16 else "int32"
+        self._types[name] = _Type(base)
+
+    def _annotations(self) -> list[_Annotation]:
+        annotations = []
+        while self._accept("@"):
+            name = self._scoped_name().split("::")[-1]
+            arguments: list[str] = []
+            if self._accept("("):
+                depth = 0
+                while depth or self._peek() != ")":
+                    token = self._next()
+                    depth += {"(": 1, ")": -1}.get(token, 0)
+                    arguments.append(token)
+                self._expect(")")
+            annotations.append(_Annotation(name, tuple(arguments)))
+        return annotations
+
+    # -- types -----------------------------------------------------------
+    def _type_spec(self) -> _Type:
+        token = self._peek()
+        if token == "sequence":
+            self._next()
+            self._expect("<")
+            element = self._type_spec()
+            bound = self._expression(">") if self._accept(",") else None
+            self._expect(">")
+            if element.is_sequence or element.dimensions:
+                raise ValueError("Sequences of sequences or arrays are not supported")
+            return _Type(
+                element.base,
+                element.is_complex,
+                True,
+                bound,
+                element.string_bound,
+            )
+        if token in ("string", "wstring"):
+            self._next()
+            bound = None
+            if self._accept("<"):
+                bound = self._expression(">")
+                self._expect(">")
+            return _Type(token, string_bound=bound)
+
+        words = [self._next()]
+        if words[0] == "unsigned" or (words[0] == "long" and self._peek() == "long"):
+            words.append(self._next())
+        if words[-1] == "long" and self._peek() in ("long", "double"):
+            words.append(self._next())
+        spelled = " ".join(words)
+        if spelled in _PRIMITIVES:
+            return _Type(_PRIMITIVES[spelled])
+        if spelled in _UNSUPPORTED_TYPES:
+            raise ValueError(f"IDL type {spelled!r} is not supported")
+        if len(words) > 1:
+            raise ValueError(f"Unknown IDL type {spelled!r}")
+
+        self._position -= 1
+        return self._resolve(self._scoped_name())
+
+    def _declarator(self) -> tuple[str, tuple[int, ...]]:
+        name = self._identifier()
+        dimensions = []
+        while self._accept("["):
+            dimensions.append(self._expression("]"))
+            self._expect("]")
+        return name, tuple(dimensions)
+
+    def _resolve(self, name: str) -> _Type:
+        for candidate in self._candidates(name):
+            if candidate in self._types:
+                return self._types[candidate]
+            if candidate in self._declared:
+                return _Type(candidate, is_complex=True)
+        raise ValueError(f"Unknown IDL type {name!r}")
+
+    def _candidates(self, name: str) -> Iterator[str]:
+        if name.startswith("::"):
+            yield name[2:]
+            return
+        for depth in range(len(self._scope), -1, -1):
+            yield "::".join(self._scope[:depth] + [name])
+
+    def _qualify(self, name: str) -> str:
+        return "::".join(self._scope + [name])
+
+    # -- constant expressions ----------------------------------------------
+    def _expression(self, end: str) -> int:
+        """Evaluate an integer expression ending before ``end``."""
+
+        value = self._sum()
+        if self._peek() not in (end, ","):
+            raise ValueError(f"Unexpected {self._peek()!r} in constant expression")
+        return value
+
+    def _sum(self) -> int:
+        value = self._product()
+        while self._peek() in ("+", "-"):
+            if self._next() == "+":
+                value += self._product()
+            else:
+                value -= self._product()
+        return value
+
+    def _product(self) -> int:
+        value = self._unary()
+        while self._peek() in ("*", "/", "%"):
+            operator = self._next()
+            operand = self._unary()
+            if operator == "*":
+                value *= operand
+            elif operator == "/":
+                value //= operand
+            else:
+                value %= operand
+        return value
+
+    def _unary(self) -> int:
+        if self._accept("-"):
+            return -self._unary()
+        if self._accept("+"):
+            return self._unary()
+        if self._accept("("):
+            value = self._sum()
+            self._expect(")")
+            return value
+        token = self._peek()
+        if token[:1].isdigit():
+            self._next()
+            try:
+                return int(token, 0)
+            except ValueError:
+                raise ValueError(f"Expected an integer, got {token!r}") from None
+        return self._constant(self._scoped_name())
+
+    def _constant(self, name: str) -> int:
+        for candidate in self._candidates(name):
+            if candidate in self._constants:
+                return self._constants[candidate]
+        if name in ("TRUE", "FALSE"):
+            return int(name == "TRUE")
+        raise ValueError(f"Unknown IDL constant {name!r}")
+
+
+def _with_dimensions(type_: _Type, dimensions: tuple[int, ...], name: str) -> _Type:
+    if not dimensions:
+        return type_
+    if type_.is_sequence:
+        raise ValueError(f"{name!r}: arrays of sequences are not supported")
+    return _Type(
+        type_.base,
+        type_.is_complex,
+        string_bound=type_.string_bound,
+        dimensions=dimensions + type_.dimensions,
+    )
+
+
+def _field(
+    name: str, type_: _Type, member_id: int, *, is_key: bool, is_optional: bool
+) -> FieldDefinition:
+    array_length = None
+    for dimension in type_.dimensions:
+        array_length = dimension * (array_length or 1)
+    return FieldDefinition(
+        name=name,
+        type=type_.base,
+        is_complex=type_.is_complex,
+        is_array=type_.is_sequence or bool(type_.dimensions),
+        array_length=array_length,
+        array_upper_bound=type_.sequence_bound,
+        string_upper_bound=type_.string_bound,
+        member_id=member_id,
+        is_key=is_key,
+        is_optional=is_optional,
+    )
+
+
+def _argument(annotation: _Annotation) -> str:
+    if len(annotation.arguments) != 1:
+        raise ValueError(f"@{annotation.name} expects a single argument")
+    return annotation.arguments[0].strip("\"'")
+
+
+def _flag(annotation: _Annotation | None) -> bool:
+    if annotation is None:
+        return False
+    return not annotation.arguments or _argument(annotation).upper() == "TRUE"
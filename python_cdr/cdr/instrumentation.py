@@ -0,0 +1,361 @@
+"""Opt-in operation counters for :class:`CdrReader` and :class:`CdrWriter`.
+
+:class:`InstrumentedCdrReader` and :class:`InstrumentedCdrWriter` are
+drop-in subclasses that record, in a shared :class:`CdrStats`, how often
+each operation runs, how many bytes it consumed or produced, how much
+alignment padding was skipped or inserted, how often the writer's buffer was
+resized, and every fall back from a bulk array path to a slower one.  The
+plain classes are untouched, so code that does not use the subclasses pays
+nothing for the instrumentation.
+
+Typical use is to walk a slow message once with an instrumented reader and
+look at :meth:`CdrStats.report`::
+
+    stats = CdrStats()
+    reader = InstrumentedCdrReader(payload, stats=stats)
+    reader.int32()
+    reader.string()
+    reader.float64()
+    reader.string_array()
+    print(stats.report())
+
+The compiled :class:`~cdr.decoder.MessageDecoder` and
+:class:`~cdr.encoder.MessageEncoder` unpack and pack fields straight from
+and into the buffer.  Given an instrumented reader, a decoder only records
+the primitive-array operations it delegates to the reader and their
+fallbacks; given an instrumented writer, an encoder only records the
+buffer resize.
+
+Only the outermost operation is counted: a per-element array loop shows up
+as one array operation and a fallback, not as thousands of scalar writes.
+"""
+
+from __future__ import annotations
+
+from array import array as Array
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Sequence, TypeVar
+
+from .encapsulation_kind import EncapsulationKind
+from .reader import CdrReader
+from .string_cache import StringCache
+from .writer import CdrWriter
+
+
+@dataclass
+class CdrStats:
+    """Counters collected by the instrumented reader and writer.
+
+    ``operations`` and ``bytes`` are keyed by method name; ``bytes`` includes
+    the alignment padding preceding a value.  ``fallbacks`` is keyed by a
+    description of the slow path taken, e.g. ``"float64_array: list
+    (byte order)"``.
+    """
+
+    operations: Counter[str] = field(default_factory=Counter)
+    bytes: Counter[str] = field(default_factory=Counter)
+    padding_bytes: int = 0
+    resizes: int = 0
+    resized_bytes: int = 0
+    fallbacks: Counter[str] = field(default_factory=Counter)
+
+    def reset(self) -> None:
+        """Set all counters back to zero."""
+
+        self.operations.clear()
+        self.bytes.clear()
+        self.padding_bytes = 0
+        self.resizes = 0
+        self.resized_bytes = 0
+        self.fallbacks.clear()
+
+    def report(self) -> str:
+        """Return a human readable summary, busiest operations first."""
+
+        lines = [f"{'operation':<24} {'calls':>10} {'bytes':>12}"]
+        for name, calls in self.operations.most_common():
+            lines.append(f"{name:<24} {calls:>10} {self.bytes[name]:>12}")
+        lines.append(f"padding bytes: {self.padding_bytes}")
+        lines.append(f"buffer resizes: {self.resizes} (+{self.resized_bytes} bytes)")
+        if self.fallbacks:
+            lines.append("fallbacks:")
+            for description, count in self.fallbacks.most_common():
+                lines.append(f"  {description}: {count}")
+        return "\n".join(lines)
+
+
+_READER_OPERATIONS = (
+    "int8",
+    "uint8",
+    "int16",
+    "uint16",
+    "int32",
+    "uint32",
+    "int64",
+    "uint64",
+    "uint16_be",
+    "uint32_be",
+    "uint64_be",
+    "float32",
+    "float64",
+    "string",
+    "d_header",
+    "em_header",
+    "sentinel_header",
+    "sequence_length",
+    "int8_array",
+    "uint8_array",
+    "int16_array",
+    "uint16_array",
+    "int32_array",
+    "uint32_array",
+    "int64_array",
+    "uint64_array",
+    "float32_array",
+    "float64_array",
+    "string_array",
+    "skip_string",
+    "skip_sequence",
+    "skip_delimited",
+    "skip",
+)
+
+_WRITER_OPERATIONS = (
+    "int8",
+    "uint8",
+    "int16",
+    "uint16",
+    "int32",
+    "uint32",
+    "int64",
+    "uint64",
+    "uint16BE",
+    "uint32BE",
+    "uint64BE",
+    "float32",
+    "float64",
+    "write_fields",
+    "string",
+    "stringArray",
+    "dHeader",
+    "emHeader",
+    "sentinelHeader",
+    "sequenceLength",
+    "int8Array",
+    "uint8Array",
+    "int16Array",
+    "uint16Array",
+    "int32Array",
+    "uint32Array",
+    "int64Array",
+    "uint64Array",
+    "float32Array",
+    "float64Array",
+)
+
+_READER_ARRAYS: Dict[str, str] = {
+    "b": "int8_array",
+    "B": "uint8_array",
+    "h": "int16_array",
+    "H": "uint16_array",
+    "i": "int32_array",
+    "I": "uint32_array",
+    "q": "int64_array",
+    "Q": "uint64_array",
+    "f": "float32_array",
+    "d": "float64_array",
+}
+_WRITER_ARRAYS: Dict[str, str] = {
+    "b": "int8Array",
+    "B": "uint8Array",
+    "h": "int16Array",
+    "H": "uint16Array",
+    "i": "int32Array",
+    "I": "uint32Array",
+    "q": "int64Array",
+    "Q": "uint64Array",
+    "f": "float32Array",
+    "d": "float64Array",
+}
+
+
+_Class = TypeVar("_Class", bound=type)
+
+
+def _counted(name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap ``method`` so outermost calls are counted under ``name``."""
+
+    def counted(self: Any, *args: Any, **kwargs: Any) -> Any:
+        if self._nested:
+            return method(self, *args, **kwargs)
+        self._nested = True
+        start = self._position()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._nested = False
+            self.stats.operations[name] += 1
+            self.stats.bytes[name] += self._position() - start
+
+    counted.__name__ = method.__name__
+    counted.__doc__ = method.__doc__
+    return counted
+
+
+def _instrument(names: Sequence[str]) -> Callable[[_Class], _Class]:
+    def decorate(cls: _Class) -> _Class:
+        for name in names:
+            if name not in cls.__dict__:
+                setattr(cls, name, _counted(name, getattr(cls, name)))
+        return cls
+
+    return decorate
+
+
+@_instrument(_READER_OPERATIONS)
+class InstrumentedCdrReader(CdrReader):
+    """A :class:`CdrReader` recording its operations in ``stats``.
+
+    Array reads returning a ``list`` instead of a zero-copy ``memoryview``
+    are recorded as fallbacks, as are NumPy reads that had to copy
+    misaligned data.
+    """
+
+    def __init__(
+        self,
+        data: bytes | bytearray | memoryview,
+        *,
+        as_numpy: bool = False,
+        string_cache: StringCache | None = None,
+        stats: CdrStats | None = None,
+    ) -> None:
+        super().__init__(data, as_numpy=as_numpy, string_cache=string_cache)
+        self.stats = CdrStats() if stats is None else stats
+        self._nested = False
+
+    def _position(self) -> int:
+        return self.offset
+
+    def _array(
+        self, fmt: str, count: int, alignment: int, as_numpy: bool | None = None
+    ) -> Any:
+        result = super()._array(fmt, count, alignment, as_numpy)
+        if isinstance(result, list) and count:
+            reason = (
+                "byte order"
+                if self.little_endian != self.host_little_endian
+                else "misaligned"
+            )
+            self.stats.fallbacks[f"{_READER_ARRAYS[fmt]}: list ({reason})"] += 1
+        return result
+
+    def _numpy_array(self, fmt: str, count: int, alignment: int) -> Any:
+        result = super()._numpy_array(fmt, count, alignment)
+        if count and result.base is None:
+            self.stats.fallbacks[f"{_READER_ARRAYS[fmt]}: numpy copy (misaligned)"] += 1
+        return result
+
+    def align(self, size: int) -> None:
+        start = self.offset
+        super().align(size)
+        self.stats.padding_bytes += self.offset - start
+
+    def clone(self) -> InstrumentedCdrReader:
+        clone = InstrumentedCdrReader(
+            self._view,
+            as_numpy=self.as_numpy,
+            string_cache=self.string_cache,
+            stats=self.stats,
+        )
+        clone.offset = self.offset
+        clone.origin = self.origin
+        return clone
+
+
+@_instrument(_WRITER_OPERATIONS)
+class InstrumentedCdrWriter(CdrWriter):
+    """A :class:`CdrWriter` recording its operations in ``stats``.
+
+    Array writes that cannot copy the value as one contiguous block are
+    recorded as fallbacks, together with the reason the bulk copy failed:
+    ``"not a buffer"`` for lists and other sequences, ``"element type"`` for
+    buffers of another type and ``"byte order"`` for buffers in the other
+    byte order.
+    """
+
+    def __init__(
+        self,
+        *,
+        buffer: bytearray | bytes | None = None,
+        size: int | None = None,
+        kind: EncapsulationKind = EncapsulationKind.CDR_LE,
+        segment_threshold: int | None = None,
+        stats: CdrStats | None = None,
+    ) -> None:
+        self.stats = CdrStats() if stats is None else stats
+        self._nested = False
+        self._bulk_miss: str | None = None
+        super().__init__(
+            buffer=buffer, size=size, kind=kind, segment_threshold=segment_threshold
+        )
+
+    def _position(self) -> int:
+        return self._offset + self._segment_bytes
+
+    def align(self, size: int, bytesToWrite: int | None = None) -> None:
+        start = self._offset
+        super().align(size, bytesToWrite)
+        self.stats.padding_bytes += self._offset - start
+
+    def _resize(self, capacity: int) -> None:
+        missing = capacity - len(self._buffer)
+        super()._resize(capacity)
+        if missing > 0:
+            self.stats.resizes += 1
+            self.stats.resized_bytes += missing
+
+    def _try_write_contiguous(
+        self,
+        value: object,
+        fmt_char: str,
+        align: int,
+        writeLength: bool | None,
+    ) -> bool:
+        if super()._try_write_contiguous(value, fmt_char, align, writeLength):
+            self._bulk_miss = None
+            return True
+        try:
+            view = memoryview(value)  # type: ignore[arg-type]
+        except TypeError:
+            self._bulk_miss = "not a buffer"
+        else:
+            same_type = (
+                view.format[-1:] == fmt_char
+                and view.itemsize == self._ITEMSIZE[fmt_char]
+            )
+            self._bulk_miss = "byte order" if same_type else "element type"
+        return False
+
+    def _try_write_numpy(
+        self,
+        value: object,
+        fmt_char: str,
+        align: int,
+        writeLength: bool | None,
+    ) -> bool:
+        method = _WRITER_ARRAYS[fmt_char]
+        written = super()._try_write_numpy(value, fmt_char, align, writeLength)
+        if fmt_char in ("b", "B"):
+            # Byte arrays try NumPy first and need no conversion.
+            if not written and not isinstance(value, (bytes, bytearray, Array)):
+                self.stats.fallbacks[f"{method}: per element (not bytes)"] += 1
+            return written
+        if written:
+            path = "numpy conversion"
+        elif isinstance(value, Array) and value.typecode == fmt_char:
+            path = "array pack"
+        else:
+            path = "per element"
+        self.stats.fallbacks[f"{method}: {path} ({self._bulk_miss})"] += 1
+        return written
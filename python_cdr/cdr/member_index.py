@@ -0,0 +1,176 @@
+"""Random access to the members of mutable (parameter list) structs.
+
+A ``@mutable`` struct is encoded as a chain of member headers – XCDR1
+parameter headers terminated by a sentinel under ``PL_CDR`` and XCDR2
+EMHEADERs inside a DHEADER delimited block under ``PL_CDR2`` – each
+followed by ``object_size`` bytes of member data.  :func:`index_members`
+walks that chain once, reading only the headers, and returns a
+:class:`MemberIndex` mapping each member ID to the offset and size of its
+data.  Members of interest can then be read in any order through
+:meth:`MemberIndex.reader`, and every other member is skipped without being
+decoded.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterator, Mapping, Tuple
+
+from .length_codes import length_code_to_object_sizes
+from .reader import CdrReader
+from .reserved_pids import EXTENDED_PID, SENTINEL_PID
+
+# Multipliers of the NEXTINT following an EMHEADER with length code 4-7.
+_NEXTINT_SCALE = {4: 1, 5: 1, 6: 4, 7: 8}
+
+
+class MemberIndex(Mapping[int, Tuple[int, int]]):
+    """Member ID to ``(offset, size)`` table of one mutable struct.
+
+    Offsets are absolute positions of the member data in the reader's
+    buffer, after the member header.  Use :func:`index_members` to build an
+    index.
+    """
+
+    def __init__(
+        self,
+        reader: CdrReader,
+        members: Dict[int, Tuple[int, int]],
+        end: int,
+    ) -> None:
+        self._reader = reader
+        self._members = members
+        self._end = end
+
+    @property
+    def end(self) -> int:
+        """Offset just past the struct, including the sentinel if any."""
+
+        return self._end
+
+    def __getitem__(self, member_id: int) -> Tuple[int, int]:
+        return self._members[member_id]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._members)
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def reader(self, member_id: int) -> CdrReader:
+        """Return a reader positioned at the data of member ``member_id``.
+
+        The reader is limited to the member data and aligns values the way
+        the member was encoded: relative to the member data under XCDR1 and
+        relative to the enclosing stream under XCDR2.
+
+        Raises
+        ------
+        KeyError
+            If the struct has no member ``member_id``.
+        """
+
+        offset, size = self._members[member_id]
+        reader = self._reader.clone()
+        reader.offset = offset
+        if not reader.is_cdr2:
+            reader.origin = offset
+        reader.limit(size)
+        return reader
+
+
+def index_members(reader: CdrReader) -> MemberIndex:
+    """Index the members of the mutable struct at the reader's position.
+
+    Only the member headers are read.  XCDR1 extended parameter IDs are
+    resolved to their 32-bit IDs and the sentinel ends the struct; under
+    XCDR2 the struct ends with its DHEADER.  When a member ID occurs more
+    than once the last occurrence wins.
+
+    Parameters
+    ----------
+    reader:
+        Reader of a ``PL_CDR`` or ``PL_CDR2`` stream positioned at the
+        struct: at its first member header, or at its DHEADER under XCDR2.
+        It is advanced past the struct.
+
+    Returns
+    -------
+    MemberIndex
+        The location of every member.
+
+    Raises
+    ------
+    ValueError
+        If the stream does not use member headers, a header uses a reserved
+        parameter ID, or a member extends past the end of the data or of the
+        struct.
+    """
+
+    if not reader.uses_member_header:
+        raise ValueError(f"{reader.kind.name} streams do not use member headers")
+    view = reader._view
+    byte_length = view.nbytes
+    unpack_uint32 = reader._uint32_struct.unpack_from
+    members: Dict[int, Tuple[int, int]] = {}
+
+    if reader.is_cdr2:
+        origin = reader.origin
+        end = reader.d_header() + reader.offset
+        if end > byte_length:
+            raise ValueError(
+                f"Struct of {end - reader.offset} bytes exceeds the data of "
+                f"{byte_length} bytes"
+            )
+        offset = reader.offset
+        while offset < end:
+            offset += -(offset - origin) % 4
+            header = unpack_uint32(view, offset)[0]
+            offset += 4
+            length_code = (header >> 28) & 0x7
+            if length_code < 4:
+                size = length_code_to_object_sizes[length_code]
+            else:
+                size = _NEXTINT_SCALE[length_code] * unpack_uint32(view, offset)[0]
+                offset += 4
+            members[header & 0x0FFFFFFF] = (offset, size)
+            offset += size
+        if offset > end:
+            raise ValueError(
+                f"Member {header & 0x0FFFFFFF} extends past the end of its "
+                f"struct at offset {end}"
+            )
+        reader.offset = end
+        return MemberIndex(reader.clone(), members, end)
+
+    unpack_uint16 = reader._uint16_struct.unpack_from
+    origin = reader.origin
+    offset = reader.offset
+    while True:
+        offset += -(offset - origin) % 4
+        id_header = unpack_uint16(view, offset)[0]
+        pid = id_header & 0x3FFF
+        if pid == SENTINEL_PID:
+            offset += 4
+            break
+        if pid > SENTINEL_PID or id_header & 0x8000:
+            raise ValueError(f"Unsupported parameter ID header {id_header:04x}")
+        if pid == EXTENDED_PID:
+            pid = unpack_uint32(view, offset + 4)[0]
+            size = unpack_uint32(view, offset + 8)[0]
+            offset += 12
+        else:
+            size = unpack_uint16(view, offset + 2)[0]
+            offset += 4
+        if offset + size > byte_length:
+            raise ValueError(
+                f"Member {pid} of {size} bytes exceeds the data of "
+                f"{byte_length} bytes"
+            )
+        members[pid] = (offset, size)
+        # Each member, and the header following it, is aligned relative to
+        # the start of the member data.
+        origin = offset
+        offset += size
+    reader.offset = offset
+    reader.origin = origin
+    return MemberIndex(reader.clone(), members, offset)
@@ -8,15 +8,24 @@ CDR specification.
 
 from __future__ import annotations
 
+import mmap
+import os
 import struct
 from dataclasses import dataclass
-from typing import Any, Sequence, cast
+from typing import TYPE_CHECKING, Any, Sequence, cast
 
+from ._numpy import import_numpy
 from .encapsulation_kind import EncapsulationKind
 from .get_encapsulation_kind_info import get_encapsulation_kind_info
 from .is_big_endian import is_big_endian
 from .length_codes import LengthCode, length_code_to_object_sizes
 from .reserved_pids import EXTENDED_PID, SENTINEL_PID
+from .string_cache import COPY_FREE_LENGTH, StringCache
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .schema import MessageSchema
 
 # Precompiled ``struct`` format objects to avoid repeatedly parsing the
 # same format strings.  ``struct.Struct`` instances are considerably faster
@@ -68,9 +77,24 @@ class MemberHeader:
 
 
 class CdrReader:
-    """Read primitive values and arrays from a CDR encoded byte buffer."""
-
-    def __init__(self, data: bytes | bytearray | memoryview) -> None:
+    """Read primitive values and arrays from a CDR encoded byte buffer.
+
+    When ``as_numpy`` is set, the array readers return NumPy arrays instead
+    of ``memoryview``/``list`` results.  Each array reader also accepts an
+    ``as_numpy`` keyword overriding the reader-level setting.
+
+    With a ``string_cache``, strings are interned in the given
+    :class:`~cdr.string_cache.StringCache`, so repeated strings are decoded
+    once and share one ``str`` object.
+    """
+
+    def __init__(
+        self,
+        data: bytes | bytearray | memoryview,
+        *,
+        as_numpy: bool = False,
+        string_cache: StringCache | None = None,
+    ) -> None:
         if isinstance(data, memoryview):
             self._view = data
         else:
@@ -92,6 +116,8 @@ class CdrReader:
         self.eight_byte_alignment = 4 if self.is_cdr2 else 8
         self.uses_delimiter_header = info.uses_delimiter_header
         self.uses_member_header = info.uses_member_header
+        self.as_numpy = as_numpy
+        self.string_cache = string_cache
 
         # Pre-select struct objects and prefix based on endianness so that
         # primitive readers avoid branching and repeated format parsing.
@@ -120,6 +146,62 @@ class CdrReader:
         self.origin = 4
         self.offset = 4
 
+    @classmethod
+    def from_file(
+        cls,
+        path: str | os.PathLike[str],
+        offset: int = 0,
+        length: int | None = None,
+        *,
+        as_numpy: bool = False,
+        string_cache: StringCache | None = None,
+    ) -> CdrReader:
+        """Create a reader over a payload stored in a file using ``mmap``.
+
+        Parameters
+        ----------
+        path:
+            File containing the payload.
+        offset:
+            Position of the payload's encapsulation header in the file.
+        length:
+            Size of the payload, defaulting to the rest of the file.
+        as_numpy, string_cache:
+            Forwarded to :class:`CdrReader`.
+
+        Only the pages backing the payload are mapped.  Array readers return
+        views into the page cache instead of copies; the mapping is released
+        once the reader and all views obtained from it are garbage collected.
+        """
+
+        with open(path, "rb") as file:
+            file_size = os.fstat(file.fileno()).st_size
+            if length is None:
+                length = file_size - offset
+            if offset < 0 or length < 0 or offset + length > file_size:
+                raise ValueError(
+                    f"Range {offset}..{offset + length} is outside of the "
+                    f"{file_size} byte file {os.fspath(path)!r}"
+                )
+            if length < 4:
+                raise ValueError(
+                    f"Invalid CDR data size {length}, "
+                    "must contain at least a 4-byte header",
+                )
+            # Mappings must start at a multiple of the allocation granularity.
+            start = offset - offset % mmap.ALLOCATIONGRANULARITY
+            mapping = mmap.mmap(
+                file.fileno(),
+                offset + length - start,
+                access=mmap.ACCESS_READ,
+                offset=start,
+            )
+        return cls(
+            memoryview(mapping)[offset - start :],
+            as_numpy=as_numpy,
+            string_cache=string_cache,
+        )
+
     # ------------------------------------------------------------------
     # Basic properties
     # ------------------------------------------------------------------
@@ -223,10 +305,14 @@ class CdrReader:
             self.offset += length
             return ""
 
-        data = self._view[self.offset : self.offset + length - 1]
-        value = data.tobytes().decode("utf-8")
-        self.offset += length
-        return value
+        start = self.offset
+        self.offset = start + length
+        data = self._view[start : start + length - 1]
+        if length > COPY_FREE_LENGTH:
+            return str(data, "utf-8")
+        if self.string_cache is not None:
+            return self.string_cache.decode(data.tobytes())
+        return data.tobytes().decode("utf-8")
 
     def d_header(self) -> int:
         """Read the delimiter header and return the object size."""
@@ -329,17 +415,24 @@ class CdrReader:
     # Array readers return a zero-copy ``memoryview`` when possible and fall back
     # to a Python ``list`` for incompatible cases (misalignment or mismatched
     # endianness).
-    def int8_array(self, count: int | None = None) -> Sequence[int]:
+    def int8_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[int] | np.ndarray:
         count = self.sequence_length() if count is None else count
-        return cast("Sequence[int]", self._array("b", count, 1))
+        return cast("Sequence[int]", self._array("b", count, 1, as_numpy))
 
-    def uint8_array(self, count: int | None = None) -> Sequence[int]:
+    def uint8_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[int] | np.ndarray:
         count = self.sequence_length() if count is None else count
-        return cast("Sequence[int]", self._array("B", count, 1))
+        return cast("Sequence[int]", self._array("B", count, 1, as_numpy))
 
     def _array(
-        self, fmt: str, count: int, alignment: int
-    ) -> Sequence[int] | Sequence[float]:
+        self, fmt: str, count: int, alignment: int, as_numpy: bool | None = None
+    ) -> Sequence[int] | Sequence[float] | np.ndarray:
+        if self.as_numpy if as_numpy is None else as_numpy:
+            return self._numpy_array(fmt, count, alignment)
+
         if count == 0:
             data = self._view[self.offset : self.offset]
             if self.little_endian == self.host_little_endian:
@@ -367,46 +460,114 @@ class CdrReader:
         values = struct.unpack(f"{self._endian_prefix}{count}{fmt}", data.tobytes())
         return list(values)
 
-    def int16_array(self, count: int | None = None) -> Sequence[int]:
+    def _numpy_array(self, fmt: str, count: int, alignment: int) -> np.ndarray:
+        """Return a NumPy view of ``count`` elements in the stream byte order.
+
+        The view aliases the underlying buffer.  Data that is not aligned in
+        memory for its element type is copied once into an aligned array.
+        """
+
+        np = import_numpy()
+        dtype = np.dtype(self._endian_prefix + fmt)
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+
+        self.align(alignment)
+        start = self.offset
+        array = np.frombuffer(self._view, dtype=dtype, count=count, offset=start)
+        self.offset = start + dtype.itemsize * count
+        if not array.flags.aligned:
+            array = array.copy()
+        return array
+
+    def int16_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[int] | np.ndarray:
         count = self.sequence_length() if count is None else count
-        return cast("Sequence[int]", self._array("h", count, 2))
+        return cast("Sequence[int]", self._array("h", count, 2, as_numpy))
 
-    def uint16_array(self, count: int | None = None) -> Sequence[int]:
+    def uint16_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[int] | np.ndarray:
         count = self.sequence_length() if count is None else count
-        return cast("Sequence[int]", self._array("H", count, 2))
+        return cast("Sequence[int]", self._array("H", count, 2, as_numpy))
 
-    def int32_array(self, count: int | None = None) -> Sequence[int]:
+    def int32_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[int] | np.ndarray:
         count = self.sequence_length() if count is None else count
-        return cast("Sequence[int]", self._array("i", count, 4))
+        return cast("Sequence[int]", self._array("i", count, 4, as_numpy))
 
-    def uint32_array(self, count: int | None = None) -> Sequence[int]:
+    def uint32_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[int] | np.ndarray:
         count = self.sequence_length() if count is None else count
-        return cast("Sequence[int]", self._array("I", count, 4))
+        return cast("Sequence[int]", self._array("I", count, 4, as_numpy))
 
-    def int64_array(self, count: int | None = None) -> Sequence[int]:
+    def int64_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[int] | np.ndarray:
         count = self.sequence_length() if count is None else count
-        return cast("Sequence[int]", self._array("q", count, self.eight_byte_alignment))
+        return cast(
+            "Sequence[int]",
+            self._array("q", count, self.eight_byte_alignment, as_numpy),
+        )
 
-    def uint64_array(self, count: int | None = None) -> Sequence[int]:
+    def uint64_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[int] | np.ndarray:
         count = self.sequence_length() if count is None else count
-        return cast("Sequence[int]", self._array("Q", count, self.eight_byte_alignment))
+        return cast(
+            "Sequence[int]",
+            self._array("Q", count, self.eight_byte_alignment, as_numpy),
+        )
 
-    def float32_array(self, count: int | None = None) -> Sequence[float]:
+    def float32_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[float] | np.ndarray:
         count = self.sequence_length() if count is None else count
-        return cast("Sequence[float]", self._array("f", count, 4))
+        return cast("Sequence[float]", self._array("f", count, 4, as_numpy))
 
-    def float64_array(self, count: int | None = None) -> Sequence[float]:
+    def float64_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[float] | np.ndarray:
         count = self.sequence_length() if count is None else count
         return cast(
             "Sequence[float]",
-            self._array("d", count, self.eight_byte_alignment),
+            self._array("d", count, self.eight_byte_alignment, as_numpy),
         )
 
     def string_array(self, count: int | None = None) -> list[str]:
+        """Read ``count`` strings, or a sequence length and as many strings.
+
+        The strings are read in one loop over the buffer with the same
+        decoding rules as :meth:`string`.
+        """
+
         count = self.sequence_length() if count is None else count
-        if count == 0:
-            return []
-        return [self.string() for _ in range(count)]
+        view = self._view
+        offset = self.offset
+        origin = self.origin
+        unpack = self._uint32_struct.unpack_from
+        cache = self.string_cache
+        strings: list[str] = []
+        append = strings.append
+        for _ in range(count):
+            offset += -(offset - origin) % 4
+            length = unpack(view, offset)[0]
+            offset += 4
+            end = offset + length - 1
+            if length <= 1:
+                append("")
+            elif length > COPY_FREE_LENGTH:
+                append(str(view[offset:end], "utf-8"))
+            elif cache is None:
+                append(view[offset:end].tobytes().decode("utf-8"))
+            else:
+                append(cache.decode(view[offset:end].tobytes()))
+            offset += length
+        self.offset = offset
+        return strings
 
     # ------------------------------------------------------------------
     # Position helpers
@@ -427,8 +588,90 @@ class CdrReader:
             )
         self.offset = offset
 
+    # ------------------------------------------------------------------
+    # Skipping
+    # ------------------------------------------------------------------
+    # The skip methods only read length prefixes and delimiter headers; the
+    # skipped payload bytes are never touched.
+    def skip_string(self) -> None:
+        """Skip a string, reading only its length prefix."""
+
+        length = self.uint32()
+        self._skip_to(self.offset + length)
+
+    def skip_sequence(self, elem_size: int, count: int | None = None) -> None:
+        """Skip a sequence of primitive elements of ``elem_size`` bytes.
+
+        Parameters
+        ----------
+        elem_size:
+            Size in bytes of one element: 1, 2, 4 or 8.
+        count:
+            Number of elements of a fixed-size array.  When ``None`` a
+            sequence length is read first.
+        """
+
+        if elem_size not in (1, 2, 4, 8):
+            raise ValueError(f"Invalid element size {elem_size}, must be 1, 2, 4 or 8")
+        if count is None:
+            count = self.uint32()
+        if count:
+            self.align(min(elem_size, self.eight_byte_alignment))
+            self._skip_to(self.offset + count * elem_size)
+
+    def skip_delimited(self) -> None:
+        """Skip a value preceded by a DHEADER using the size it stores.
+
+        XCDR2 encodes appendable and mutable structs, and sequences of
+        non-primitive elements, with a DHEADER.
+        """
+
+        size = self.d_header()
+        self._skip_to(self.offset + size)
+
+    def skip(self, schema: MessageSchema, type_name: str | None = None) -> None:
+        """Skip a message of ``type_name``, defaulting to the schema root.
+
+        Fixed-size runs of fields are skipped by their precomputed size and
+        strings and sequences by their length prefixes, so skipping costs a
+        few ``unpack_from`` calls per variable-size field.  XTypes messages
+        are skipped by their headers: delimited ones by their DHEADER and
+        XCDR1 mutable ones by the sizes in their parameter headers, which
+        move the alignment origin as :meth:`em_header` does.
+        """
+
+        # Imported here as the view module builds on this one.
+        from .view import _get_layout
+
+        if type_name is None:
+            type_name = schema.root
+        layout = _get_layout(
+            schema, type_name, self.little_endian, self.eight_byte_alignment
+        )
+        try:
+            offset, origin = layout.skip_with_origin(
+                self._view, self.offset, self.origin
+            )
+        except (struct.error, IndexError) as error:
+            raise ValueError(
+                f"Cannot skip {type_name} at offset {self.offset}: the data of "
+                f"{self._view.nbytes} bytes is truncated"
+            ) from error
+        self._skip_to(offset)
+        self.origin = origin
+
+    def _skip_to(self, offset: int) -> None:
+        if offset > self._view.nbytes:
+            raise ValueError(
+                f"Skipping to offset {offset} exceeds the data of "
+                f"{self._view.nbytes} bytes"
+            )
+        self.offset = offset
+
     def clone(self) -> CdrReader:
-        clone = CdrReader(self._view)
+        clone = CdrReader(
+            self._view, as_numpy=self.as_numpy, string_cache=self.string_cache
+        )
         clone.offset = self.offset
         clone.origin = self.origin
         return clone
@@ -0,0 +1,292 @@
+"""Parsing of ROS 2 ``.msg`` message definitions.
+
+The parser understands the concatenated definition format used by rosbag2 and
+MCAP, where the root definition is followed by the definitions of all nested
+types separated by a line of ``=`` characters and a ``MSG: package/Type``
+marker.  The result is a :class:`MessageSchema` holding one
+:class:`MessageDefinition` per type which the compiled codecs build upon.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterator
+
+# Primitive ROS 2 types that map onto fixed-size CDR values.  ``byte`` and
+# ``char`` are both serialised as a single octet.
+PRIMITIVE_TYPES = frozenset(
+    {
+        "bool",
+        "byte",
+        "char",
+        "int8",
+        "uint8",
+        "int16",
+        "uint16",
+        "int32",
+        "uint32",
+        "int64",
+        "uint64",
+        "float32",
+        "float64",
+    }
+)
+
+STRING_TYPES = frozenset({"string", "wstring"})
+
+# Definitions that rosbag2 usually ships alongside each schema but which are
+# provided here so that hand-written schemas do not need to repeat them.
+_BUILTIN_DEFINITIONS = {
+    "builtin_interfaces/Time": "int32 sec\nuint32 nanosec\n",
+    "builtin_interfaces/Duration": "int32 sec\nuint32 nanosec\n",
+}
+
+_SEPARATOR_RE = re.compile(r"^={3,}\s*$")
+_TYPE_RE = re.compile(
+    r"^(?P<base>[A-Za-z][A-Za-z0-9_/]*)"
+    r"(?:<=(?P<string_bound>\d+))?"
+    r"(?:\[(?P<bounded><=)?(?P<length>\d*)\])?$"
+)
+_NAME_RE = re.compile(r"^[A-Za-z][A-Za-z0-9_]*$")
+
+
+@dataclass(frozen=True)
+class FieldDefinition:
+    """A single field of a :class:`MessageDefinition`.
+
+    ``type`` is either the name of a primitive or string type or the fully
+    qualified ``package/Type`` name of a nested message.  For arrays
+    ``array_length`` holds the element count of fixed-size arrays while
+    ``array_upper_bound`` records the bound of ``T[<=N]`` sequences.
+
+    ``member_id``, ``is_key`` and ``is_optional`` are only set for types
+    parsed from IDL (see :mod:`cdr.idl`).
+    """
+
+    name: str
+    type: str
+    is_complex: bool = False
+    is_array: bool = False
+    array_length: int | None = None
+    array_upper_bound: int | None = None
+    string_upper_bound: int | None = None
+    member_id: int | None = None
+    is_key: bool = False
+    is_optional: bool = False
+
+    @property
+    def is_sequence(self) -> bool:
+        """``True`` for arrays whose length is encoded in the stream."""
+
+        return self.is_array and self.array_length is None
+
+
+@dataclass(frozen=True)
+class ConstantDefinition:
+    """A constant declared in a message definition."""
+
+    name: str
+    type: str
+    value: str
+
+
+@dataclass(frozen=True)
+class MessageDefinition:
+    """The fields and constants of one message type.
+
+    ``extensibility`` is ``"final"``, ``"appendable"`` or ``"mutable"`` for
+    types parsed from IDL, which are encoded following the XTypes rules for
+    that extensibility kind.  It is ``None`` for ``.msg`` types, which are
+    encoded as plain structures in every encapsulation kind.
+    """
+
+    name: str
+    fields: tuple[FieldDefinition, ...]
+    constants: tuple[ConstantDefinition, ...] = ()
+    extensibility: str | None = None
+
+
+@dataclass(frozen=True, eq=False)
+class MessageSchema:
+    """A root message type together with every type it references.
+
+    Schemas compare by identity so that they can key the caches of compiled
+    codecs.
+    """
+
+    root: str
+    definitions: Dict[str, MessageDefinition]
+
+    @property
+    def root_definition(self) -> MessageDefinition:
+        return self.definitions[self.root]
+
+    def __getitem__(self, name: str) -> MessageDefinition:
+        try:
+            return self.definitions[name]
+        except KeyError:
+            raise KeyError(f"Unknown message type {name!r}") from None
+
+
+def parse_message_definition(text: str, name: str = "") -> MessageSchema:
+    """Parse a ROS 2 ``.msg`` definition into a :class:`MessageSchema`.
+
+    Parameters
+    ----------
+    text:
+        The message definition.  Nested types may follow the root definition
+        in the concatenated rosbag2/MCAP format.
+    name:
+        Fully qualified name of the root type, e.g. ``"tf2_msgs/TFMessage"``.
+        It is used to resolve relative type references in the root
+        definition.
+
+    Raises
+    ------
+    ValueError
+        If a line cannot be parsed or a referenced type is not defined.
+    """
+
+    root = _normalize_name(name) if name else ""
+    sections = list(_split_sections(text, root))
+
+    raw: Dict[str, list[tuple[str, str, str | None]]] = {}
+    for section_name, lines in sections:
+        raw[section_name] = lines
+    for builtin, definition in _BUILTIN_DEFINITIONS.items():
+        if builtin not in raw:
+            raw[builtin] = list(_split_sections(definition, builtin))[0][1]
+
+    known = set(raw)
+    definitions: Dict[str, MessageDefinition] = {}
+    for section_name, lines in raw.items():
+        package = section_name.split("/")[0] if "/" in section_name else ""
+        fields: list[FieldDefinition] = []
+        constants: list[ConstantDefinition] = []
+        for type_token, field_name, constant_value in lines:
+            if constant_value is not None:
+                constants.append(
+                    ConstantDefinition(field_name, type_token, constant_value)
+                )
+            else:
+                fields.append(_parse_field(type_token, field_name, package, known))
+        definitions[section_name] = MessageDefinition(
+            section_name, tuple(fields), tuple(constants)
+        )
+
+    return MessageSchema(root=root, definitions=definitions)
+
+
+# ----------------------------------------------------------------------
+# Internal helpers
+# ----------------------------------------------------------------------
+def _normalize_name(name: str) -> str:
+    parts = name.strip().split("/")
+    if len(parts) == 3 and parts[1] == "msg":
+        return f"{parts[0]}/{parts[2]}"
+    return name.strip()
+
+
+def _split_sections(
+    text: str, root: str
+) -> Iterator[tuple[str, list[tuple[str, str, str | None]]]]:
+    section_name = root
+    lines: list[tuple[str, str, str | None]] = []
+    expect_header = False
+    for line_number, raw_line in enumerate(text.splitlines(), start=1):
+        line = raw_line.strip()
+        if _SEPARATOR_RE.match(line):
+            yield section_name, lines
+            section_name, lines = "", []
+            expect_header = True
+            continue
+        if not line or line.startswith("#"):
+            continue
+        if expect_header:
+            if not line.startswith("MSG:"):
+                raise ValueError(
+                    f"Expected 'MSG: <type>' on line {line_number}, got {line!r}"
+                )
+            section_name = _normalize_name(line[4:])
+            expect_header = False
+            continue
+        lines.append(_parse_line(line, line_number))
+    yield section_name, lines
+
+
+def _parse_line(line: str, line_number: int) -> tuple[str, str, str | None]:
+    parts = line.split(None, 1)
+    if len(parts) != 2:
+        raise ValueError(f"Invalid field definition on line {line_number}: {line!r}")
+    type_token, rest = parts
+
+    # Constants: ``TYPE NAME=VALUE``.  String constants keep everything after
+    # the ``=`` verbatim, including ``#`` characters.
+    name_part, sep, value = rest.partition("=")
+    if sep and _NAME_RE.match(name_part.strip()):
+        if type_token not in STRING_TYPES:
+            value = value.split("#", 1)[0]
+        return type_token, name_part.strip(), value.strip()
+
+    rest = rest.split("#", 1)[0].split()
+    if not rest or not _NAME_RE.match(rest[0]):
+        raise ValueError(f"Invalid field name on line {line_number}: {line!r}")
+    # Any remaining tokens are a default value which does not affect the
+    # serialised representation.
+    return type_token, rest[0], None
+
+
+def _parse_field(
+    type_token: str, field_name: str, package: str, known: set[str]
+) -> FieldDefinition:
+    match = _TYPE_RE.match(type_token)
+    if match is None:
+        raise ValueError(f"Invalid type {type_token!r} for field {field_name!r}")
+
+    base = match.group("base")
+    string_bound = match.group("string_bound")
+    is_array = match.group("length") is not None or match.group("bounded") is not None
+    length = match.group("length") or None
+    bounded = match.group("bounded") is not None
+    if bounded and length is None:
+        raise ValueError(f"Bounded sequence {type_token!r} requires an upper bound")
+
+    is_complex = base not in PRIMITIVE_TYPES and base not in STRING_TYPES
+    if string_bound is not None and base not in STRING_TYPES:
+        raise ValueError(f"Only strings may be bounded, got {type_token!r}")
+    if is_complex:
+        base = _resolve_type(base, package, known)
+
+    return FieldDefinition(
+        name=field_name,
+        type=base,
+        is_complex=is_complex,
+        is_array=is_array,
+        array_length=int(length) if length is not None and not bounded else None,
+        array_upper_bound=int(length) if bounded else None,
+        string_upper_bound=int(string_bound) if string_bound is not None else None,
+    )
+
+
+def _resolve_type(type_name: str, package: str, known: set[str]) -> str:
+    type_name = _normalize_name(type_name)
+    candidates = []
+    if "/" in type_name:
+        candidates.append(type_name)
+    else:
+        if type_name == "Header":
+            candidates.append("std_msgs/Header")
+        if package:
+            candidates.append(f"{package}/{type_name}")
+        candidates.extend(
+            sorted(
+                known_name
+                for known_name in known
+                if known_name.endswith(f"/{type_name}")
+            )
+        )
+    for candidate in candidates:
+        if candidate in known:
+            return candidate
+    raise ValueError(f"Message definition for {type_name!r} not found")
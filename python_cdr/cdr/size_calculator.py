@@ -6,17 +6,29 @@ internal offset which represents the number of bytes that would be written
 when serialising values in CDR (Common Data Representation) format.  Each
 method returns the new offset after accounting for padding and the size of the
 written value.
+
+The alignment rules follow :class:`~cdr.writer.CdrWriter` for the given
+encapsulation kind: 8-byte values are aligned to 4 bytes under XCDR2, and
+member headers of parameter lists reset the alignment origin.
 """
 
 from __future__ import annotations
 
+from .encapsulation_kind import EncapsulationKind
+from .get_encapsulation_kind_info import get_encapsulation_kind_info
+from .length_codes import LengthCode, get_length_code_for_object_size
+
 
 class CdrSizeCalculator:
     """Compute the number of bytes required for CDR serialisation."""
 
     # Two bytes for Representation Id and two bytes for Options
-    def __init__(self) -> None:
+    def __init__(self, kind: EncapsulationKind = EncapsulationKind.CDR_LE) -> None:
+        info = get_encapsulation_kind_info(kind)
+        self._is_cdr2 = info.is_cdr2
+        self._eight_byte_alignment = 4 if self._is_cdr2 else 8
         self._offset = 4
+        self._origin = 4
 
     @property
     def size(self) -> int:
@@ -24,6 +36,12 @@ class CdrSizeCalculator:
 
         return self._offset
 
+    @property
+    def eight_byte_alignment(self) -> int:
+        """Alignment applied to 8-byte values (8 for CDR, 4 for XCDR2)."""
+
+        return self._eight_byte_alignment
+
     # Basic integer and floating point types ---------------------------------
     def int8(self) -> int:
         return self._increment_and_return(1)
@@ -44,16 +62,16 @@ class CdrSizeCalculator:
         return self._increment_and_return(4)
 
     def int64(self) -> int:
-        return self._increment_and_return(8)
+        return self._increment_and_return(8, self._eight_byte_alignment)
 
     def uint64(self) -> int:
-        return self._increment_and_return(8)
+        return self._increment_and_return(8, self._eight_byte_alignment)
 
     def float32(self) -> int:
         return self._increment_and_return(4)
 
     def float64(self) -> int:
-        return self._increment_and_return(8)
+        return self._increment_and_return(8, self._eight_byte_alignment)
 
     # Complex types -----------------------------------------------------------
     def string(self, length: int) -> int:
@@ -73,18 +91,108 @@ class CdrSizeCalculator:
 
         return self.uint32()
 
+    # Arrays ------------------------------------------------------------------
+    # Each array method accounts for ``count`` elements in constant time.  With
+    # ``write_length`` the sequence length prefix is included, matching the
+    # ``writeLength`` argument of the ``CdrWriter`` array methods.
+    def int8_array(self, count: int, write_length: bool = False) -> int:
+        return self._array(count, 1, 1, write_length)
+
+    def uint8_array(self, count: int, write_length: bool = False) -> int:
+        return self._array(count, 1, 1, write_length)
+
+    def int16_array(self, count: int, write_length: bool = False) -> int:
+        return self._array(count, 2, 2, write_length)
+
+    def uint16_array(self, count: int, write_length: bool = False) -> int:
+        return self._array(count, 2, 2, write_length)
+
+    def int32_array(self, count: int, write_length: bool = False) -> int:
+        return self._array(count, 4, 4, write_length)
+
+    def uint32_array(self, count: int, write_length: bool = False) -> int:
+        return self._array(count, 4, 4, write_length)
+
+    def int64_array(self, count: int, write_length: bool = False) -> int:
+        return self._array(count, 8, self._eight_byte_alignment, write_length)
+
+    def uint64_array(self, count: int, write_length: bool = False) -> int:
+        return self._array(count, 8, self._eight_byte_alignment, write_length)
+
+    def float32_array(self, count: int, write_length: bool = False) -> int:
+        return self._array(count, 4, 4, write_length)
+
+    def float64_array(self, count: int, write_length: bool = False) -> int:
+        return self._array(count, 8, self._eight_byte_alignment, write_length)
+
+    # Headers -----------------------------------------------------------------
+    def d_header(self) -> int:
+        """Account for a delimiter header."""
+
+        return self.uint32()
+
+    def em_header(
+        self,
+        must_understand: bool,
+        id: int,
+        object_size: int,
+        length_code: LengthCode | None = None,
+    ) -> int:
+        """Account for a member header as written by ``CdrWriter.emHeader``.
+
+        Under XCDR1 this is a parameter list header, which uses the extended
+        form for large IDs or sizes and resets the alignment origin.  Under
+        XCDR2 it is an EMHEADER followed by a ``NEXTINT`` for length codes 4
+        to 7.
+        """
+
+        if self._is_cdr2:
+            final_length_code = (
+                length_code
+                if length_code is not None
+                else get_length_code_for_object_size(object_size)
+            )
+            self.uint32()
+            if final_length_code >= 4:
+                self.uint32()
+            return self._offset
+
+        self._increment_and_return(0, 4)
+        extended = id > 0x3F00 or object_size > 0xFFFF
+        self._offset += 12 if extended else 4
+        self._origin = self._offset
+        return self._offset
+
+    def sentinel_header(self) -> int:
+        """Account for the sentinel closing an XCDR1 parameter list."""
+
+        if not self._is_cdr2:
+            self._increment_and_return(4)
+        return self._offset
+
     # Private helpers --------------------------------------------------------
-    def _increment_and_return(self, byte_count: int) -> int:
+    def _array(
+        self, count: int, item_size: int, alignment: int, write_length: bool
+    ) -> int:
+        if write_length:
+            self.sequence_length()
+        if count == 0:
+            return self._offset
+        return self._increment_and_return(count * item_size, alignment)
+
+    def _increment_and_return(
+        self, byte_count: int, alignment: int | None = None
+    ) -> int:
         """Increment the offset by ``byte_count`` and any required padding.
 
         The CDR encoding requires that primitive types be aligned to their
-        natural boundaries relative to the start of the CDR stream.  The stream
-        begins with a four byte header, so alignment is performed on
-        ``self._offset - 4``.
+        natural boundaries (``alignment``, defaulting to ``byte_count``)
+        relative to the alignment origin.  The stream begins with a four byte
+        header, so the origin starts at offset 4.
         """
 
-        alignment = (self._offset - 4) % byte_count
-        if alignment > 0:
-            self._offset += byte_count - alignment
+        if alignment is None:
+            alignment = byte_count
+        self._offset += -(self._offset - self._origin) % alignment
         self._offset += byte_count
         return self._offset
@@ -0,0 +1,398 @@
+"""Incremental CDR reader for file-like objects and sockets.
+
+:class:`CdrStreamReader` offers the reading API of
+:class:`~cdr.reader.CdrReader` without requiring the whole payload in memory.
+Bytes are pulled from the source on demand into a fixed-size buffer.  The
+unread tail of the buffer is moved to the front before it is refilled, so a
+primitive value never straddles the end of the buffer and can be unpacked in
+place.  Strings and arrays larger than the buffer are read straight from the
+source into their own ``bytearray``, so even very large arrays are held in
+memory exactly once.
+
+Offsets and alignment follow :class:`CdrReader`: :attr:`offset` counts bytes
+from the start of the payload including the four byte encapsulation header
+and alignment is relative to :attr:`origin`.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Dict, Sequence, cast
+
+from ._numpy import import_numpy
+from .encapsulation_kind import EncapsulationKind
+from .get_encapsulation_kind_info import get_encapsulation_kind_info
+from .is_big_endian import is_big_endian
+from .reader import CdrReader
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+# The largest fixed-size value (``uint64``/``float64``) plus room for the
+# encapsulation header.
+_MIN_BUFFER_SIZE = 16
+
+_STRUCTS: Dict[bool, Dict[str, struct.Struct]] = {
+    little_endian: {
+        char: struct.Struct(("<" if little_endian else ">") + char)
+        for char in "bBhHiIqQfd"
+    }
+    for little_endian in (True, False)
+}
+
+
+class CdrStreamReader:
+    """Read a CDR payload incrementally from a stream.
+
+    Parameters
+    ----------
+    source:
+        A binary file object or a socket.  ``recv_into``, ``readinto1``,
+        ``read1``, ``readinto`` or ``read`` is used to pull bytes, in that
+        order of preference, so that buffered pipes and socket files return
+        the bytes already available instead of waiting to fill the buffer.
+        Sources offering only ``read`` are asked for no more bytes than
+        needed, as ``read`` may wait for all of them.
+    buffer_size:
+        Capacity of the internal buffer.  Bytes are read ahead up to this
+        amount.
+    as_numpy:
+        Return NumPy arrays from the array readers, as in :class:`CdrReader`.
+
+    Array readers return ``memoryview`` objects over freshly allocated
+    buffers, or lists when the stream byte order differs from the host's.
+    Unlike with :class:`CdrReader` the results never alias the reader's
+    buffer.
+    """
+
+    def __init__(
+        self,
+        source: BinaryIO | Any,
+        *,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        as_numpy: bool = False,
+    ) -> None:
+        if buffer_size < _MIN_BUFFER_SIZE:
+            raise ValueError(
+                f"Invalid buffer size {buffer_size}, "
+                f"must be at least {_MIN_BUFFER_SIZE} bytes"
+            )
+        self._source = source
+        self._read_into, self._read_ahead = _read_function(source)
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        # Unread bytes are ``_buffer[_start:_end]``.
+        self._start = 0
+        self._end = 0
+        self.host_little_endian = not is_big_endian()
+        self.as_numpy = as_numpy
+        self._read_header()
+
+    def _read_header(self) -> None:
+        self._fill(4)
+        kind = EncapsulationKind(self._buffer[self._start + 1])
+        self._kind = kind
+        self._start += 4
+        info = get_encapsulation_kind_info(kind)
+
+        self.little_endian = info.little_endian
+        self.is_cdr2 = info.is_cdr2
+        self.eight_byte_alignment = 4 if self.is_cdr2 else 8
+        self.uses_delimiter_header = info.uses_delimiter_header
+        self.uses_member_header = info.uses_member_header
+        self._structs = _STRUCTS[self.little_endian]
+        self._endian_prefix = "<" if self.little_endian else ">"
+
+        self.origin = 4
+        self.offset = 4
+
+    def next_payload(self) -> None:
+        """Start reading the payload that directly follows the current one."""
+
+        self._read_header()
+
+    # ------------------------------------------------------------------
+    # Basic properties
+    # ------------------------------------------------------------------
+    @property
+    def kind(self) -> EncapsulationKind:
+        return self._kind
+
+    @property
+    def decoded_bytes(self) -> int:
+        return self.offset
+
+    @property
+    def buffer_size(self) -> int:
+        return len(self._buffer)
+
+    # ------------------------------------------------------------------
+    # Primitive readers
+    # ------------------------------------------------------------------
+    def int8(self) -> int:
+        return self._unpack("b", 1)
+
+    def uint8(self) -> int:
+        return self._unpack("B", 1)
+
+    def int16(self) -> int:
+        return self._unpack("h", 2)
+
+    def uint16(self) -> int:
+        return self._unpack("H", 2)
+
+    def int32(self) -> int:
+        return self._unpack("i", 4)
+
+    def uint32(self) -> int:
+        return self._unpack("I", 4)
+
+    def int64(self) -> int:
+        return self._unpack("q", self.eight_byte_alignment)
+
+    def uint64(self) -> int:
+        return self._unpack("Q", self.eight_byte_alignment)
+
+    def uint16_be(self) -> int:
+        return self._unpack("H", 2, _STRUCTS[False])
+
+    def uint32_be(self) -> int:
+        return self._unpack("I", 4, _STRUCTS[False])
+
+    def uint64_be(self) -> int:
+        return self._unpack("Q", self.eight_byte_alignment, _STRUCTS[False])
+
+    def float32(self) -> float:
+        return self._unpack("f", 4)
+
+    def float64(self) -> float:
+        return self._unpack("d", self.eight_byte_alignment)
+
+    def _unpack(
+        self, char: str, alignment: int, structs: Dict[str, struct.Struct] | None = None
+    ) -> Any:
+        self.align(alignment)
+        packer = (self._structs if structs is None else structs)[char]
+        size = packer.size
+        if self._end - self._start < size:
+            self._fill(size)
+        value = packer.unpack_from(self._buffer, self._start)[0]
+        self._start += size
+        self.offset += size
+        return value
+
+    # ------------------------------------------------------------------
+    # Strings and headers
+    # ------------------------------------------------------------------
+    def string(self, preread_length: int | None = None) -> str:
+        length = preread_length or self.uint32()
+        if length <= 1:
+            self._skip(length)
+            return ""
+
+        if length <= len(self._buffer):
+            self._fill(length)
+            start = self._start
+            value = self._buffer[start : start + length - 1].decode("utf-8")
+            self._start += length
+            self.offset += length
+            return value
+        return self._read_exact(length)[:-1].decode("utf-8")
+
+    # The header parsers only use the primitive readers and ``align``, so the
+    # implementations of :class:`CdrReader` are shared.
+    d_header = CdrReader.d_header
+    em_header = CdrReader.em_header
+    _member_header_v1 = CdrReader._member_header_v1
+    _member_header_v2 = CdrReader._member_header_v2
+    _em_header_object_size = CdrReader._em_header_object_size
+    _reset_origin = CdrReader._reset_origin
+    sentinel_header = CdrReader.sentinel_header
+
+    # ------------------------------------------------------------------
+    # Sequence helpers and array readers
+    # ------------------------------------------------------------------
+    def sequence_length(self) -> int:
+        return self.uint32()
+
+    def int8_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[int]:
+        return cast("Sequence[int]", self._array("b", count, 1, as_numpy))
+
+    def uint8_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[int]:
+        return cast("Sequence[int]", self._array("B", count, 1, as_numpy))
+
+    def int16_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[int]:
+        return cast("Sequence[int]", self._array("h", count, 2, as_numpy))
+
+    def uint16_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[int]:
+        return cast("Sequence[int]", self._array("H", count, 2, as_numpy))
+
+    def int32_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[int]:
+        return cast("Sequence[int]", self._array("i", count, 4, as_numpy))
+
+    def uint32_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[int]:
+        return cast("Sequence[int]", self._array("I", count, 4, as_numpy))
+
+    def int64_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[int]:
+        return cast(
+            "Sequence[int]",
+            self._array("q", count, self.eight_byte_alignment, as_numpy),
+        )
+
+    def uint64_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[int]:
+        return cast(
+            "Sequence[int]",
+            self._array("Q", count, self.eight_byte_alignment, as_numpy),
+        )
+
+    def float32_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[float]:
+        return cast("Sequence[float]", self._array("f", count, 4, as_numpy))
+
+    def float64_array(
+        self, count: int | None = None, *, as_numpy: bool | None = None
+    ) -> Sequence[float]:
+        return cast(
+            "Sequence[float]",
+            self._array("d", count, self.eight_byte_alignment, as_numpy),
+        )
+
+    def string_array(self, count: int | None = None) -> list[str]:
+        count = self.sequence_length() if count is None else count
+        return [self.string() for _ in range(count)]
+
+    def _array(
+        self,
+        fmt: str,
+        count: int | None,
+        alignment: int,
+        as_numpy: bool | None = None,
+    ) -> Sequence[int] | Sequence[float] | np.ndarray:
+        count = self.sequence_length() if count is None else count
+        use_numpy = self.as_numpy if as_numpy is None else as_numpy
+        if count == 0:
+            data = bytearray()
+        else:
+            self.align(alignment)
+            data = self._read_exact(self._structs[fmt].size * count)
+
+        if use_numpy:
+            np = import_numpy()
+            return np.frombuffer(data, dtype=np.dtype(self._endian_prefix + fmt))
+        if self.little_endian == self.host_little_endian or fmt in "bB":
+            return memoryview(data).cast(cast(Any, fmt))
+        return list(struct.unpack(f"{self._endian_prefix}{count}{fmt}", data))
+
+    # ------------------------------------------------------------------
+    # Alignment helper
+    # ------------------------------------------------------------------
+    def align(self, size: int) -> None:
+        padding = -(self.offset - self.origin) % size
+        if padding:
+            self._skip(padding)
+
+    # ------------------------------------------------------------------
+    # Buffer management
+    # ------------------------------------------------------------------
+    def _fill(self, size: int) -> None:
+        """Ensure that at least ``size`` (<= buffer size) bytes are buffered."""
+
+        available = self._end - self._start
+        if available >= size:
+            return
+        if self._start + size > len(self._buffer):
+            self._buffer[:available] = self._buffer[self._start : self._end]
+            self._start, self._end = 0, available
+        stop = len(self._buffer)
+        while self._end - self._start < size:
+            if not self._read_ahead:
+                stop = self._start + size
+            read = self._read_into(self._view[self._end : stop])
+            if not read:
+                raise ValueError(
+                    f"Unexpected end of stream at offset {self.offset}, "
+                    f"needed {size} bytes but only {self._end - self._start} remain"
+                )
+            self._end += read
+
+    def _skip(self, size: int) -> None:
+        self.offset += size
+        while size:
+            step = min(size, len(self._buffer))
+            self._fill(step)
+            self._start += step
+            size -= step
+
+    def _read_exact(self, size: int) -> bytearray:
+        """Return the next ``size`` bytes in a newly allocated buffer."""
+
+        result = bytearray(size)
+        target = memoryview(result)
+        filled = min(size, self._end - self._start)
+        target[:filled] = self._view[self._start : self._start + filled]
+        self._start += filled
+        remaining = size - filled
+        if remaining > len(self._buffer):
+            # Large values bypass the buffer and are read in place.
+            while filled < size:
+                read = self._read_into(target[filled:])
+                if not read:
+                    raise ValueError(
+                        f"Unexpected end of stream at offset {self.offset + filled}, "
+                        f"needed {size - filled} more bytes"
+                    )
+                filled += read
+        elif remaining:
+            self._fill(remaining)
+            target[filled:] = self._view[self._start : self._start + remaining]
+            self._start += remaining
+        self.offset += size
+        return result
+
+
+def _read_function(source: Any) -> tuple[Callable[[memoryview], int], bool]:
+    """Return a function reading from ``source`` into a buffer, and whether
+    it returns the bytes available rather than waiting to fill the buffer.
+
+    ``readinto`` and ``read`` of buffered streams wait for the full size
+    requested, whereas their ``1`` variants make at most one raw read.
+    """
+
+    for name in ("recv_into", "readinto1"):
+        method = getattr(source, name, None)
+        if method is not None:
+            return lambda view: method(view) or 0, True
+
+    read = getattr(source, "read1", None)
+    read_ahead = read is not None
+    if read is None:
+        method = getattr(source, "readinto", None)
+        if method is not None:
+            return lambda view: method(view) or 0, True
+        read = source.read
+
+    def read_into(view: memoryview) -> int:
+        data = read(len(view))
+        view[: len(data)] = data
+        return len(data)
+
+    return read_into, read_ahead
@@ -0,0 +1,65 @@
+"""Interning of decoded strings.
+
+Strings such as ``frame_id`` or enum-like labels repeat across millions of
+messages.  A :class:`StringCache` maps their encoded bytes to one shared
+``str`` object, so repeated strings skip UTF-8 decoding and the decoded
+messages share a single copy of each.  Pass one cache to every
+:class:`~cdr.reader.CdrReader` or :class:`~cdr.decoder.MessageDecoder` that
+decodes the same topic.
+"""
+
+from __future__ import annotations
+
+from typing import Dict
+
+#: Encoded length, including the null terminator, above which strings are
+#: decoded straight from the buffer instead of from a ``bytes`` copy.  Such
+#: strings are never interned.  Below it the copy is cheaper than decoding
+#: from a ``memoryview``.
+COPY_FREE_LENGTH = 1024
+
+
+class StringCache:
+    """A bounded cache of decoded UTF-8 strings keyed by their encoding.
+
+    Lookups are a single dictionary access.  Once ``maxsize`` strings are
+    cached, each new string evicts the oldest one.
+
+    Parameters
+    ----------
+    maxsize:
+        Number of distinct strings kept.
+    """
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        self._maxsize = maxsize
+        self._strings: Dict[bytes, str] = {}
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    def decode(self, raw: bytes) -> str:
+        """Return the shared ``str`` for the UTF-8 encoded ``raw``."""
+
+        value = self._strings.get(raw)
+        if value is None:
+            value = self._insert(raw)
+        return value
+
+    def _insert(self, raw: bytes) -> str:
+        strings = self._strings
+        if len(strings) >= self._maxsize:
+            strings.pop(next(iter(strings)), None)
+        value = strings[raw] = raw.decode("utf-8")
+        return value
+
+    def clear(self) -> None:
+        """Drop all cached strings."""
+
+        self._strings.clear()
+
+    def __len__(self) -> int:
+        return len(self._strings)
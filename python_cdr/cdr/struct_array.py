@@ -0,0 +1,265 @@
+"""Sequences of fixed-size messages as NumPy structured arrays.
+
+A sequence of a message type without strings or sequences, such as
+``geometry_msgs/Point[]``, is a run of identically laid out records once the
+first element is aligned.  :func:`read_struct_array` describes such a record
+with a structured dtype whose field offsets and itemsize include the padding
+inserted by the CDR alignment rules, and returns the whole run as one array:
+a zero-copy view when the stream uses the host byte order and a single
+byteswapped copy otherwise.
+
+Nested messages become nested structured dtypes and fixed-size arrays
+become subarray fields, so ``points["x"]`` or ``poses["position"]["x"]`` are
+strided views as well.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+from weakref import WeakKeyDictionary
+
+from ._numpy import import_numpy
+from ._plan import (
+    FORMAT_SIZES,
+    PRIMITIVE_FORMATS,
+    PRIMITIVE_METHODS,
+    get_plan,
+    wire_fields,
+)
+from .encapsulation_kind import EncapsulationKind
+from .reader import CdrReader
+from .schema import MessageSchema
+from .size_calculator import CdrSizeCalculator
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Field names, dtypes and offsets of a laid out message.
+_Fields = List[Tuple[str, Any, int]]
+
+
+def read_struct_array(
+    reader: CdrReader,
+    schema: MessageSchema,
+    type_name: str,
+    count: int | None = None,
+) -> np.ndarray:
+    """Read a sequence of ``type_name`` messages into a structured array.
+
+    Parameters
+    ----------
+    reader:
+        Reader positioned at the sequence length, or at the first element
+        when ``count`` is given.  It is advanced past the last element.
+    schema:
+        The schema describing the messages.
+    type_name:
+        Element type; it must not contain strings, sequences or XTypes
+        member or delimiter headers.
+    count:
+        Number of elements of a fixed-size array.  When ``None`` a sequence
+        length is read first.
+
+    Returns
+    -------
+    numpy.ndarray
+        A one-dimensional structured array.  It is a view of the reader's
+        buffer when the stream byte order matches the host's; otherwise, and
+        when the first element is padded differently from the others, it is
+        a copy in host byte order.
+
+    Raises
+    ------
+    ValueError
+        If the type has no fixed size, contains an array of messages with
+        padding between its elements, or the data ends before the last
+        element.
+    """
+
+    np = import_numpy()
+    count = reader.sequence_length() if count is None else count
+    byteorder = "<" if reader.little_endian else ">"
+    swap = reader.little_endian != reader.host_little_endian
+    # Records are laid out from offset 4 + phase of a size calculator, with
+    # the same alignment phase as the reader; ``shift`` converts offsets.
+    phase = (reader.offset - reader.origin) % 8
+    shift = reader.offset - 4 - phase
+    # Alignment fixes the padding of every element after the first, so the
+    # first three elements determine the layout of the whole sequence.
+    records = _records(
+        schema,
+        type_name,
+        reader.eight_byte_alignment,
+        byteorder,
+        phase,
+        max(1, min(count, 3)),
+    )
+    dtype, start, _ = records[0]
+    if count == 0:
+        return np.empty(0, dtype=dtype.newbyteorder("=") if swap else dtype)
+
+    stride = records[-1][1] - records[-2][1] if count > 1 else dtype.itemsize
+    last = records[-1][1] + (count - len(records)) * stride
+    if last + shift + records[-1][0].itemsize > reader.byte_length:
+        raise ValueError(
+            f"{count} {type_name} elements exceed the data of "
+            f"{reader.byte_length} bytes"
+        )
+
+    view = reader._view
+    if len(records) == 1 or (
+        records[1][0] == dtype and records[1][1] - start == stride
+    ):
+        array = np.ndarray(
+            (count,), dtype, buffer=view, offset=start + shift, strides=(stride,)
+        )
+        if swap:
+            array = array.astype(dtype.newbyteorder("="))
+    else:
+        rest_dtype, rest_start, _ = records[1]
+        array = np.empty(count, dtype=rest_dtype.newbyteorder("="))
+        array[:1] = np.ndarray((1,), dtype, buffer=view, offset=start + shift)
+        array[1:] = np.ndarray(
+            (count - 1,),
+            rest_dtype,
+            buffer=view,
+            offset=rest_start + shift,
+            strides=(stride,),
+        )
+    reader.offset = last + shift + records[-1][0].itemsize
+    return array
+
+
+def is_struct_array_type(
+    schema: MessageSchema, type_name: str, eight_byte_alignment: int = 8
+) -> bool:
+    """Return whether :func:`read_struct_array` supports ``type_name``."""
+
+    for phase in range(8):
+        try:
+            _records(schema, type_name, eight_byte_alignment, "<", phase, 1)
+        except ValueError:
+            return False
+    return True
+
+
+# ----------------------------------------------------------------------
+# Internal helpers
+# ----------------------------------------------------------------------
+_RecordsCache = Dict[tuple[str, int, str, int, int], List[Tuple[Any, int, int]]]
+_RECORDS: WeakKeyDictionary[MessageSchema, _RecordsCache] = WeakKeyDictionary()
+
+
+def _records(
+    schema: MessageSchema,
+    type_name: str,
+    eight_byte_alignment: int,
+    byteorder: str,
+    phase: int,
+    count: int,
+) -> List[Tuple[Any, int, int]]:
+    """Return the cached layout of the first ``count`` elements of a sequence.
+
+    The sequence starts at offset ``4 + phase`` of a size calculator.
+    """
+
+    cache = _RECORDS.get(schema)
+    if cache is None:
+        cache = _RECORDS[schema] = {}
+    key = (type_name, eight_byte_alignment, byteorder, phase, count)
+    records = cache.get(key)
+    if records is None:
+        np = import_numpy()
+        kind = (
+            EncapsulationKind.CDR2_LE
+            if eight_byte_alignment == 4
+            else EncapsulationKind.CDR_LE
+        )
+        cdr2 = eight_byte_alignment == 4
+        calculator = CdrSizeCalculator(kind)
+        calculator._offset += phase
+        records = cache[key] = [
+            _record(np, schema, type_name, calculator, byteorder, cdr2)
+            for _ in range(count)
+        ]
+    return records
+
+
+def _record(
+    np: Any,
+    schema: MessageSchema,
+    type_name: str,
+    calculator: CdrSizeCalculator,
+    byteorder: str,
+    cdr2: bool,
+) -> tuple[Any, int, int]:
+    """Lay out one message and return its dtype, start and end offsets.
+
+    The record starts at its first member, after any leading padding.
+    """
+
+    fields = _fields(np, schema, type_name, calculator, byteorder, cdr2)
+    start = fields[0][2]
+    end = calculator.size
+    dtype = np.dtype(
+        {
+            "names": [name for name, _, _ in fields],
+            "formats": [dtype for _, dtype, _ in fields],
+            "offsets": [offset - start for _, _, offset in fields],
+            "itemsize": end - start,
+        }
+    )
+    return dtype, start, end
+
+
+def _fields(
+    np: Any,
+    schema: MessageSchema,
+    type_name: str,
+    calculator: CdrSizeCalculator,
+    byteorder: str,
+    cdr2: bool,
+) -> _Fields:
+    if not get_plan(schema, type_name).is_plain(cdr2):
+        raise ValueError(f"{type_name} is encoded with XTypes headers")
+    definition = schema[type_name]
+    if not wire_fields(definition):
+        raise ValueError(f"{type_name} has no members")
+    fields: _Fields = []
+    for field in wire_fields(definition):
+        if field.is_sequence or field.type in ("string", "wstring"):
+            raise ValueError(
+                f"{type_name} is not of fixed size: field {field.name!r} is a "
+                f"{'sequence' if field.is_sequence else field.type}"
+            )
+        count = field.array_length
+
+        if not field.is_complex:
+            char = PRIMITIVE_FORMATS[field.type]
+            method = PRIMITIVE_METHODS[field.type]
+            dtype = np.dtype(byteorder + char)
+            if count is None:
+                end = getattr(calculator, method)()
+                fields.append((field.name, dtype, end - FORMAT_SIZES[char]))
+            else:
+                end = getattr(calculator, f"{method}_array")(count)
+                offset = end - FORMAT_SIZES[char] * count
+                fields.append((field.name, np.dtype((dtype, (count,))), offset))
+            continue
+
+        records = [
+            _record(np, schema, field.type, calculator, byteorder, cdr2)
+            for _ in range(1 if count is None else count)
+        ]
+        dtype, start, end = records[0]
+        for element_dtype, element_start, _ in records[1:]:
+            if element_dtype != dtype or element_start != end:
+                raise ValueError(
+                    f"Elements of {type_name}.{field.name} are not laid out "
+                    "contiguously"
+                )
+            end = element_start + dtype.itemsize
+        if count is not None:
+            dtype = np.dtype((dtype, (count,)))
+        fields.append((field.name, dtype, start))
+    return fields
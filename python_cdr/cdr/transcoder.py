@@ -0,0 +1,480 @@
+"""Schema-driven conversion of payloads between encapsulation kinds.
+
+:class:`MessageTranscoder` rewrites a payload in another byte order and/or
+with the other ``eight_byte_alignment`` without decoding it into Python
+objects.  Like the codecs, it generates one function per message type from
+the plans of :mod:`cdr._plan` that walks the source buffer once and writes
+straight into the output buffer:
+
+* runs of fixed-size fields are converted with one ``unpack_from`` and one
+  ``pack_into`` each, using integer formats so that floating point values,
+  including NaN payloads, are copied bit for bit;
+* primitive arrays are byteswapped in bulk with :meth:`array.array.byteswap`;
+* strings, ``uint8`` arrays and other byte blobs are copied verbatim.
+
+Padding is recomputed for the target layout, so converting between XCDR1
+and XCDR2 moves 8-byte values to their new alignment.  XTypes delimiter and
+member headers keep their sizes when the alignment does not change, so they
+are byteswapped in place.
+"""
+
+from __future__ import annotations
+
+import struct
+from array import array
+from functools import partial
+from typing import Any, Callable, Dict, Tuple
+
+from ._plan import (
+    FORMAT_SIZES,
+    PRIMITIVE_FORMATS,
+    ArrayStep,
+    FixedRun,
+    MemberStep,
+    MessageStep,
+    Plan,
+    StringStep,
+    format_alignment,
+    get_plan,
+    moves_origin,
+    run_structs,
+)
+from .encapsulation_kind import EncapsulationKind
+from .get_encapsulation_kind_info import get_encapsulation_kind_info
+from .reserved_pids import EXTENDED_PID, SENTINEL_PID
+from .schema import MessageSchema
+
+# Generated transcoders take ``(view, offset, origin, buffer, position, base)``,
+# where ``offset``/``origin`` locate the source and ``position``/``base`` the
+# target, and return the offset and position following the message.  Those
+# of types that can move the alignment origin (see
+# :func:`cdr._plan.moves_origin`) return the new origin and base as well.
+TranscodeFunction = Callable[
+    [memoryview, int, int, bytearray, int, int], Tuple[int, ...]
+]
+
+_UINT32_LE = struct.Struct("<I")
+_UINT32_BE = struct.Struct(">I")
+_UINT16_LE = struct.Struct("<H")
+_UINT16_BE = struct.Struct(">H")
+
+# Multiplier of the NEXTINT of each XCDR2 member header length code.
+_NEXTINT_SCALE = (1, 1, 1, 1, 1, 1, 4, 8)
+
+# Runs are converted as unsigned integers of the same size.
+_BIT_FORMATS = str.maketrans({"?": "B", "b": "B", "h": "H", "i": "I", "q": "Q"})
+_BIT_FORMATS.update(str.maketrans({"f": "I", "d": "Q"}))
+
+# ``array`` type code of each element size, for bulk byteswapping.
+_SWAP_CODES = {array(code).itemsize: code for code in "QLIH"}
+
+
+class MessageTranscoder:
+    """Convert CDR payloads of a single message type to another kind.
+
+    Payloads of any encapsulation kind are accepted.  XTypes member and
+    delimiter headers are converted to the other byte order along with the
+    members, but types with such headers cannot be converted between XCDR1
+    and XCDR2, whose headers differ.  Members missing from the schema are
+    copied when only the encapsulation kind changes and rejected when the
+    byte order does.
+    """
+
+    def __init__(
+        self,
+        schema: MessageSchema,
+        type_name: str | None = None,
+        *,
+        kind: EncapsulationKind = EncapsulationKind.CDR_LE,
+    ) -> None:
+        self._schema = schema
+        self._type_name = schema.root if type_name is None else type_name
+        self._kind = kind
+        info = get_encapsulation_kind_info(kind)
+        self._little_endian = info.little_endian
+        self._eight_byte_alignment = 4 if info.is_cdr2 else 8
+        # Validate the schema eagerly so that errors surface on construction.
+        get_plan(schema, self._type_name)
+        self._compiled: Dict[tuple[bool, int], TranscodeFunction] = {}
+
+    @property
+    def schema(self) -> MessageSchema:
+        return self._schema
+
+    @property
+    def type_name(self) -> str:
+        return self._type_name
+
+    @property
+    def kind(self) -> EncapsulationKind:
+        return self._kind
+
+    def transcode(self, data: bytes | bytearray | memoryview) -> bytearray:
+        """Return ``data`` converted to the transcoder's encapsulation kind.
+
+        Payloads that already use the target kind are copied as they are.
+
+        Raises
+        ------
+        ValueError
+            If the payload is too short for its message or the type cannot
+            be transcoded.
+        """
+
+        view = memoryview(data).cast("B")
+        if len(view) < 4:
+            raise ValueError(f"Invalid CDR data size {len(view)}, must be at least 4")
+        source = EncapsulationKind(view[1])
+        if source == self._kind:
+            return bytearray(view)
+
+        info = get_encapsulation_kind_info(source)
+        eight_byte_alignment = 4 if info.is_cdr2 else 8
+        function = self.function_for(info.little_endian, eight_byte_alignment)
+        size = len(view)
+        if eight_byte_alignment < self._eight_byte_alignment:
+            # Every 8-byte value gains at most 4 bytes of padding.
+            size += size // 2 + 8
+        buffer = bytearray(size)
+        buffer[1] = self._kind.value
+        truncated = f"{self._type_name} payload of {len(view)} bytes is truncated"
+        try:
+            offset, position = function(view, 4, 4, buffer, 4, 4)[:2]
+        except (struct.error, IndexError) as error:
+            raise ValueError(truncated) from error
+        # Slices past the end are short rather than raising.
+        if offset > len(view):
+            raise ValueError(truncated)
+        del buffer[position:]
+        return buffer
+
+    def function_for(
+        self, little_endian: bool, eight_byte_alignment: int
+    ) -> TranscodeFunction:
+        """Return the compiled function converting from a source layout."""
+
+        key = (little_endian, eight_byte_alignment)
+        function = self._compiled.get(key)
+        if function is None:
+            function = _Compiler(
+                self._schema,
+                (little_endian, eight_byte_alignment),
+                (self._little_endian, self._eight_byte_alignment),
+            ).get(self._type_name)
+            self._compiled[key] = function
+        return function
+
+
+# ----------------------------------------------------------------------
+# Code generation
+# ----------------------------------------------------------------------
+class _Compiler:
+    """Generate transcoding functions between two stream layouts."""
+
+    def __init__(
+        self,
+        schema: MessageSchema,
+        source: tuple[bool, int],
+        target: tuple[bool, int],
+    ) -> None:
+        self._schema = schema
+        self._source = source
+        self._target = target
+        self._swap = source[0] != target[0]
+        self._functions: Dict[str, TranscodeFunction] = {}
+
+    def get(self, type_name: str) -> TranscodeFunction:
+        function = self._functions.get(type_name)
+        if function is None:
+            function = self._compile(type_name)
+            self._functions[type_name] = function
+        return function
+
+    def _compile(self, type_name: str) -> TranscodeFunction:
+        plan = get_plan(self._schema, type_name)
+        if self._source[1] != self._target[1]:
+            for _, eight_byte_alignment in (self._source, self._target):
+                if not plan.is_plain(eight_byte_alignment == 4):
+                    raise ValueError(
+                        f"{type_name} is encoded with XTypes headers, which "
+                        "differ between XCDR1 and XCDR2"
+                    )
+
+        namespace: Dict[str, Any] = {
+            "_u32": (_UINT32_LE if self._source[0] else _UINT32_BE).unpack_from,
+            "_u16": (_UINT16_LE if self._source[0] else _UINT16_BE).unpack_from,
+            "_pack_u32": (_UINT32_LE if self._target[0] else _UINT32_BE).pack_into,
+            "_pack_u16": (_UINT16_LE if self._target[0] else _UINT16_BE).pack_into,
+            "_swapped": _swapped,
+            "_unknown_member": partial(_unknown_member, type_name),
+            "_NEXTINT_SCALE": _NEXTINT_SCALE,
+        }
+        cdr2 = self._source[1] == 4
+        lines = ["def transcode(view, offset, origin, buffer, position, base):"]
+        if cdr2 and plan.delimited:
+            lines += _copy_u32("end") + ["    end += offset"]
+        if plan.extensibility == "mutable":
+            lines += self._mutable_code(plan, namespace, cdr2)
+        else:
+            for index, step in enumerate(plan.steps):
+                lines += self._step_code(index, step, namespace)
+        if cdr2 and plan.delimited:
+            # Members appended by newer versions of appendable types.
+            lines += ["    if offset < end:"] + self._unknown_code("end", "        ")
+            lines += ["        position += end - offset", "        offset = end"]
+        if moves_origin(self._schema, type_name, self._source[1]):
+            lines.append("    return offset, position, origin, base")
+        else:
+            lines.append("    return offset, position")
+
+        source = "\n".join(lines)
+        exec(compile(source, f"<transcoder {type_name}>", "exec"), namespace)
+        return namespace["transcode"]
+
+    def _step_code(self, index: int, step: Any, namespace: Dict[str, Any]) -> list[str]:
+        """Return the code converting one step of a plan."""
+
+        if isinstance(step, MemberStep):
+            return self._optional_code(index, step, namespace)
+        lines = []
+        if getattr(step, "delimited", False) and self._source[1] == 4:
+            # The size of a collection does not change with the byte order.
+            lines += _copy_u32("d")
+        if isinstance(step, FixedRun):
+            lines += self._run_code(index, step, namespace)
+        elif isinstance(step, StringStep):
+            if step.is_array:
+                lines += _count_code(step.count) + ["    for _ in range(n):"]
+                lines += ["    " + line for line in _copy_u32("c") + _bytes_code()]
+            else:
+                lines += _copy_u32("c") + _bytes_code()
+        elif isinstance(step, ArrayStep):
+            lines += self._array_code(step)
+        else:
+            namespace[f"_m{index}"] = self.get(step.type)
+            lines += _nested_code(
+                step,
+                f"_m{index}",
+                moves_origin(self._schema, step.type, self._source[1]),
+            )
+        return lines
+
+    def _optional_code(
+        self, index: int, step: MemberStep, namespace: Dict[str, Any]
+    ) -> list[str]:
+        """Return the code converting an optional member of a final or
+        appendable type, along with its presence flag or parameter header.
+        """
+
+        member = _indent(self._step_code(index, step.step, namespace))
+        if self._source[1] == 4:
+            return [
+                "    present = view[offset]",
+                "    buffer[position] = present",
+                "    offset += 1",
+                "    position += 1",
+                "    if present:",
+            ] + member
+        return (
+            _parameter_header_code()
+            + [
+                "    origin, base = offset, position",
+                "    if size:",
+                "        member_end = offset + size",
+            ]
+            + member
+            + [
+                "        position += member_end - offset",
+                "        offset = member_end",
+            ]
+        )
+
+    def _mutable_code(
+        self, plan: Plan, namespace: Dict[str, Any], cdr2: bool
+    ) -> list[str]:
+        """Return the loop converting the members of a mutable type and their
+        member headers, which keep their sizes in the same layout.
+        """
+
+        if cdr2:
+            lines = [
+                "    while offset < end:",
+                "        offset += -(offset - origin) % 4",
+                "        position += -(position - base) % 4",
+                "        header = _u32(view, offset)[0]",
+                "        _pack_u32(buffer, position, header)",
+                "        offset += 4",
+                "        position += 4",
+                "        code = header >> 28 & 7",
+                "        if code < 4:",
+                "            size = 1 << code",
+                "        else:",
+                "            nextint = _u32(view, offset)[0]",
+                "            _pack_u32(buffer, position, nextint)",
+                "            size = _NEXTINT_SCALE[code] * nextint",
+                "            offset += 4",
+                "            position += 4",
+                "        member_id = header & 0x0FFFFFFF",
+            ]
+        else:
+            lines = (
+                ["    while True:"]
+                + _indent(_parameter_header_code())
+                + [
+                    f"        if member_id == {SENTINEL_PID:#x}:",
+                    "            break",
+                    "        origin, base = offset, position",
+                ]
+            )
+        lines.append("        member_end = offset + size")
+        keyword = "if"
+        for index, step in enumerate(plan.steps):
+            lines.append(f"        {keyword} member_id == {step.member_id}:")
+            lines += _indent(_indent(self._step_code(index, step.step, namespace)))
+            keyword = "elif"
+        if plan.steps:
+            lines.append("        else:")
+            lines += self._unknown_code("member_end", "            ")
+        else:
+            lines += self._unknown_code("member_end", "        ")
+        lines += [
+            "        position += member_end - offset",
+            "        offset = member_end",
+        ]
+        return lines
+
+    def _unknown_code(self, end: str, indent: str) -> list[str]:
+        """Return the code handling members missing from the schema up to
+        ``end``, which can only be copied when the byte order is unchanged.
+        """
+
+        if self._swap:
+            member_id = "member_id" if end == "member_end" else "None"
+            return [f"{indent}raise _unknown_member({member_id})"]
+        return [
+            f"{indent}buffer[position:position + {end} - offset] = view[offset:{end}]"
+        ]
+
+    def _run_code(
+        self, index: int, step: FixedRun, namespace: Dict[str, Any]
+    ) -> list[str]:
+        formats = step.formats.translate(_BIT_FORMATS)
+        source = run_structs(formats, *self._source)
+        target = run_structs(formats, *self._target)
+        namespace[f"_r{index}"] = source
+        namespace[f"_t{index}"] = target
+        return [
+            f"    s = _r{index}[(offset - origin) % {len(source)}]",
+            f"    t = _t{index}[(position - base) % {len(target)}]",
+            "    t.pack_into(buffer, position, *s.unpack_from(view, offset))",
+            "    offset += s.size",
+            "    position += t.size",
+        ]
+
+    def _array_code(self, step: ArrayStep) -> list[str]:
+        char = PRIMITIVE_FORMATS[step.type]
+        itemsize = FORMAT_SIZES[char]
+        data = "view[offset:stop]"
+        if self._swap and itemsize > 1:
+            data = f"_swapped({data}, {itemsize})"
+        return _count_code(step.count) + [
+            "    if n:",
+            "        offset += -(offset - origin) % "
+            f"{format_alignment(char, self._source[1])}",
+            "        position += -(position - base) % "
+            f"{format_alignment(char, self._target[1])}",
+            f"        stop = offset + n * {itemsize}",
+            f"        buffer[position:position + n * {itemsize}] = {data}",
+            "        offset = stop",
+            f"        position += n * {itemsize}",
+        ]
+
+
+def _count_code(count: int | None) -> list[str]:
+    """Copy a sequence length into ``n``, or set it to the array length."""
+
+    if count is not None:
+        return [f"    n = {count}"]
+    return _copy_u32("n")
+
+
+def _copy_u32(local: str) -> list[str]:
+    """Copy an aligned ``uint32`` such as a length or DHEADER into ``local``."""
+
+    return [
+        "    offset += -(offset - origin) % 4",
+        f"    {local} = _u32(view, offset)[0]",
+        "    offset += 4",
+        "    position += -(position - base) % 4",
+        f"    _pack_u32(buffer, position, {local})",
+        "    position += 4",
+    ]
+
+
+def _bytes_code() -> list[str]:
+    # String lengths include the null terminator, which is copied as well.
+    return [
+        "    buffer[position:position + c] = view[offset:offset + c]",
+        "    offset += c",
+        "    position += c",
+    ]
+
+
+def _parameter_header_code() -> list[str]:
+    """Copy an XCDR1 parameter header, reading ``member_id`` and ``size``."""
+
+    return [
+        "    offset += -(offset - origin) % 4",
+        "    position += -(position - base) % 4",
+        "    header = _u16(view, offset)[0]",
+        "    _pack_u16(buffer, position, header)",
+        "    member_id = header & 0x3FFF",
+        f"    if member_id == {EXTENDED_PID:#x}:",
+        "        _pack_u16(buffer, position + 2, _u16(view, offset + 2)[0])",
+        "        member_id = _u32(view, offset + 4)[0]",
+        "        size = _u32(view, offset + 8)[0]",
+        "        _pack_u32(buffer, position + 4, member_id)",
+        "        _pack_u32(buffer, position + 8, size)",
+        "        offset += 12",
+        "        position += 12",
+        "    else:",
+        "        size = _u16(view, offset + 2)[0]",
+        "        _pack_u16(buffer, position + 2, size)",
+        "        offset += 4",
+        "        position += 4",
+    ]
+
+
+def _indent(lines: list[str]) -> list[str]:
+    return ["    " + line for line in lines]
+
+
+def _nested_code(step: MessageStep, function_name: str, moving: bool) -> list[str]:
+    arguments = "view, offset, origin, buffer, position, base"
+    result = "offset, position, origin, base" if moving else "offset, position"
+    call = f"{result} = {function_name}({arguments})"
+    if not step.is_array:
+        return [f"    {call}"]
+    return _count_code(step.count) + ["    for _ in range(n):", f"        {call}"]
+
+
+# ----------------------------------------------------------------------
+# Runtime helpers used by the generated code
+# ----------------------------------------------------------------------
+def _unknown_member(type_name: str, member_id: int | None) -> ValueError:
+    if member_id is None:
+        return ValueError(
+            f"Cannot change the byte order of members appended to {type_name}"
+        )
+    return ValueError(
+        f"Cannot change the byte order of unknown member {member_id} of {type_name}"
+    )
+
+
+def _swapped(data: memoryview, itemsize: int) -> array:
+    """Return the elements of ``data`` in the opposite byte order."""
+
+    values = array(_SWAP_CODES[itemsize])
+    values.frombytes(data)
+    values.byteswap()
+    return values
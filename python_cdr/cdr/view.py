@@ -0,0 +1,619 @@
+"""Lazy, schema-aware views over CDR encoded messages.
+
+A :class:`MessageView` behaves like the dictionary returned by
+:class:`~cdr.decoder.MessageDecoder` but decodes a field only when it is
+accessed.  Fields inside a run of fixed-size fields (see :mod:`cdr._plan`)
+are located directly from the run's precomputed member offsets.  The start
+of every later step is found by skipping over the preceding variable-size
+steps without materialising them, and the offsets found this way are
+memoised, so reading ``header.stamp`` out of a large point cloud costs only
+a handful of ``unpack_from`` calls.
+"""
+
+from __future__ import annotations
+
+import struct
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator
+from weakref import WeakKeyDictionary
+
+from ._plan import (
+    FORMAT_SIZES,
+    PRIMITIVE_FORMATS,
+    PRIMITIVE_METHODS,
+    ArrayStep,
+    FixedRun,
+    MemberStep,
+    MessageStep,
+    ShapeEntry,
+    StringStep,
+    format_alignment,
+    get_plan,
+    moves_origin,
+    run_offsets,
+    run_structs,
+)
+from .decoder import DecodeFunction, MessageDecoder
+from .reader import CdrReader
+from .reserved_pids import EXTENDED_PID, SENTINEL_PID
+from .schema import MessageSchema
+
+
+class MessageView(Mapping):
+    """A read-only mapping decoding the fields of one message on access.
+
+    Parameters
+    ----------
+    data:
+        A complete payload including its encapsulation header, or a
+        :class:`CdrReader` positioned at the start of the message.  A reader
+        is cloned, so reading fields later never moves the caller's reader;
+        use :attr:`end` to advance past the message.
+    schema:
+        The schema describing the message.
+    type_name:
+        Type of the message, defaulting to the schema root.
+
+    Field values are identical to the ones :class:`MessageDecoder` produces,
+    except that nested messages – including elements of message arrays – are
+    returned as further views.  Decoded values are cached, and views compare
+    equal to the corresponding decoded dictionaries.
+    """
+
+    __slots__ = ("_layout", "_reader", "_view", "_origin", "_offsets", "_values")
+
+    def __init__(
+        self,
+        data: bytes | bytearray | memoryview | CdrReader,
+        schema: MessageSchema,
+        type_name: str | None = None,
+    ) -> None:
+        reader = data.clone() if isinstance(data, CdrReader) else CdrReader(data)
+        layout = _get_layout(
+            schema,
+            schema.root if type_name is None else type_name,
+            reader.little_endian,
+            reader.eight_byte_alignment,
+        )
+        _check_plain(layout)
+        self._init(layout, reader, reader.offset)
+
+    def _init(self, layout: _Layout, reader: CdrReader, offset: int) -> None:
+        self._layout = layout
+        self._reader = reader
+        self._view = reader._view
+        self._origin = reader.origin
+        # Start offset of each plan step, extended as the message is scanned.
+        self._offsets = [offset]
+        self._values: Dict[str, Any] = {}
+
+    @classmethod
+    def _child(cls, layout: _Layout, reader: CdrReader, offset: int) -> MessageView:
+        _check_plain(layout)
+        view = cls.__new__(cls)
+        view._init(layout, reader, offset)
+        return view
+
+    @property
+    def type_name(self) -> str:
+        return self._layout.type_name
+
+    @property
+    def offset(self) -> int:
+        """Offset of the start of the message in the payload."""
+
+        return self._offsets[0]
+
+    @property
+    def end(self) -> int:
+        """Offset following the message, found by skipping all its fields."""
+
+        return self._step_offset(len(self._layout.steps))
+
+    def __getitem__(self, name: str) -> Any:
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        field = self._layout.fields.get(name)
+        if field is None:
+            raise KeyError(name)
+        value = self._values[name] = self._materialise(*field)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._layout.names)
+
+    def __len__(self) -> int:
+        return len(self._layout.names)
+
+    def __repr__(self) -> str:
+        return f"<MessageView {self.type_name} at offset {self.offset}>"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Decode the whole message with the compiled decoder."""
+
+        message, end = self._layout.decode_function()(
+            self._reader, self._view, self.offset, self._origin
+        )
+        self._record_end(end)
+        return message
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _step_offset(self, index: int) -> int:
+        offsets = self._offsets
+        layout = self._layout
+        while len(offsets) <= index:
+            offsets.append(
+                layout.skip_step(
+                    len(offsets) - 1, self._view, offsets[-1], self._origin
+                )
+            )
+        return offsets[index]
+
+    def _record_end(self, end: int) -> None:
+        if len(self._offsets) == len(self._layout.steps):
+            self._offsets.append(end)
+
+    def _materialise(self, index: int, entry: Any, position: int) -> Any:
+        layout = self._layout
+        step = layout.steps[index]
+        offset = self._step_offset(index)
+
+        if isinstance(step, FixedRun):
+            return self._run_member(index, step, entry, position, offset)
+
+        reader = self._reader
+        if isinstance(step, MessageStep):
+            nested = layout.nested(step.type)
+            if not step.is_array:
+                return self._child(nested, reader, offset)
+            if step.count is None:
+                offset += -(offset - self._origin) % 4
+                count = layout.uint32.unpack_from(self._view, offset)[0]
+                offset += 4
+            else:
+                count = step.count
+            items = []
+            for _ in range(count):
+                items.append(self._child(nested, reader, offset))
+                offset = nested.skip(self._view, offset, self._origin)
+            if len(self._offsets) == index + 1:
+                self._offsets.append(offset)
+            return items
+
+        reader.offset = offset
+        if isinstance(step, StringStep):
+            value: Any = (
+                reader.string_array(step.count) if step.is_array else reader.string()
+            )
+        else:
+            method = getattr(reader, f"{PRIMITIVE_METHODS[step.type]}_array")
+            value = method(step.count)
+            if step.type == "bool":
+                value = [bool(b) for b in value]
+        if len(self._offsets) == index + 1:
+            self._offsets.append(reader.offset)
+        return value
+
+    def _run_member(
+        self, index: int, run: FixedRun, entry: ShapeEntry, position: int, offset: int
+    ) -> Any:
+        layout = self._layout
+        structs = layout.structs[index]
+        offsets = run_offsets(
+            run.formats,
+            (offset - self._origin) % len(structs),
+            layout.eight_byte_alignment,
+        )
+        if entry.shape is None:
+            member = _member_struct(layout.prefix, run.formats[position], entry.count)
+            values = member.unpack_from(self._view, offset + offsets[position])
+            return values[0] if entry.count is None else list(values)
+
+        nested = layout.nested(layout.field_types[entry.name])
+        if entry.count is None:
+            return self._child(nested, self._reader, offset + offsets[position])
+        width = _width(entry) // entry.count
+        return [
+            self._child(nested, self._reader, offset + offsets[position + i * width])
+            for i in range(entry.count)
+        ]
+
+
+def _check_plain(layout: _Layout) -> None:
+    if not layout.plain:
+        raise ValueError(
+            f"{layout.type_name} is encoded with XTypes headers, which views do "
+            "not support"
+        )
+
+
+class _Layout:
+    """Per-type data shared by all views of one schema and stream layout."""
+
+    def __init__(
+        self,
+        schema: MessageSchema,
+        type_name: str,
+        little_endian: bool,
+        eight_byte_alignment: int,
+    ) -> None:
+        self.schema = schema
+        self.type_name = type_name
+        self.little_endian = little_endian
+        self.eight_byte_alignment = eight_byte_alignment
+        self.prefix = "<" if little_endian else ">"
+        self.uint32 = struct.Struct(self.prefix + "I")
+        self.uint16 = struct.Struct(self.prefix + "H")
+        plan = get_plan(schema, type_name)
+        cdr2 = eight_byte_alignment == 4
+        # Views only support plain messages; the others can still be skipped.
+        self.plain = plan.is_plain(cdr2)
+        self.delimited = cdr2 and plan.delimited
+        self.parameter_list = not cdr2 and plan.extensibility == "mutable"
+        self.moves_origin = moves_origin(schema, type_name, eight_byte_alignment)
+        self.steps = plan.steps
+        self.field_types = {
+            field.name: field.type for field in schema[type_name].fields
+        }
+        self.structs: Dict[int, tuple[struct.Struct, ...]] = {}
+        # Field name -> (step index, shape entry or step, position in the run).
+        self.fields: Dict[str, tuple[int, Any, int]] = {}
+        for index, step in enumerate(self.steps):
+            if isinstance(step, MemberStep) and isinstance(step.step, FixedRun):
+                self.structs[index] = run_structs(
+                    step.step.formats, little_endian, eight_byte_alignment
+                )
+            if isinstance(step, FixedRun):
+                self.structs[index] = run_structs(
+                    step.formats, little_endian, eight_byte_alignment
+                )
+                position = 0
+                for entry in step.shape:
+                    self.fields[entry.name] = (index, entry, position)
+                    position += _width(entry)
+            else:
+                self.fields[step.name] = (index, step, 0)
+        self.names = tuple(self.fields)
+        self._decode: DecodeFunction | None = None
+        self._nested: Dict[str, _Layout] = {}
+        self._skippers: tuple[_Skipper, ...] | None = None
+        self._origin_skippers: tuple[_OriginSkipper, ...] | None = None
+        self._parameter_list_skipper: _OriginSkipper | None = None
+
+    def nested(self, type_name: str) -> _Layout:
+        layout = self._nested.get(type_name)
+        if layout is None:
+            layout = self._nested[type_name] = _get_layout(
+                self.schema, type_name, self.little_endian, self.eight_byte_alignment
+            )
+        return layout
+
+    def decode_function(self) -> DecodeFunction:
+        if self._decode is None:
+            self._decode = MessageDecoder(self.schema, self.type_name).function_for(
+                self.little_endian, self.eight_byte_alignment
+            )
+        return self._decode
+
+    def skip(self, view: memoryview, offset: int, origin: int) -> int:
+        """Return the offset following a message starting at ``offset``."""
+
+        if self.delimited:
+            offset += -(offset - origin) % 4
+            return offset + 4 + self.uint32.unpack_from(view, offset)[0]
+        if self.parameter_list or self.moves_origin:
+            return self.skip_with_origin(view, offset, origin)[0]
+        for skip_step in self.skippers():
+            offset = skip_step(view, offset, origin)
+        return offset
+
+    def skip_with_origin(
+        self, view: memoryview, offset: int, origin: int
+    ) -> tuple[int, int]:
+        """Return the offset following a message and the alignment origin
+        there, which XCDR1 parameter headers move.
+
+        XCDR1 mutable messages are skipped by the sizes in their parameter
+        headers, walking only the members that move the origin further.
+        """
+
+        if self.parameter_list:
+            return self._skip_parameter_list(view, offset, origin)
+        if not self.moves_origin:
+            return self.skip(view, offset, origin), origin
+        if self._origin_skippers is None:
+            self._origin_skippers = tuple(
+                self._origin_skipper(index, step)
+                for index, step in enumerate(self.steps)
+            )
+        for skip_step in self._origin_skippers:
+            offset, origin = skip_step(view, offset, origin)
+        return offset, origin
+
+    def skip_step(self, index: int, view: memoryview, offset: int, origin: int) -> int:
+        """Return the offset following step ``index`` starting at ``offset``."""
+
+        return self.skippers()[index](view, offset, origin)
+
+    def skippers(self) -> tuple[_Skipper, ...]:
+        """Return one function per step returning the offset following it."""
+
+        if self._skippers is None:
+            self._skippers = tuple(
+                self._skipper(index, step) for index, step in enumerate(self.steps)
+            )
+        return self._skippers
+
+    @property
+    def string_count(self) -> int | None:
+        """Number of strings when the message is nothing but single strings.
+
+        Arrays of such messages, e.g. ``diagnostic_msgs/KeyValue[]``, are
+        skipped as one run of strings.
+        """
+
+        if self.plain and all(
+            isinstance(s, StringStep) and not s.is_array for s in self.steps
+        ):
+            return len(self.steps)
+        return None
+
+    def _skipper(self, index: int, step: Any) -> _Skipper:
+        unpack_from = self.uint32.unpack_from
+        if isinstance(step, MemberStep):
+            # XCDR1 parameter headers move the origin; see _origin_skipper.
+            return _optional_skipper(self._skipper(index, step.step))
+        if getattr(step, "delimited", False) and self.eight_byte_alignment == 4:
+            return _delimited_skipper(unpack_from)
+        if isinstance(step, FixedRun):
+            sizes = tuple(s.size for s in self.structs[index])
+            phases = len(sizes)
+            return (
+                lambda view, offset, origin: offset + sizes[(offset - origin) % phases]
+            )
+
+        if isinstance(step, ArrayStep):
+            char = PRIMITIVE_FORMATS[step.type]
+            return _array_skipper(
+                unpack_from,
+                FORMAT_SIZES[char],
+                format_alignment(char, self.eight_byte_alignment),
+                step.count,
+            )
+
+        if isinstance(step, StringStep):
+            if not step.is_array:
+                return _strings_skipper(unpack_from, 1, 1)
+            return _strings_skipper(unpack_from, 1, step.count)
+
+        nested = self.nested(step.type)
+        strings = nested.string_count
+        if not step.is_array:
+            if strings is not None:
+                return _strings_skipper(unpack_from, strings, 1)
+            return nested.skip
+        if strings is not None:
+            return _strings_skipper(unpack_from, strings, step.count)
+        return _messages_skipper(unpack_from, nested.skip, step.count)
+
+    def _origin_skipper(self, index: int, step: Any) -> _OriginSkipper:
+        """Return a function returning the offset and origin following a step
+        of an XCDR1 message that moves the origin."""
+
+        if isinstance(step, MemberStep):
+            return _parameter_skipper(
+                self.uint16.unpack_from,
+                self.uint32.unpack_from,
+                {step.member_id: self._moving_skipper(step.step)},
+                sentinel=False,
+            )
+        moving = self._moving_skipper(step)
+        if moving is not None:
+            return moving
+        skip_step = self._skipper(index, step)
+        return lambda view, offset, origin: (skip_step(view, offset, origin), origin)
+
+    def _moving_skipper(self, step: Any) -> _OriginSkipper | None:
+        """Return the skipper of a step of messages that move the origin."""
+
+        if not isinstance(step, MessageStep):
+            return None
+        nested = self.nested(step.type)
+        if not nested.moves_origin:
+            return None
+        if not step.is_array:
+            return nested.skip_with_origin
+        return _moving_messages_skipper(
+            self.uint32.unpack_from, nested.skip_with_origin, step.count
+        )
+
+    def _skip_parameter_list(
+        self, view: memoryview, offset: int, origin: int
+    ) -> tuple[int, int]:
+        if self._parameter_list_skipper is None:
+            self._parameter_list_skipper = _parameter_skipper(
+                self.uint16.unpack_from,
+                self.uint32.unpack_from,
+                {
+                    step.member_id: self._moving_skipper(step.step)
+                    for step in self.steps
+                },
+                sentinel=True,
+            )
+        return self._parameter_list_skipper(view, offset, origin)
+
+
+_Skipper = Callable[[memoryview, int, int], int]
+_OriginSkipper = Callable[[memoryview, int, int], tuple[int, int]]
+_Unpack = Callable[[memoryview, int], tuple[int]]
+
+
+def _strings_skipper(
+    unpack_from: _Unpack, per_element: int, count: int | None
+) -> _Skipper:
+    """Skip ``count`` elements of ``per_element`` strings, or a sequence."""
+
+    def skip(view: memoryview, offset: int, origin: int) -> int:
+        if count is None:
+            offset += -(offset - origin) % 4
+            strings = per_element * unpack_from(view, offset)[0]
+            offset += 4
+        else:
+            strings = per_element * count
+        for _ in range(strings):
+            offset += -(offset - origin) % 4
+            offset += 4 + unpack_from(view, offset)[0]
+        return offset
+
+    return skip
+
+
+def _array_skipper(
+    unpack_from: _Unpack, size: int, alignment: int, count: int | None
+) -> _Skipper:
+    def skip(view: memoryview, offset: int, origin: int) -> int:
+        if count is None:
+            offset += -(offset - origin) % 4
+            length = unpack_from(view, offset)[0]
+            offset += 4
+        else:
+            length = count
+        if length:
+            offset += -(offset - origin) % alignment
+            offset += length * size
+        return offset
+
+    return skip
+
+
+def _messages_skipper(
+    unpack_from: _Unpack, skip_message: _Skipper, count: int | None
+) -> _Skipper:
+    def skip(view: memoryview, offset: int, origin: int) -> int:
+        if count is None:
+            offset += -(offset - origin) % 4
+            length = unpack_from(view, offset)[0]
+            offset += 4
+        else:
+            length = count
+        for _ in range(length):
+            offset = skip_message(view, offset, origin)
+        return offset
+
+    return skip
+
+
+def _delimited_skipper(unpack_from: _Unpack) -> _Skipper:
+    """Skip a value preceded by a DHEADER holding its size."""
+
+    def skip(view: memoryview, offset: int, origin: int) -> int:
+        offset += -(offset - origin) % 4
+        return offset + 4 + unpack_from(view, offset)[0]
+
+    return skip
+
+
+def _parameter_skipper(
+    unpack_u16: _Unpack,
+    unpack_u32: _Unpack,
+    members: Dict[int, _OriginSkipper | None],
+    sentinel: bool,
+) -> _OriginSkipper:
+    """Skip XCDR1 parameters by their sizes, up to a sentinel or just one.
+
+    Each parameter moves the origin to the start of its member.  Members in
+    ``members`` with a skipper move it further and are walked to find where.
+    """
+
+    def skip(view: memoryview, offset: int, origin: int) -> tuple[int, int]:
+        while True:
+            offset += -(offset - origin) % 4
+            header = unpack_u16(view, offset)[0] & 0x3FFF
+            if sentinel and header == SENTINEL_PID:
+                return offset + 4, origin
+            if header == EXTENDED_PID:
+                member_id = unpack_u32(view, offset + 4)[0]
+                size = unpack_u32(view, offset + 8)[0]
+                offset += 12
+            else:
+                member_id = header
+                size = unpack_u16(view, offset + 2)[0]
+                offset += 4
+            skip_member = members.get(member_id)
+            if size and skip_member is not None:
+                origin = skip_member(view, offset, offset)[1]
+            else:
+                origin = offset
+            offset += size
+            if not sentinel:
+                return offset, origin
+
+    return skip
+
+
+def _moving_messages_skipper(
+    unpack_from: _Unpack, skip_message: _OriginSkipper, count: int | None
+) -> _OriginSkipper:
+    def skip(view: memoryview, offset: int, origin: int) -> tuple[int, int]:
+        if count is None:
+            offset += -(offset - origin) % 4
+            length = unpack_from(view, offset)[0]
+            offset += 4
+        else:
+            length = count
+        for _ in range(length):
+            offset, origin = skip_message(view, offset, origin)
+        return offset, origin
+
+    return skip
+
+
+def _optional_skipper(skip_member: _Skipper) -> _Skipper:
+    """Skip an XCDR2 presence flag and the member if it is present."""
+
+    def skip(view: memoryview, offset: int, origin: int) -> int:
+        if view[offset]:
+            return skip_member(view, offset + 1, origin)
+        return offset + 1
+
+    return skip
+
+
+_LAYOUTS: WeakKeyDictionary[MessageSchema, Dict[tuple[str, bool, int], _Layout]] = (
+    WeakKeyDictionary()
+)
+
+
+def _get_layout(
+    schema: MessageSchema,
+    type_name: str,
+    little_endian: bool,
+    eight_byte_alignment: int,
+) -> _Layout:
+    layouts = _LAYOUTS.get(schema)
+    if layouts is None:
+        layouts = _LAYOUTS[schema] = {}
+    key = (type_name, little_endian, eight_byte_alignment)
+    layout = layouts.get(key)
+    if layout is None:
+        layout = layouts[key] = _Layout(
+            schema, type_name, little_endian, eight_byte_alignment
+        )
+    return layout
+
+
+def _width(entry: ShapeEntry) -> int:
+    """Return the number of run members making up ``entry``."""
+
+    element = 1 if entry.shape is None else sum(_width(e) for e in entry.shape)
+    return element * (1 if entry.count is None else entry.count)
+
+
+@lru_cache(maxsize=None)
+def _member_struct(prefix: str, char: str, count: int | None) -> struct.Struct:
+    return struct.Struct(f"{prefix}{'' if count is None else count}{char}")
@@ -2,14 +2,15 @@
 
 This module ports the TypeScript ``CdrWriter`` to Python.  A mutable
 ``bytearray`` acts as the backing buffer and numerical values are written
-using :func:`struct.pack_into`.  Only the parts of the original class used
-elsewhere in the project are implemented.
+with precompiled :class:`struct.Struct` objects.  Only the parts of the
+original class used elsewhere in the project are implemented.
 """
 
 from __future__ import annotations
 
 import struct
 from array import array as Array
+from dataclasses import dataclass
 from typing import Sequence, cast
 
 try:  # Python 3.12+
@@ -17,6 +18,8 @@ try:  # Python 3.12+
 except ImportError:  # Python <3.12
     from typing_extensions import Buffer
 
+from ._numpy import numpy_array_bytes
+from ._plan import run_structs
 from .encapsulation_kind import EncapsulationKind
 from .get_encapsulation_kind_info import get_encapsulation_kind_info
 from .is_big_endian import is_big_endian
@@ -27,9 +30,56 @@ from .length_codes import (
 )
 from .reserved_pids import EXTENDED_PID, SENTINEL_PID
 
+# Precompiled ``struct`` format objects, selected once per encapsulation kind
+# in the same way as in :mod:`cdr.reader`, so that the primitive writers
+# neither build nor parse format strings.
+_INT8 = struct.Struct("b")
+_UINT8 = struct.Struct("B")
+_INT16_LE = struct.Struct("<h")
+_INT16_BE = struct.Struct(">h")
+_UINT16_LE = struct.Struct("<H")
+_UINT16_BE = struct.Struct(">H")
+_INT32_LE = struct.Struct("<i")
+_INT32_BE = struct.Struct(">i")
+_UINT32_LE = struct.Struct("<I")
+_UINT32_BE = struct.Struct(">I")
+_INT64_LE = struct.Struct("<q")
+_INT64_BE = struct.Struct(">q")
+_UINT64_LE = struct.Struct("<Q")
+_UINT64_BE = struct.Struct(">Q")
+_FLOAT32_LE = struct.Struct("<f")
+_FLOAT32_BE = struct.Struct(">f")
+_FLOAT64_LE = struct.Struct("<d")
+_FLOAT64_BE = struct.Struct(">d")
+
+# Zero padding for every possible alignment gap, written with one slice
+# assignment, and a block of zeros used to grow the buffer without
+# allocating a temporary ``bytes`` object.
+_PADDING = tuple(bytes(n) for n in range(8))
+_ZEROS = memoryview(bytes(1 << 16))
+
+
+@dataclass
+class _PendingHeader:
+    """A header reserved by ``beginDHeader`` or ``beginEmHeader``."""
+
+    member: bool
+    # Buffer offset of the header, stream size after the header and number
+    # of referenced segments when the header was reserved.
+    position: int
+    start: int
+    segments: int
+
 
 class CdrWriter:
-    """Serialise primitive values into a CDR formatted byte stream."""
+    """Serialise primitive values into a CDR formatted byte stream.
+
+    The written data is available as a copy (:attr:`data`), as a zero-copy
+    view (:attr:`view`) or by taking over the buffer (:meth:`detach`).  When
+    ``segment_threshold`` is set, bulk-copyable arrays of at least that many
+    bytes are referenced instead of copied and the output is obtained as a
+    list of buffers from :meth:`segments`.
+    """
 
     DEFAULT_CAPACITY = 16
     _ITEMSIZE = {
@@ -49,6 +99,7 @@ class CdrWriter:
         buffer: bytearray | bytes | None = None,
         size: int | None = None,
         kind: EncapsulationKind = EncapsulationKind.CDR_LE,
+        segment_threshold: int | None = None,
     ) -> None:
         if buffer is not None:
             self._buffer = bytearray(buffer)
@@ -57,11 +108,43 @@ class CdrWriter:
         else:
             self._buffer = bytearray(self.DEFAULT_CAPACITY)
 
+        self._host_little_endian = not is_big_endian()
+        # Arrays of at least ``segment_threshold`` bytes are referenced as
+        # ``(buffer offset, view)`` segments instead of being copied.
+        self._segment_threshold = segment_threshold
+        self._start(kind)
+
+    def _start(self, kind: EncapsulationKind) -> None:
+        """Begin a new payload of ``kind`` at the start of the buffer."""
+
         info = get_encapsulation_kind_info(kind)
         self._little_endian = info.little_endian
-        self._host_little_endian = not is_big_endian()
         self._is_cdr2 = info.is_cdr2
         self._eight_byte_alignment = 4 if self._is_cdr2 else 8
+        if self._little_endian:
+            self._int16_struct = _INT16_LE
+            self._uint16_struct = _UINT16_LE
+            self._int32_struct = _INT32_LE
+            self._uint32_struct = _UINT32_LE
+            self._int64_struct = _INT64_LE
+            self._uint64_struct = _UINT64_LE
+            self._float32_struct = _FLOAT32_LE
+            self._float64_struct = _FLOAT64_LE
+            self._endian_prefix = "<"
+        else:
+            self._int16_struct = _INT16_BE
+            self._uint16_struct = _UINT16_BE
+            self._int32_struct = _INT32_BE
+            self._uint32_struct = _UINT32_BE
+            self._int64_struct = _INT64_BE
+            self._uint64_struct = _UINT64_BE
+            self._float32_struct = _FLOAT32_BE
+            self._float64_struct = _FLOAT64_BE
+            self._endian_prefix = ">"
+        self._segments: list[tuple[int, memoryview]] = []
+        self._segment_bytes = 0
+        # Headers reserved by beginDHeader/beginEmHeader awaiting their size.
+        self._pending: list[_PendingHeader] = []
 
         self._offset = 0
         self._origin = 0
@@ -70,7 +153,7 @@ class CdrWriter:
         self._resize_if_needed(4)
         self._buffer[0] = 0
         self._buffer[1] = kind.value
-        struct.pack_into(">H", self._buffer, 2, 0)
+        _UINT16_BE.pack_into(self._buffer, 2, 0)
         self._offset = 4
         self._origin = 4
 
@@ -79,15 +162,94 @@ class CdrWriter:
     # ------------------------------------------------------------------
     @property
     def data(self) -> bytes:
-        """Return the written portion of the buffer."""
+        """Return a copy of the written data."""
 
-        return bytes(self._buffer[: self._offset])
+        if self._segments:
+            return b"".join(self.segments())
+        return bytes(memoryview(self._buffer)[: self._offset])
+
+    @property
+    def view(self) -> memoryview:
+        """Return a zero-copy view of the written portion of the buffer.
+
+        The view must be released before writing further data, as the buffer
+        cannot be resized while it is exported.  Writers holding referenced
+        segments cannot be viewed as one buffer; use :meth:`segments`.
+        """
+
+        self._check_contiguous("view")
+        return memoryview(self._buffer)[: self._offset]
 
     @property
     def size(self) -> int:
         """Current size of the written data."""
 
-        return self._offset
+        return self._offset + self._segment_bytes
+
+    def segments(self) -> list[memoryview]:
+        """Return the written data as a list of buffers in stream order.
+
+        The result alternates between regions of the internal buffer and the
+        arrays referenced because of ``segment_threshold`` and can be passed
+        directly to :meth:`socket.socket.sendmsg` or :func:`os.writev`.
+        Referenced arrays must not be modified until the data has been sent.
+        """
+
+        buffer = memoryview(self._buffer)
+        result = []
+        start = 0
+        for position, segment in self._segments:
+            if position > start:
+                result.append(buffer[start:position])
+            result.append(segment)
+            start = position
+        if self._offset > start or not result:
+            result.append(buffer[start : self._offset])
+        return result
+
+    def detach(self) -> bytearray:
+        """Hand over the written data without copying it.
+
+        The internal ``bytearray`` is truncated to the written size and
+        returned.  The writer then starts a new payload of the same kind in a
+        fresh buffer.
+        """
+
+        self._check_contiguous("detach")
+        kind = self.kind
+        buffer = self._buffer
+        del buffer[self._offset :]
+        self._buffer = bytearray(self.DEFAULT_CAPACITY)
+        self._start(kind)
+        return buffer
+
+    def reset(self, kind: EncapsulationKind | None = None) -> CdrWriter:
+        """Discard the written data and start a new payload in the same buffer.
+
+        The grown buffer is kept, so writing a message of a similar size
+        again allocates nothing.  Only the encapsulation header is rewritten;
+        every later byte, including padding, is overwritten as the new
+        payload is written.  ``kind`` defaults to the current kind.
+        """
+
+        self._start(self.kind if kind is None else kind)
+        return self
+
+    @property
+    def capacity(self) -> int:
+        """Size of the allocated buffer."""
+
+        return len(self._buffer)
+
+    def reserve(self, additional: int) -> CdrWriter:
+        """Ensure room for ``additional`` more bytes with a single resize.
+
+        Use this with a size computed by :class:`CdrSizeCalculator` (or pass
+        ``size=`` to the constructor) to avoid repeated growth while writing.
+        """
+
+        self._resize(self._offset + additional)
+        return self
 
     @property
     def kind(self) -> EncapsulationKind:
@@ -100,82 +262,108 @@ class CdrWriter:
     # ------------------------------------------------------------------
     def int8(self, value: int) -> CdrWriter:
         self._resize_if_needed(1)
-        struct.pack_into("b", self._buffer, self._offset, value)
+        _INT8.pack_into(self._buffer, self._offset, value)
         self._offset += 1
         return self
 
     def uint8(self, value: int) -> CdrWriter:
         self._resize_if_needed(1)
-        struct.pack_into("B", self._buffer, self._offset, value)
+        _UINT8.pack_into(self._buffer, self._offset, value)
         self._offset += 1
         return self
 
     def int16(self, value: int) -> CdrWriter:
         self.align(2)
-        struct.pack_into(self._endian_fmt("h"), self._buffer, self._offset, value)
+        self._int16_struct.pack_into(self._buffer, self._offset, value)
         self._offset += 2
         return self
 
     def uint16(self, value: int) -> CdrWriter:
         self.align(2)
-        struct.pack_into(self._endian_fmt("H"), self._buffer, self._offset, value)
+        self._uint16_struct.pack_into(self._buffer, self._offset, value)
         self._offset += 2
         return self
 
     def int32(self, value: int) -> CdrWriter:
         self.align(4)
-        struct.pack_into(self._endian_fmt("i"), self._buffer, self._offset, value)
+        self._int32_struct.pack_into(self._buffer, self._offset, value)
         self._offset += 4
         return self
 
     def uint32(self, value: int) -> CdrWriter:
         self.align(4)
-        struct.pack_into(self._endian_fmt("I"), self._buffer, self._offset, value)
+        self._uint32_struct.pack_into(self._buffer, self._offset, value)
         self._offset += 4
         return self
 
     def int64(self, value: int) -> CdrWriter:
         self.align(self._eight_byte_alignment, 8)
-        struct.pack_into(self._endian_fmt("q"), self._buffer, self._offset, int(value))
+        self._int64_struct.pack_into(self._buffer, self._offset, int(value))
         self._offset += 8
         return self
 
     def uint64(self, value: int) -> CdrWriter:
         self.align(self._eight_byte_alignment, 8)
-        struct.pack_into(self._endian_fmt("Q"), self._buffer, self._offset, int(value))
+        self._uint64_struct.pack_into(self._buffer, self._offset, int(value))
         self._offset += 8
         return self
 
     def uint16BE(self, value: int) -> CdrWriter:
         self.align(2)
-        struct.pack_into(">H", self._buffer, self._offset, value)
+        _UINT16_BE.pack_into(self._buffer, self._offset, value)
         self._offset += 2
         return self
 
     def uint32BE(self, value: int) -> CdrWriter:
         self.align(4)
-        struct.pack_into(">I", self._buffer, self._offset, value)
+        _UINT32_BE.pack_into(self._buffer, self._offset, value)
         self._offset += 4
         return self
 
     def uint64BE(self, value: int) -> CdrWriter:
         self.align(self._eight_byte_alignment, 8)
-        struct.pack_into(">Q", self._buffer, self._offset, int(value))
+        _UINT64_BE.pack_into(self._buffer, self._offset, int(value))
         self._offset += 8
         return self
 
     def float32(self, value: float) -> CdrWriter:
         self.align(4)
-        struct.pack_into(self._endian_fmt("f"), self._buffer, self._offset, value)
+        self._float32_struct.pack_into(self._buffer, self._offset, value)
         self._offset += 4
         return self
 
     def float64(self, value: float) -> CdrWriter:
         self.align(self._eight_byte_alignment, 8)
-        struct.pack_into(self._endian_fmt("d"), self._buffer, self._offset, value)
+        self._float64_struct.pack_into(self._buffer, self._offset, value)
         self._offset += 8
         return self
 
+    def write_fields(self, formats: str, *values: int | float) -> CdrWriter:
+        """Write several primitives with a single ``pack_into`` call.
+
+        ``formats`` holds one :mod:`struct` character per value (``?bBhHiIqQfd``,
+        without byte order prefix), e.g. ``writer.write_fields("IId", a, b, c)``
+        writes two ``uint32`` and a ``float64``.  Each value is aligned as
+        the corresponding primitive writer would align it; the padding is
+        part of a precompiled struct for the current alignment phase.
+        """
+
+        try:
+            structs = run_structs(
+                formats, self._little_endian, self._eight_byte_alignment
+            )
+        except KeyError as error:
+            raise ValueError(
+                f"Unsupported format character {error.args[0]!r} in {formats!r}"
+            ) from None
+        packer = structs[(self._offset - self._origin) % len(structs)]
+        size = packer.size
+        if len(self._buffer) < self._offset + size:
+            self._resize_if_needed(size)
+        packer.pack_into(self._buffer, self._offset, *values)
+        self._offset += size
+        return self
+
     # ------------------------------------------------------------------
     # Helper writers
     # ------------------------------------------------------------------
@@ -189,6 +377,39 @@ class CdrWriter:
         self._offset += len(data) + 1
         return self
 
+    def stringArray(
+        self, value: Sequence[str], writeLength: bool | None = False
+    ) -> CdrWriter:
+        """Write a sequence of strings in one pass.
+
+        All strings are encoded first, so the buffer grows at most once.
+        """
+
+        encoded = [entry.encode("utf-8") for entry in value]
+        if writeLength:
+            self.sequenceLength(len(encoded))
+        # Each string adds at most three padding bytes, its length prefix
+        # and its terminator.
+        self._resize_if_needed(sum(map(len, encoded)) + 8 * len(encoded))
+        buffer = self._buffer
+        offset = self._offset
+        origin = self._origin
+        pack = self._uint32_struct.pack_into
+        for data in encoded:
+            padding = -(offset - origin) % 4
+            if padding:
+                buffer[offset : offset + padding] = _PADDING[padding]
+                offset += padding
+            size = len(data)
+            pack(buffer, offset, size + 1)
+            offset += 4
+            buffer[offset : offset + size] = data
+            offset += size
+            buffer[offset] = 0
+            offset += 1
+        self._offset = offset
+        return self
+
     def dHeader(self, objectSize: int) -> CdrWriter:
         """Write a delimiter header using ``objectSize``."""
 
@@ -212,6 +433,123 @@ class CdrWriter:
             self.uint16(0)
         return self
 
+    def beginDHeader(self) -> CdrWriter:
+        """Reserve a delimiter header to be filled in by :meth:`endDHeader`.
+
+        Write the delimited value after this call.  Begin/end pairs of
+        delimiter and member headers nest, so a nested appendable or mutable
+        value is written in a single pass without computing its size first.
+        """
+
+        self.uint32(0)
+        self._pending.append(
+            _PendingHeader(False, self._offset - 4, self.size, len(self._segments))
+        )
+        return self
+
+    def endDHeader(self) -> CdrWriter:
+        """Fill in the header reserved by the matching :meth:`beginDHeader`."""
+
+        pending = self._pop_pending(False)
+        self._uint32_struct.pack_into(
+            self._buffer, pending.position, self.size - pending.start
+        )
+        return self
+
+    def beginEmHeader(self, mustUnderstand: bool, id: int) -> CdrWriter:
+        """Reserve a member header to be filled in by :meth:`endEmHeader`.
+
+        Under XCDR2 an EMHEADER with a NEXTINT is reserved.  Under XCDR1 a
+        short parameter header is reserved for IDs up to ``0x3f00`` and an
+        extended one for larger IDs.
+        """
+
+        if self._is_cdr2:
+            if id > 0x0FFFFFFF:
+                raise ValueError(
+                    "Member ID %d is too large. Max value is %d" % (id, 0x0FFFFFFF)
+                )
+            self.align(4, 8)
+            position = self._offset
+            self._uint32_struct.pack_into(
+                self._buffer, position, ((1 << 31) if mustUnderstand else 0) | id
+            )
+            self._offset = position + 8
+        else:
+            self.align(4)
+            position = self._offset
+            must_flag = (1 << 14) if mustUnderstand else 0
+            if id > 0x3F00:
+                self.uint16(must_flag | EXTENDED_PID).uint16(8).uint32(id).uint32(0)
+            else:
+                self.uint16(must_flag | id).uint16(0)
+            self.reset_origin()
+        self._pending.append(
+            _PendingHeader(True, position, self.size, len(self._segments))
+        )
+        return self
+
+    def endEmHeader(self) -> CdrWriter:
+        """Fill in the header reserved by the matching :meth:`beginEmHeader`.
+
+        The length code is chosen as by :meth:`emHeader`: members of 1, 2, 4
+        or 8 bytes are moved back over the unused NEXTINT and get length codes
+        0-3, which keeps their alignment as XCDR2 aligns to at most 4 bytes.
+        Under XCDR1 a short header is widened to an extended one, moving the
+        member by 8 bytes, if the member exceeds 65535 bytes.
+        """
+
+        pending = self._pop_pending(True)
+        buffer = self._buffer
+        position = pending.position
+        object_size = self.size - pending.start
+        if self._is_cdr2:
+            header = self._uint32_struct.unpack_from(buffer, position)[0]
+            length_code = get_length_code_for_object_size(object_size)
+            if length_code < 4 and len(self._segments) == pending.segments:
+                body = position + 8
+                buffer[body - 4 : body - 4 + object_size] = buffer[
+                    body : body + object_size
+                ]
+                self._offset -= 4
+                self._uint32_struct.pack_into(
+                    buffer, position, header | (length_code << 28)
+                )
+            else:
+                self._uint32_struct.pack_into(buffer, position, header | (4 << 28))
+                self._uint32_struct.pack_into(buffer, position + 4, object_size)
+            return self
+
+        id_header = self._uint16_struct.unpack_from(buffer, position)[0]
+        if id_header & 0x3FFF == EXTENDED_PID:
+            self._uint32_struct.pack_into(buffer, position + 8, object_size)
+        elif object_size <= 0xFFFF:
+            self._uint16_struct.pack_into(buffer, position + 2, object_size)
+        else:
+            extended = bytearray(12)
+            self._uint16_struct.pack_into(
+                extended, 0, (id_header & 0x4000) | EXTENDED_PID
+            )
+            self._uint16_struct.pack_into(extended, 2, 8)
+            self._uint32_struct.pack_into(extended, 4, id_header & 0x3FFF)
+            self._uint32_struct.pack_into(extended, 8, object_size)
+            buffer[position : position + 4] = extended
+            # Everything after the header moved by 8 bytes, including the
+            # origin, which lies within the member since beginEmHeader.
+            self._offset += 8
+            self._origin += 8
+            self._segments = [
+                (at + 8 if at > position else at, segment)
+                for at, segment in self._segments
+            ]
+        return self
+
+    def _pop_pending(self, member: bool) -> _PendingHeader:
+        if not self._pending or self._pending[-1].member != member:
+            expected = "EmHeader" if member else "DHeader"
+            raise ValueError(f"end{expected}() without a matching begin{expected}()")
+        return self._pending.pop()
+
     def sequenceLength(self, value: int) -> CdrWriter:
         return self.uint32(value)
 
@@ -223,18 +561,14 @@ class CdrWriter:
         value: Sequence[int] | bytes | bytearray | Array,
         writeLength: bool | None = False,
     ) -> CdrWriter:
+        if self._try_write_numpy(value, "b", 1, writeLength):
+            return self
         if writeLength:
             self.sequenceLength(len(value))
         if isinstance(value, (bytes, bytearray)):
-            self._resize_if_needed(len(value))
-            self._buffer[self._offset : self._offset + len(value)] = memoryview(value)
-            self._offset += len(value)
+            self._write_block(value, 1)
         elif isinstance(value, Array) and value.typecode in ("b", "B"):
-            n = len(value)
-            self._resize_if_needed(n)
-            mv = memoryview(value).cast("B")
-            self._buffer[self._offset : self._offset + n] = mv
-            self._offset += n
+            self._write_block(memoryview(value).cast("B"), 1)
         else:
             for entry in value:
                 self.int8(entry)
@@ -245,18 +579,14 @@ class CdrWriter:
         value: Sequence[int] | bytes | bytearray | Array,
         writeLength: bool | None = False,
     ) -> CdrWriter:
+        if self._try_write_numpy(value, "B", 1, writeLength):
+            return self
         if writeLength:
             self.sequenceLength(len(value))
         if isinstance(value, (bytes, bytearray)):
-            self._resize_if_needed(len(value))
-            self._buffer[self._offset : self._offset + len(value)] = memoryview(value)
-            self._offset += len(value)
+            self._write_block(value, 1)
         elif isinstance(value, Array) and value.typecode in ("b", "B"):
-            n = len(value)
-            self._resize_if_needed(n)
-            mv = memoryview(value).cast("B")
-            self._buffer[self._offset : self._offset + n] = mv
-            self._offset += n
+            self._write_block(memoryview(value).cast("B"), 1)
         else:
             for entry in value:
                 self.uint8(entry)
@@ -270,13 +600,12 @@ class CdrWriter:
         if isinstance(value, (bytes, bytearray)):
             if writeLength:
                 self.sequenceLength(len(value) // 2)
-            self.align(2, len(value))
-            self._resize_if_needed(len(value))
-            self._buffer[self._offset : self._offset + len(value)] = memoryview(value)
-            self._offset += len(value)
+            self._write_block(value, 2)
             return self
         if self._try_write_contiguous(value, "h", 2, writeLength):
             return self
+        if self._try_write_numpy(value, "h", 2, writeLength):
+            return self
         if isinstance(value, Array) and value.typecode == "h":
             n = len(value)
             if writeLength:
@@ -284,7 +613,7 @@ class CdrWriter:
             self.align(2, n * 2)
             self._resize_if_needed(n * 2)
             struct.pack_into(
-                self._endian_fmt(f"{n}h"), self._buffer, self._offset, *value
+                f"{self._endian_prefix}{n}h", self._buffer, self._offset, *value
             )
             self._offset += n * 2
             return self
@@ -302,13 +631,12 @@ class CdrWriter:
         if isinstance(value, (bytes, bytearray)):
             if writeLength:
                 self.sequenceLength(len(value) // 2)
-            self.align(2, len(value))
-            self._resize_if_needed(len(value))
-            self._buffer[self._offset : self._offset + len(value)] = memoryview(value)
-            self._offset += len(value)
+            self._write_block(value, 2)
             return self
         if self._try_write_contiguous(value, "H", 2, writeLength):
             return self
+        if self._try_write_numpy(value, "H", 2, writeLength):
+            return self
         if isinstance(value, Array) and value.typecode == "H":
             n = len(value)
             if writeLength:
@@ -316,7 +644,7 @@ class CdrWriter:
             self.align(2, n * 2)
             self._resize_if_needed(n * 2)
             struct.pack_into(
-                self._endian_fmt(f"{n}H"), self._buffer, self._offset, *value
+                f"{self._endian_prefix}{n}H", self._buffer, self._offset, *value
             )
             self._offset += n * 2
             return self
@@ -334,13 +662,12 @@ class CdrWriter:
         if isinstance(value, (bytes, bytearray)):
             if writeLength:
                 self.sequenceLength(len(value) // 4)
-            self.align(4, len(value))
-            self._resize_if_needed(len(value))
-            self._buffer[self._offset : self._offset + len(value)] = memoryview(value)
-            self._offset += len(value)
+            self._write_block(value, 4)
             return self
         if self._try_write_contiguous(value, "i", 4, writeLength):
             return self
+        if self._try_write_numpy(value, "i", 4, writeLength):
+            return self
         if isinstance(value, Array) and value.typecode == "i":
             n = len(value)
             if writeLength:
@@ -348,7 +675,7 @@ class CdrWriter:
             self.align(4, n * 4)
             self._resize_if_needed(n * 4)
             struct.pack_into(
-                self._endian_fmt(f"{n}i"), self._buffer, self._offset, *value
+                f"{self._endian_prefix}{n}i", self._buffer, self._offset, *value
             )
             self._offset += n * 4
             return self
@@ -366,13 +693,12 @@ class CdrWriter:
         if isinstance(value, (bytes, bytearray)):
             if writeLength:
                 self.sequenceLength(len(value) // 4)
-            self.align(4, len(value))
-            self._resize_if_needed(len(value))
-            self._buffer[self._offset : self._offset + len(value)] = memoryview(value)
-            self._offset += len(value)
+            self._write_block(value, 4)
             return self
         if self._try_write_contiguous(value, "I", 4, writeLength):
             return self
+        if self._try_write_numpy(value, "I", 4, writeLength):
+            return self
         if isinstance(value, Array) and value.typecode == "I":
             n = len(value)
             if writeLength:
@@ -380,7 +706,7 @@ class CdrWriter:
             self.align(4, n * 4)
             self._resize_if_needed(n * 4)
             struct.pack_into(
-                self._endian_fmt(f"{n}I"), self._buffer, self._offset, *value
+                f"{self._endian_prefix}{n}I", self._buffer, self._offset, *value
             )
             self._offset += n * 4
             return self
@@ -398,15 +724,14 @@ class CdrWriter:
         if isinstance(value, (bytes, bytearray)):
             if writeLength:
                 self.sequenceLength(len(value) // 8)
-            self.align(self._eight_byte_alignment, len(value))
-            self._resize_if_needed(len(value))
-            self._buffer[self._offset : self._offset + len(value)] = memoryview(value)
-            self._offset += len(value)
+            self._write_block(value, self._eight_byte_alignment)
             return self
         if self._try_write_contiguous(
             value, "q", self._eight_byte_alignment, writeLength
         ):
             return self
+        if self._try_write_numpy(value, "q", self._eight_byte_alignment, writeLength):
+            return self
         if isinstance(value, Array) and value.typecode == "q":
             n = len(value)
             if writeLength:
@@ -414,7 +739,7 @@ class CdrWriter:
             self.align(self._eight_byte_alignment, n * 8)
             self._resize_if_needed(n * 8)
             struct.pack_into(
-                self._endian_fmt(f"{n}q"), self._buffer, self._offset, *value
+                f"{self._endian_prefix}{n}q", self._buffer, self._offset, *value
             )
             self._offset += n * 8
             return self
@@ -432,15 +757,14 @@ class CdrWriter:
         if isinstance(value, (bytes, bytearray)):
             if writeLength:
                 self.sequenceLength(len(value) // 8)
-            self.align(self._eight_byte_alignment, len(value))
-            self._resize_if_needed(len(value))
-            self._buffer[self._offset : self._offset + len(value)] = memoryview(value)
-            self._offset += len(value)
+            self._write_block(value, self._eight_byte_alignment)
             return self
         if self._try_write_contiguous(
             value, "Q", self._eight_byte_alignment, writeLength
         ):
             return self
+        if self._try_write_numpy(value, "Q", self._eight_byte_alignment, writeLength):
+            return self
         if isinstance(value, Array) and value.typecode == "Q":
             n = len(value)
             if writeLength:
@@ -448,7 +772,7 @@ class CdrWriter:
             self.align(self._eight_byte_alignment, n * 8)
             self._resize_if_needed(n * 8)
             struct.pack_into(
-                self._endian_fmt(f"{n}Q"), self._buffer, self._offset, *value
+                f"{self._endian_prefix}{n}Q", self._buffer, self._offset, *value
             )
             self._offset += n * 8
             return self
@@ -466,13 +790,12 @@ class CdrWriter:
         if isinstance(value, (bytes, bytearray)):
             if writeLength:
                 self.sequenceLength(len(value) // 4)
-            self.align(4, len(value))
-            self._resize_if_needed(len(value))
-            self._buffer[self._offset : self._offset + len(value)] = memoryview(value)
-            self._offset += len(value)
+            self._write_block(value, 4)
             return self
         if self._try_write_contiguous(value, "f", 4, writeLength):
             return self
+        if self._try_write_numpy(value, "f", 4, writeLength):
+            return self
         if isinstance(value, Array) and value.typecode == "f":
             n = len(value)
             if writeLength:
@@ -480,7 +803,7 @@ class CdrWriter:
             self.align(4, n * 4)
             self._resize_if_needed(n * 4)
             struct.pack_into(
-                self._endian_fmt(f"{n}f"), self._buffer, self._offset, *value
+                f"{self._endian_prefix}{n}f", self._buffer, self._offset, *value
             )
             self._offset += n * 4
             return self
@@ -498,15 +821,14 @@ class CdrWriter:
         if isinstance(value, (bytes, bytearray)):
             if writeLength:
                 self.sequenceLength(len(value) // 8)
-            self.align(self._eight_byte_alignment, len(value))
-            self._resize_if_needed(len(value))
-            self._buffer[self._offset : self._offset + len(value)] = memoryview(value)
-            self._offset += len(value)
+            self._write_block(value, self._eight_byte_alignment)
             return self
         if self._try_write_contiguous(
             value, "d", self._eight_byte_alignment, writeLength
         ):
             return self
+        if self._try_write_numpy(value, "d", self._eight_byte_alignment, writeLength):
+            return self
         if isinstance(value, Array) and value.typecode == "d":
             n = len(value)
             if writeLength:
@@ -514,7 +836,7 @@ class CdrWriter:
             self.align(self._eight_byte_alignment, n * 8)
             self._resize_if_needed(n * 8)
             struct.pack_into(
-                self._endian_fmt(f"{n}d"), self._buffer, self._offset, *value
+                f"{self._endian_prefix}{n}d", self._buffer, self._offset, *value
             )
             self._offset += n * 8
             return self
@@ -527,6 +849,30 @@ class CdrWriter:
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
+    def _write_block(self, data: Buffer, align: int) -> None:
+        """Write a contiguous byte block after aligning to ``align``."""
+
+        nbytes = memoryview(data).nbytes
+        threshold = self._segment_threshold
+        if threshold is not None and nbytes >= threshold:
+            self.align(align, 0)
+            self._segments.append((self._offset, memoryview(data).cast("B")))
+            self._segment_bytes += nbytes
+            # Keep alignment relative to the logical stream position, which
+            # is ahead of the buffer offset by the referenced bytes.
+            self._origin -= nbytes
+            return
+        self.align(align, nbytes)
+        self._buffer[self._offset : self._offset + nbytes] = data
+        self._offset += nbytes
+
+    def _check_contiguous(self, operation: str) -> None:
+        if self._segments:
+            raise ValueError(
+                f"Cannot {operation} a writer holding {len(self._segments)} "
+                "referenced segments, use segments() instead"
+            )
+
     def _try_write_contiguous(
         self,
         value: object,
@@ -570,10 +916,32 @@ class CdrWriter:
         n = mv.nbytes // mv.itemsize
         if writeLength:
             self.sequenceLength(n)
-        self.align(align, mv.nbytes)
-        self._resize_if_needed(mv.nbytes)
-        self._buffer[self._offset : self._offset + mv.nbytes] = mv.cast("B")
-        self._offset += mv.nbytes
+        self._write_block(mv.cast("B"), align)
+        return True
+
+    def _try_write_numpy(
+        self,
+        value: object,
+        fmt_char: str,
+        align: int,
+        writeLength: bool | None,
+    ) -> bool:
+        """Attempt a bulk copy of a NumPy array of any dtype and byte order.
+
+        The array is converted to ``fmt_char`` in the writer's byte order in a
+        single vectorised step.  Returns ``False`` if ``value`` is not a NumPy
+        array.
+        """
+
+        data = numpy_array_bytes(value, fmt_char, self._little_endian)
+        if data is None:
+            return False
+
+        if writeLength:
+            self.sequenceLength(data.nbytes // self._ITEMSIZE.get(fmt_char, 1))
+        if data.nbytes == 0:
+            return True
+        self._write_block(data, align)
         return True
 
     def reset_origin(self) -> None:
@@ -587,15 +955,15 @@ class CdrWriter:
         if size <= 0:
             self._resize_if_needed(bytesToWrite)
             return
-        alignment = (self._offset - self._origin) % size
-        padding = size - alignment if alignment > 0 else 0
-        self._resize_if_needed(padding + bytesToWrite)
-        for _ in range(padding):
-            self._buffer[self._offset] = 0
-            self._offset += 1
-
-    def _endian_fmt(self, fmt: str) -> str:
-        return ("<" if self._little_endian else ">") + fmt
+        offset = self._offset
+        padding = -(offset - self._origin) % size
+        if len(self._buffer) < offset + padding + bytesToWrite:
+            self._resize_if_needed(padding + bytesToWrite)
+        if padding:
+            self._buffer[offset : offset + padding] = (
+                _PADDING[padding] if padding < len(_PADDING) else bytes(padding)
+            )
+            self._offset = offset + padding
 
     def _resize_if_needed(self, additional: int) -> None:
         capacity = self._offset + additional
@@ -605,9 +973,10 @@ class CdrWriter:
             self._resize(new_capacity)
 
     def _resize(self, capacity: int) -> None:
-        if len(self._buffer) >= capacity:
+        missing = capacity - len(self._buffer)
+        if missing <= 0:
             return
-        self._buffer.extend(b"\x00" * (capacity - len(self._buffer)))
+        self._buffer += _ZEROS[:missing] if missing <= len(_ZEROS) else bytes(missing)
 
     def _member_header_v1(
         self, mustUnderstand: bool, id: int, objectSize: int
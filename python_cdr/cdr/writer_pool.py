@@ -0,0 +1,109 @@
+"""Pooling of :class:`~cdr.writer.CdrWriter` instances.
+
+A high-rate publisher serialising one message after another would otherwise
+allocate a new buffer – and grow it by repeated doubling – for every message.
+:class:`CdrWriterPool` keeps released writers together with their grown
+buffers and hands them out again after :meth:`CdrWriter.reset`, so steady
+state publishing allocates no buffers at all.
+
+Free writers are kept in per-thread free lists, grouped into power-of-two
+size classes by buffer capacity.  Writers whose buffer grew beyond
+``max_retained_capacity`` are dropped on release, so a single huge message
+does not pin its memory for the lifetime of the pool.
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+from .encapsulation_kind import EncapsulationKind
+from .writer import CdrWriter
+
+
+class CdrWriterPool:
+    """A pool of reusable :class:`CdrWriter` instances.
+
+    Parameters
+    ----------
+    max_retained_capacity:
+        Largest buffer capacity, in bytes, kept by the pool.
+    max_writers_per_class:
+        Number of free writers kept per size class and thread.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_retained_capacity: int = 1 << 22,
+        max_writers_per_class: int = 4,
+    ) -> None:
+        self._max_retained_capacity = max_retained_capacity
+        self._max_writers_per_class = max_writers_per_class
+        self._local = threading.local()
+
+    def _free_lists(self) -> Dict[int, List[CdrWriter]]:
+        free_lists = getattr(self._local, "free_lists", None)
+        if free_lists is None:
+            free_lists = self._local.free_lists = {}
+        return free_lists
+
+    def acquire(
+        self,
+        kind: EncapsulationKind = EncapsulationKind.CDR_LE,
+        size: int | None = None,
+    ) -> CdrWriter:
+        """Return a writer positioned after the encapsulation header.
+
+        When ``size`` is given, a pooled writer with at least that capacity
+        is preferred, otherwise the writer with the largest buffer is used.
+        A new writer presized to ``size`` is created if none is available.
+        """
+
+        free_lists = self._free_lists()
+        if size is None:
+            classes = sorted(free_lists, reverse=True)
+        else:
+            smallest = _size_class(size)
+            classes = sorted(c for c in free_lists if c >= smallest)
+        for size_class in classes:
+            writers = free_lists[size_class]
+            # Writers in the smallest class may still be slightly too small.
+            for index in range(len(writers) - 1, -1, -1):
+                if size is None or writers[index].capacity >= size:
+                    return writers.pop(index).reset(kind)
+        return CdrWriter(kind=kind, size=size)
+
+    def release(self, writer: CdrWriter) -> None:
+        """Return ``writer`` to the current thread's free list.
+
+        The writer must not be used by the caller afterwards.
+        """
+
+        capacity = writer.capacity
+        if capacity > self._max_retained_capacity:
+            return
+        writers = self._free_lists().setdefault(_size_class(capacity), [])
+        if len(writers) < self._max_writers_per_class:
+            writers.append(writer)
+
+    @contextmanager
+    def writer(
+        self,
+        kind: EncapsulationKind = EncapsulationKind.CDR_LE,
+        size: int | None = None,
+    ) -> Iterator[CdrWriter]:
+        """Acquire a writer for the duration of a ``with`` block."""
+
+        writer = self.acquire(kind, size)
+        try:
+            yield writer
+        finally:
+            self.release(writer)
+
+
+def _size_class(capacity: int) -> int:
+    """Return the power-of-two size class of a buffer capacity."""
+
+    return max(capacity - 1, 0).bit_length()
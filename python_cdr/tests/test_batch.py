@@ -0,0 +1,165 @@
+"""Tests for :mod:`cdr.batch`."""
+
+from __future__ import annotations
+
+import pytest
+
+from cdr.batch import decode_batch
+from cdr.encapsulation_kind import EncapsulationKind
+from cdr.encoder import MessageEncoder
+from cdr.idl import parse_idl
+from cdr.schema import parse_message_definition
+
+np = pytest.importorskip("numpy")
+
+IMU_DEFINITION = """
+std_msgs/Header header
+uint8 status
+float64[4] orientation
+float32 temperature
+bool valid
+================================================================================
+MSG: std_msgs/Header
+builtin_interfaces/Time stamp
+uint32 seq
+"""
+
+LABELLED_DEFINITION = """
+builtin_interfaces/Time stamp
+string label
+float64 value
+int32[] samples
+"""
+
+
+def _imu_message(i: int) -> dict:
+    return {
+        "header": {"stamp": {"sec": i, "nanosec": 2 * i}, "seq": i},
+        "status": i % 3,
+        "orientation": [i, i + 0.5, -i, 1.0],
+        "temperature": 20.0 + i,
+        "valid": i % 2 == 0,
+    }
+
+
+@pytest.mark.parametrize(
+    "kind",
+    [EncapsulationKind.CDR_LE, EncapsulationKind.CDR_BE, EncapsulationKind.CDR2_LE],
+)
+def test_decodes_fixed_layout_with_strided_views(kind: EncapsulationKind) -> None:
+    schema = parse_message_definition(IMU_DEFINITION, "sensor_msgs/Imu")
+    encoder = MessageEncoder(schema, kind=kind)
+    payloads = [bytes(encoder.encode(_imu_message(i))) for i in range(10)]
+
+    columns = decode_batch(payloads, schema)
+    assert list(columns) == [
+        "header.stamp.sec",
+        "header.stamp.nanosec",
+        "header.seq",
+        "status",
+        "orientation",
+        "temperature",
+        "valid",
+    ]
+    # Every column is a view over the same concatenated buffer.
+    assert columns["status"].base is columns["temperature"].base
+    assert columns["header.stamp.sec"].tolist() == list(range(10))
+    assert columns["header.stamp.nanosec"].tolist() == list(range(0, 20, 2))
+    assert columns["status"].tolist() == [i % 3 for i in range(10)]
+    assert columns["orientation"].shape == (10, 4)
+    assert columns["orientation"][3].tolist() == [3.0, 3.5, -3.0, 1.0]
+    assert columns["temperature"].tolist() == [20.0 + i for i in range(10)]
+    assert columns["valid"].tolist() == [i % 2 == 0 for i in range(10)]
+
+
+def test_mixed_kinds_fall_back_to_per_message_decoding() -> None:
+    schema = parse_message_definition(IMU_DEFINITION, "sensor_msgs/Imu")
+    payloads = [
+        bytes(MessageEncoder(schema, kind=kind).encode(_imu_message(i)))
+        for i, kind in enumerate([EncapsulationKind.CDR_LE, EncapsulationKind.CDR_BE])
+    ]
+    columns = decode_batch(payloads, schema)
+    assert columns["header.seq"].tolist() == [0, 1]
+    assert columns["orientation"].tolist() == [
+        [0.0, 0.5, 0.0, 1.0],
+        [1.0, 1.5, -1.0, 1.0],
+    ]
+
+
+def test_decodes_variable_layout() -> None:
+    schema = parse_message_definition(LABELLED_DEFINITION, "pkg/Labelled")
+    encoder = MessageEncoder(schema)
+    messages = [
+        {
+            "stamp": {"sec": i, "nanosec": 0},
+            "label": f"m{i}",
+            "value": i / 2,
+            "samples": list(range(i)),
+        }
+        for i in range(4)
+    ]
+    columns = decode_batch(
+        (bytes(encoder.encode(message)) for message in messages), schema
+    )
+    assert columns["stamp.sec"].dtype == np.int32
+    assert columns["stamp.sec"].tolist() == [0, 1, 2, 3]
+    assert columns["label"] == ["m0", "m1", "m2", "m3"]
+    assert columns["value"].tolist() == [0.0, 0.5, 1.0, 1.5]
+    assert [list(samples) for samples in columns["samples"]] == [
+        list(range(i)) for i in range(4)
+    ]
+
+
+def test_empty_batch() -> None:
+    schema = parse_message_definition(IMU_DEFINITION, "sensor_msgs/Imu")
+    columns = decode_batch([], schema)
+    assert columns["temperature"].shape == (0,)
+    assert columns["orientation"].shape == (0, 4)
+
+
+@pytest.mark.parametrize(
+    "kind", [EncapsulationKind.DELIMITED_CDR2_LE, EncapsulationKind.CDR_LE]
+)
+def test_appendable_idl_type(kind: EncapsulationKind) -> None:
+    schema = parse_idl("@appendable struct P { double x; double y; };")
+    encoder = MessageEncoder(schema, kind=kind)
+    payloads = [bytes(encoder.encode({"x": i, "y": -i})) for i in range(3)]
+    columns = decode_batch(payloads, schema)
+    assert columns["x"].tolist() == [0.0, 1.0, 2.0]
+    assert columns["y"].tolist() == [0.0, -1.0, -2.0]
+
+
+def test_optional_idl_members() -> None:
+    schema = parse_idl(
+        "struct V { double v; }; struct Q { long x; @optional long y; "
+        "@optional double z; @optional V w; };"
+    )
+    encoder = MessageEncoder(schema, kind=EncapsulationKind.DELIMITED_CDR2_LE)
+    messages = [
+        {"x": 1, "y": None, "z": None, "w": None},
+        {"x": 2, "y": 5, "z": 0.5, "w": {"v": 1.5}},
+    ]
+    columns = decode_batch([bytes(encoder.encode(m)) for m in messages], schema)
+    assert columns["x"].tolist() == [1, 2]
+    assert columns["y"] == [None, 5]
+    assert columns["z"] == [None, 0.5]
+    assert columns["w"] == [None, {"v": 1.5}]
+
+
+def test_mutable_idl_members() -> None:
+    old = parse_idl(
+        "@final struct V { double v; }; "
+        "@mutable struct A { long a; @id(2) double c; };"
+    )
+    new = parse_idl(
+        "@final struct V { double v; }; "
+        "@mutable struct A { long a; long b; double c; double d; V w; };"
+    )
+    encoder = MessageEncoder(old, kind=EncapsulationKind.PL_CDR2_LE)
+    messages = [{"a": 1, "c": 0.5}, {"a": 2, "c": 1.5}]
+    columns = decode_batch([bytes(encoder.encode(m)) for m in messages], new)
+    assert columns["a"] == [1, 2]
+    assert columns["b"] == [None, None]
+    assert columns["c"] == [0.5, 1.5]
+    assert columns["d"] == [None, None]
+    assert columns["w"] == [None, None]
@@ -0,0 +1,161 @@
+"""Tests for :mod:`cdr.decoder`."""
+
+from __future__ import annotations
+
+import pytest
+
+from cdr.decoder import MessageDecoder
+from cdr.encapsulation_kind import EncapsulationKind
+from cdr.reader import CdrReader
+from cdr.schema import parse_message_definition
+from cdr.writer import CdrWriter
+
+TF2_MSG_TFMESSAGE = (
+    "0001000001000000cce0d158f08cf9060a000000626173655f6c696e6b0000000600000072616461"
+    "72000000ae47e17a14ae0e4000000000000000000000000000000000000000000000000000000000"
+    "000000000000000000000000000000000000f03f"
+)
+
+TF2_MSG_DEFINITION = """
+geometry_msgs/TransformStamped[] transforms
+================================================================================
+MSG: geometry_msgs/TransformStamped
+std_msgs/Header header
+string child_frame_id # the frame id of the child frame
+Transform transform
+================================================================================
+MSG: std_msgs/Header
+builtin_interfaces/Time stamp
+string frame_id
+================================================================================
+MSG: geometry_msgs/Transform
+Vector3 translation
+Quaternion rotation
+================================================================================
+MSG: geometry_msgs/Vector3
+float64 x
+float64 y
+float64 z
+================================================================================
+MSG: geometry_msgs/Quaternion
+float64 x 0
+float64 y 0
+float64 z 0
+float64 w 1
+"""
+
+MIXED_DEFINITION = """
+uint8 a
+float64 b
+bool flag
+int16[3] small
+string label
+uint8 c
+int64 d
+float32[] samples
+string[] names
+Point[2] corners
+Point[] points
+uint8[100] blob
+================================================================================
+MSG: pkg/Point
+float32 x
+float64 y
+"""
+
+
+def test_decodes_example_tf2_message() -> None:
+    schema = parse_message_definition(TF2_MSG_DEFINITION, "tf2_msgs/TFMessage")
+    decoder = MessageDecoder(schema)
+    message = decoder.decode(bytes.fromhex(TF2_MSG_TFMESSAGE))
+
+    (transform,) = message["transforms"]
+    assert transform["header"] == {
+        "stamp": {"sec": 1490149580, "nanosec": 117017840},
+        "frame_id": "base_link",
+    }
+    assert transform["child_frame_id"] == "radar"
+    assert transform["transform"]["translation"] == {
+        "x": pytest.approx(3.835),
+        "y": 0,
+        "z": 0,
+    }
+    assert transform["transform"]["rotation"] == {"x": 0, "y": 0, "z": 0, "w": 1}
+
+
+def _write_mixed(writer: CdrWriter) -> None:
+    writer.uint8(1)
+    writer.float64(2.5)
+    writer.uint8(1)
+    writer.int16Array([-1, 2, -3])
+    writer.string("label")
+    writer.uint8(7)
+    writer.int64(-9)
+    writer.float32Array([0.5, 1.5], True)
+    writer.sequenceLength(2)
+    writer.string("a")
+    writer.string("bc")
+    for x, y in [(1.0, 2.0), (3.0, 4.0)]:
+        writer.float32(x)
+        writer.float64(y)
+    writer.sequenceLength(1)
+    writer.float32(5.0)
+    writer.float64(6.0)
+    writer.uint8Array(bytes(range(100)))
+
+
+@pytest.mark.parametrize("kind", list(EncapsulationKind))
+def test_matches_field_by_field_reads(kind: EncapsulationKind) -> None:
+    writer = CdrWriter(kind=kind)
+    _write_mixed(writer)
+    data = writer.data
+
+    decoder = MessageDecoder(parse_message_definition(MIXED_DEFINITION, "pkg/Mixed"))
+    reader = CdrReader(data)
+    message = decoder.read(reader)
+    assert reader.offset == len(data)
+
+    assert message["a"] == 1
+    assert message["b"] == 2.5
+    assert message["flag"] is True
+    assert message["small"] == [-1, 2, -3]
+    assert message["label"] == "label"
+    assert message["c"] == 7
+    assert message["d"] == -9
+    assert list(message["samples"]) == [0.5, 1.5]
+    assert message["names"] == ["a", "bc"]
+    assert message["corners"] == [{"x": 1.0, "y": 2.0}, {"x": 3.0, "y": 4.0}]
+    assert message["points"] == [{"x": 5.0, "y": 6.0}]
+    assert bytes(message["blob"]) == bytes(range(100))
+
+
+@pytest.mark.parametrize("offset", range(8))
+def test_runs_honour_phase_after_variable_fields(offset: int) -> None:
+    # The string shifts the start of the following run to every possible phase.
+    schema = parse_message_definition("string s\nuint8 a\nfloat64 b\nuint16 c\n")
+    for kind in (EncapsulationKind.CDR_LE, EncapsulationKind.CDR2_BE):
+        writer = CdrWriter(kind=kind)
+        writer.string("x" * offset)
+        writer.uint8(3)
+        writer.float64(-1.25)
+        writer.uint16(513)
+        assert MessageDecoder(schema).decode(writer.data) == {
+            "s": "x" * offset,
+            "a": 3,
+            "b": -1.25,
+            "c": 513,
+        }
+
+
+def test_decodes_empty_message() -> None:
+    schema = parse_message_definition("", "std_msgs/Empty")
+    writer = CdrWriter()
+    writer.uint8(0)
+    assert MessageDecoder(schema).decode(writer.data) == {
+        "structure_needs_at_least_one_member": 0
+    }
+
+
+def test_rejects_wstring() -> None:
+    with pytest.raises(ValueError):
+        MessageDecoder(parse_message_definition("wstring w"))
@@ -0,0 +1,177 @@
+"""Tests for :mod:`cdr.encoder`."""
+
+from __future__ import annotations
+
+from array import array
+
+import pytest
+
+from cdr.decoder import MessageDecoder
+from cdr.encapsulation_kind import EncapsulationKind
+from cdr.encoder import MessageEncoder
+from cdr.schema import parse_message_definition
+from cdr.writer import CdrWriter
+
+TF2_MSG_TFMESSAGE = (
+    "0001000001000000cce0d158f08cf9060a000000626173655f6c696e6b0000000600000072616461"
+    "72000000ae47e17a14ae0e4000000000000000000000000000000000000000000000000000000000"
+    "000000000000000000000000000000000000f03f"
+)
+
+TF2_MSG_DEFINITION = """
+geometry_msgs/TransformStamped[] transforms
+================================================================================
+MSG: geometry_msgs/TransformStamped
+std_msgs/Header header
+string child_frame_id
+Transform transform
+================================================================================
+MSG: std_msgs/Header
+builtin_interfaces/Time stamp
+string frame_id
+================================================================================
+MSG: geometry_msgs/Transform
+Vector3 translation
+Quaternion rotation
+================================================================================
+MSG: geometry_msgs/Vector3
+float64 x
+float64 y
+float64 z
+================================================================================
+MSG: geometry_msgs/Quaternion
+float64 x
+float64 y
+float64 z
+float64 w
+"""
+
+TF2_MESSAGE = {
+    "transforms": [
+        {
+            "header": {
+                "stamp": {"sec": 1490149580, "nanosec": 117017840},
+                "frame_id": "base_link",
+            },
+            "child_frame_id": "radar",
+            "transform": {
+                "translation": {"x": 3.835, "y": 0.0, "z": 0.0},
+                "rotation": {"x": 0.0, "y": 0.0, "z": 0.0, "w": 1.0},
+            },
+        }
+    ]
+}
+
+MIXED_DEFINITION = """
+uint8 a
+float64 b
+bool flag
+int16[3] small
+string label
+uint8 c
+int64 d
+float32[] samples
+string[] names
+string[2] pair
+Point[2] corners
+Point[] points
+uint8[100] blob
+bool[] flags
+================================================================================
+MSG: pkg/Point
+float32 x
+float64 y
+"""
+
+MIXED_MESSAGE = {
+    "a": 1,
+    "b": 2.5,
+    "flag": True,
+    "small": [-1, 2, -3],
+    "label": "läbel",
+    "c": 7,
+    "d": -9,
+    "samples": [0.5, 1.5],
+    "names": ["a", "", "bc"],
+    "pair": ["x", "yz"],
+    "corners": [{"x": 1.0, "y": 2.0}, {"x": 3.0, "y": 4.0}],
+    "points": [{"x": 5.0, "y": 6.0}],
+    "blob": bytes(range(100)),
+    "flags": [True, False],
+}
+
+
+def test_encodes_example_tf2_message() -> None:
+    schema = parse_message_definition(TF2_MSG_DEFINITION, "tf2_msgs/TFMessage")
+    encoder = MessageEncoder(schema)
+    assert encoder.size(TF2_MESSAGE) == 100
+    data = encoder.encode(TF2_MESSAGE)
+    assert data.hex() == TF2_MSG_TFMESSAGE
+
+
+@pytest.mark.parametrize("kind", list(EncapsulationKind))
+def test_round_trips_through_decoder(kind: EncapsulationKind) -> None:
+    schema = parse_message_definition(MIXED_DEFINITION, "pkg/Mixed")
+    encoder = MessageEncoder(schema, kind=kind)
+    data = encoder.encode(MIXED_MESSAGE)
+    assert len(data) == encoder.size(MIXED_MESSAGE)
+
+    message = MessageDecoder(schema).decode(data)
+    message["samples"] = list(message["samples"])
+    message["blob"] = bytes(message["blob"])
+    assert message == MIXED_MESSAGE
+
+
+@pytest.mark.parametrize("kind", [EncapsulationKind.CDR_LE, EncapsulationKind.CDR2_BE])
+def test_matches_cdr_writer_output(kind: EncapsulationKind) -> None:
+    schema = parse_message_definition(
+        "uint8 a\nstring s\nfloat64[] values\nint16 b\nuint64 c\n"
+    )
+    message = {"a": 1, "s": "abc", "values": array("d", [1.0, 2.0]), "b": 3, "c": 4}
+
+    writer = CdrWriter(kind=kind)
+    writer.uint8(1)
+    writer.string("abc")
+    writer.float64Array([1.0, 2.0], True)
+    writer.int16(3)
+    writer.uint64(4)
+
+    assert bytes(MessageEncoder(schema, kind=kind).encode(message)) == writer.data
+
+
+def test_appends_to_writer() -> None:
+    schema = parse_message_definition(TF2_MSG_DEFINITION, "tf2_msgs/TFMessage")
+    writer = CdrWriter()
+    MessageEncoder(schema).write(writer, TF2_MESSAGE)
+    assert writer.data.hex() == TF2_MSG_TFMESSAGE
+
+
+def test_rejects_wrong_fixed_array_length() -> None:
+    schema = parse_message_definition("int16[3] small\nstring[2] pair\n")
+    encoder = MessageEncoder(schema)
+    with pytest.raises(ValueError):
+        encoder.encode({"small": [1, 2], "pair": ["a", "b"]})
+    with pytest.raises(ValueError):
+        encoder.encode({"small": [1, 2, 3], "pair": ["a"]})
+
+
+def test_overwrites_stale_bytes_in_writer_buffer() -> None:
+    schema = parse_message_definition(MIXED_DEFINITION, "pkg/Mixed")
+    expected = MessageEncoder(schema).encode(MIXED_MESSAGE)
+
+    writer = CdrWriter(buffer=b"\xff" * len(expected))
+    MessageEncoder(schema).write(writer, MIXED_MESSAGE)
+    assert writer.data == bytes(expected)
+
+
+def test_encodes_numpy_arrays_with_byteswap() -> None:
+    np = pytest.importorskip("numpy")
+    schema = parse_message_definition("float32[] points\nint64[3] ids\n")
+    message = {
+        "points": np.arange(100, dtype="<f4"),
+        "ids": np.array([1, 2, 3], dtype="<i8"),
+    }
+    encoder = MessageEncoder(schema, kind=EncapsulationKind.CDR_BE)
+    decoded = MessageDecoder(schema).decode(encoder.encode(message))
+    assert list(decoded["points"]) == list(range(100))
+    assert decoded["ids"] == [1, 2, 3]
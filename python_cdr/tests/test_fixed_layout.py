@@ -0,0 +1,106 @@
+"""Tests for :mod:`cdr.fixed_layout`."""
+
+from __future__ import annotations
+
+import struct
+
+import pytest
+
+from cdr.encapsulation_kind import EncapsulationKind
+from cdr.encoder import MessageEncoder
+from cdr.fixed_layout import fixed_layout
+from cdr.schema import parse_message_definition
+
+FIXED_DEFINITION = """
+std_msgs/Header header
+uint8 status
+float64[3] position
+Point[2] corners
+int16[100] samples
+bool valid
+================================================================================
+MSG: std_msgs/Header
+builtin_interfaces/Time stamp
+uint32 seq
+================================================================================
+MSG: pkg/Point
+float32 x
+float64 y
+"""
+
+FIXED_MESSAGE = {
+    "header": {"stamp": {"sec": 1, "nanosec": 2}, "seq": 3},
+    "status": 4,
+    "position": [5.0, 6.0, 7.0],
+    "corners": [{"x": 8.0, "y": 9.0}, {"x": 10.0, "y": 11.0}],
+    "samples": list(range(100)),
+    "valid": True,
+}
+
+
+@pytest.mark.parametrize("kind", list(EncapsulationKind))
+def test_size_and_offsets_match_encoded_payload(kind: EncapsulationKind) -> None:
+    schema = parse_message_definition(FIXED_DEFINITION, "pkg/Fixed")
+    layout = fixed_layout(schema, kind=kind)
+    assert layout is not None
+    assert layout.type == "pkg/Fixed"
+    assert layout.kind == kind
+
+    data = MessageEncoder(schema, kind=kind).encode(FIXED_MESSAGE)
+    assert layout.size == len(data)
+
+    prefix = "<" if kind.value & 1 else ">"
+    expected = {
+        "header.stamp.sec": ("I", 1),
+        "header.stamp.nanosec": ("I", 2),
+        "header.seq": ("I", 3),
+        "status": ("B", 4),
+        "position": ("d", 5.0),
+        "corners[0].x": ("f", 8.0),
+        "corners[0].y": ("d", 9.0),
+        "corners[1].x": ("f", 10.0),
+        "corners[1].y": ("d", 11.0),
+        "samples": ("h", 0),
+        "valid": ("?", True),
+    }
+    assert list(layout.offsets) == list(expected)
+    for path, (char, value) in expected.items():
+        assert struct.unpack_from(prefix + char, data, layout.offsets[path])[0] == value
+
+
+def test_variable_size_types_have_no_layout() -> None:
+    schema = parse_message_definition(
+        "Inner inner\n===\nMSG: pkg/Inner\nint32[] values\n", "pkg/Outer"
+    )
+    assert fixed_layout(schema) is None
+    assert fixed_layout(schema, "pkg/Inner") is None
+    schema = parse_message_definition("uint8 a\nstring name\n", "pkg/Named")
+    assert fixed_layout(schema) is None
+
+
+def test_layouts_are_cached_per_kind() -> None:
+    schema = parse_message_definition(FIXED_DEFINITION, "pkg/Fixed")
+    layout = fixed_layout(schema)
+    assert fixed_layout(schema, "pkg/Fixed", EncapsulationKind.CDR_LE) is layout
+    xcdr2 = fixed_layout(schema, kind=EncapsulationKind.CDR2_LE)
+    assert xcdr2 is not None and layout is not None
+    assert xcdr2.size < layout.size
+
+
+def test_empty_message_has_placeholder_octet() -> None:
+    schema = parse_message_definition("", "std_msgs/Empty")
+    layout = fixed_layout(schema)
+    assert layout is not None
+    assert layout.size == 5
+    assert dict(layout.offsets) == {"structure_needs_at_least_one_member": 4}
+
+
+def test_encoder_presizes_fixed_types_and_checks_array_lengths() -> None:
+    schema = parse_message_definition(FIXED_DEFINITION, "pkg/Fixed")
+    encoder = MessageEncoder(schema)
+    assert encoder.size({}) == fixed_layout(schema).size  # type: ignore[union-attr]
+
+    with pytest.raises(ValueError):
+        encoder.encode({**FIXED_MESSAGE, "samples": list(range(99))})
+    with pytest.raises(ValueError):
+        encoder.encode({**FIXED_MESSAGE, "corners": FIXED_MESSAGE["corners"][:1]})
@@ -0,0 +1,348 @@
+"""Tests for :mod:`cdr.idl` and the XTypes encoding of IDL types."""
+
+from __future__ import annotations
+
+import pytest
+
+from cdr.decoder import MessageDecoder
+from cdr.encapsulation_kind import EncapsulationKind
+from cdr.encoder import MessageEncoder
+from cdr.fixed_layout import fixed_layout
+from cdr.idl import encapsulation_kind, parse_idl
+from cdr.member_index import index_members
+from cdr.reader import CdrReader
+from cdr.transcoder import MessageTranscoder
+from cdr.view import MessageView
+from cdr.writer import CdrWriter
+
+SHAPES_IDL = """
+// Shapes with every extensibility kind.
+#include "other.idl"
+module shapes {
+  const long CORNERS = 2;
+  enum Color { RED, @value(5) GREEN, BLUE };
+  typedef double Vector[3];
+
+  @final
+  struct Point { double x; double y; };
+
+  @appendable
+  struct Named {
+    string name;
+    Point position;
+    sequence<Point> path;
+    Vector scale;
+    Color color;
+  };
+
+  @mutable
+  struct Shape {
+    @key long id;
+    @id(10) string<16> label;
+    @optional double weight;
+    Named named;
+    sequence<long, CORNERS * 2> values;
+    Point corners[CORNERS][2];
+    @optional sequence<string> tags;
+    @id(20000) uint8 layer;
+  };
+
+  struct Options {
+    long a;
+    @optional long b;
+    @optional string c;
+    double d;
+  };
+};
+"""
+
+POINT = {"x": 1.0, "y": 2.0}
+NAMED = {
+    "name": "square",
+    "position": POINT,
+    "path": [POINT, {"x": 3.0, "y": 4.0}],
+    "scale": [1.0, 2.0, 3.0],
+    "color": 6,
+}
+SHAPE = {
+    "id": 7,
+    "label": "hello",
+    "weight": None,
+    "named": NAMED,
+    "values": [1, 2],
+    "corners": [POINT] * 4,
+    "tags": ["a", "bc"],
+    "layer": 3,
+}
+
+ALL_KINDS = [
+    EncapsulationKind.CDR_LE,
+    EncapsulationKind.CDR_BE,
+    EncapsulationKind.PL_CDR_LE,
+    EncapsulationKind.CDR2_LE,
+    EncapsulationKind.CDR2_BE,
+    EncapsulationKind.PL_CDR2_LE,
+    EncapsulationKind.DELIMITED_CDR2_BE,
+]
+
+
+def roundtrip(schema, type_name, message, kind):
+    encoder = MessageEncoder(schema, type_name, kind=kind)
+    data = encoder.encode(message)
+    assert len(data) == encoder.size(message)
+    return data, MessageDecoder(schema, type_name).decode(data)
+
+
+def test_parse_idl() -> None:
+    schema = parse_idl(SHAPES_IDL, "::shapes::Shape")
+    assert schema.root == "shapes::Shape"
+    assert schema["shapes::Point"].extensibility == "final"
+    assert schema["shapes::Options"].extensibility == "appendable"
+
+    fields = {field.name: field for field in schema.root_definition.fields}
+    assert [field.member_id for field in fields.values()] == [
+        0,
+        10,
+        11,
+        12,
+        13,
+        14,
+        15,
+        20000,
+    ]
+    assert fields["id"].is_key and fields["id"].type == "int32"
+    assert fields["label"].string_upper_bound == 16
+    assert fields["weight"].is_optional
+    assert fields["values"].is_sequence and fields["values"].array_upper_bound == 4
+    assert fields["corners"].type == "shapes::Point"
+    assert fields["corners"].array_length == 4
+
+    named = {field.name: field for field in schema["shapes::Named"].fields}
+    assert named["scale"].array_length == 3
+    assert named["color"].type == "int32" and not named["color"].is_complex
+
+
+def test_parse_idl_defaults() -> None:
+    schema = parse_idl(SHAPES_IDL, default_extensibility="final")
+    assert schema.root == "shapes::Options"
+    assert schema.root_definition.extensibility == "final"
+
+
+def test_parse_ros2idl() -> None:
+    text = """
+module pkg { module msg {
+  struct Inner { int8 a; };
+}; };
+================================================================================
+IDL: pkg/msg/Outer
+module pkg { module msg {
+  module Outer_Constants { const uint8 SIZE = 3; };
+  struct Outer { Inner items[Outer_Constants::SIZE]; unsigned long long b; };
+}; };
+"""
+    schema = parse_idl(text, "pkg/msg/Outer", default_extensibility="final")
+    items, b = schema.root_definition.fields
+    assert items.type == "pkg::msg::Inner" and items.array_length == 3
+    assert b.type == "uint64"
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "union U switch (long) { case 0: long a; };",
+        "struct A { long a; }; struct B : A { long b; };",
+        "struct A { wchar a; };",
+        "struct A { sequence<sequence<long>> a; };",
+        "struct A { Missing a; };",
+        "struct A; struct B { A a; };",
+        "@mutable struct A { long a; @id(0) long b; };",
+        "struct A { long a }",
+        "const long N = 1; struct A { long a[N + ]; };",
+    ],
+)
+def test_parse_idl_rejects(text: str) -> None:
+    with pytest.raises(ValueError):
+        parse_idl(text)
+
+
+@pytest.mark.parametrize("kind", ALL_KINDS)
+def test_roundtrip(kind: EncapsulationKind) -> None:
+    schema = parse_idl(SHAPES_IDL, "shapes::Shape")
+    _, decoded = roundtrip(schema, None, SHAPE, kind)
+    decoded["values"] = list(decoded["values"])
+    assert decoded == SHAPE
+
+    options = {"a": 1, "b": None, "c": "x", "d": 2.5}
+    assert roundtrip(schema, "shapes::Options", options, kind)[1] == options
+
+
+@pytest.mark.parametrize(
+    "kind", [EncapsulationKind.PL_CDR_LE, EncapsulationKind.PL_CDR2_BE]
+)
+def test_mutable_members_match_member_index(kind: EncapsulationKind) -> None:
+    schema = parse_idl(SHAPES_IDL, "shapes::Shape")
+    data, _ = roundtrip(schema, None, SHAPE, kind)
+    index = index_members(CdrReader(data))
+    # The absent optional member is omitted.
+    assert sorted(index) == [0, 10, 12, 13, 14, 15, 20000]
+    assert index.reader(20000).uint8() == 3
+    assert index.reader(10).string() == "hello"
+
+
+@pytest.mark.parametrize(
+    "kind", [EncapsulationKind.PL_CDR_BE, EncapsulationKind.PL_CDR2_LE]
+)
+def test_mutable_matches_writer(kind: EncapsulationKind) -> None:
+    schema = parse_idl("@mutable struct A { @key long a; @id(5) string b; };")
+    writer = CdrWriter(kind=kind)
+    if kind == EncapsulationKind.PL_CDR2_LE:
+        writer.beginDHeader()
+    writer.beginEmHeader(True, 0).int32(-1).endEmHeader()
+    writer.beginEmHeader(False, 5).string("text").endEmHeader()
+    writer.sentinelHeader()
+    if kind == EncapsulationKind.PL_CDR2_LE:
+        writer.endDHeader()
+
+    encoder = MessageEncoder(schema, kind=kind)
+    assert encoder.encode({"a": -1, "b": "text"}) == writer.data
+
+
+@pytest.mark.parametrize(
+    "kind",
+    [EncapsulationKind.CDR_LE, EncapsulationKind.CDR_BE, EncapsulationKind.CDR2_LE],
+)
+@pytest.mark.parametrize("b", [3, None])
+def test_optional_matches_writer(kind: EncapsulationKind, b: int | None) -> None:
+    schema = parse_idl(
+        "@final struct G { long a; long a2; @optional long b; double d; };"
+        "@final struct H { G g; @optional G o; double e; };",
+        "H",
+    )
+    writer = CdrWriter(kind=kind)
+    cdr2 = kind == EncapsulationKind.CDR2_LE
+
+    def write_g(d: float) -> None:
+        writer.int32(1).int32(2)
+        if cdr2:
+            writer.uint8(b is not None)
+            if b is not None:
+                writer.int32(b)
+        elif b is None:
+            writer.emHeader(False, 2, 0)
+        else:
+            writer.beginEmHeader(False, 2).int32(b).endEmHeader()
+        writer.float64(d)
+
+    write_g(4.0)
+    if cdr2:
+        writer.uint8(1)
+        write_g(5.0)
+    else:
+        writer.beginEmHeader(False, 1)
+        write_g(5.0)
+        writer.endEmHeader()
+    writer.float64(6.0)
+
+    g = {"a": 1, "a2": 2, "b": b, "d": 4.0}
+    message = {"g": g, "o": {**g, "d": 5.0}, "e": 6.0}
+    assert MessageEncoder(schema, kind=kind).encode(message) == writer.data
+    assert MessageDecoder(schema).decode(writer.data) == message
+    reader = CdrReader(writer.data)
+    reader.skip(schema)
+    assert reader.offset == len(writer.data)
+
+    swapped = EncapsulationKind(kind.value ^ 1)
+    transcoder = MessageTranscoder(schema, kind=swapped)
+    encoded = MessageEncoder(schema, kind=swapped).encode(message)
+    assert transcoder.transcode(writer.data) == encoded
+
+
+@pytest.mark.parametrize(
+    "kind", [EncapsulationKind.CDR2_LE, EncapsulationKind.DELIMITED_CDR2_LE]
+)
+def test_final_types_have_no_headers(kind: EncapsulationKind) -> None:
+    schema = parse_idl("@final struct A { long a; double b; };")
+    writer = CdrWriter(kind=kind).int32(3).float64(1.5)
+    assert MessageEncoder(schema, kind=kind).encode({"a": 3, "b": 1.5}) == writer.data
+    assert fixed_layout(schema, kind=kind) is not None
+
+
+def test_appendable_type_skips_appended_members() -> None:
+    old = parse_idl("struct A { long a; }; struct B { A inner; long after; };")
+    new = parse_idl(
+        "struct A { long a; string added; }; struct B { A inner; long after; };"
+    )
+    kind = EncapsulationKind.DELIMITED_CDR2_LE
+    message = {"inner": {"a": 1, "added": "new"}, "after": 2}
+    data = MessageEncoder(new, kind=kind).encode(message)
+    assert MessageDecoder(old).decode(data) == {"inner": {"a": 1}, "after": 2}
+
+
+@pytest.mark.parametrize(
+    "kind", [EncapsulationKind.PL_CDR_LE, EncapsulationKind.PL_CDR2_LE]
+)
+def test_mutable_type_skips_unknown_members(kind: EncapsulationKind) -> None:
+    old = parse_idl("@mutable struct A { long a; @id(2) double c; };")
+    new = parse_idl("@mutable struct A { long a; string b; double c; };")
+    data = MessageEncoder(new, kind=kind).encode({"a": 1, "b": "x", "c": 2.0})
+    assert MessageDecoder(old).decode(data) == {"a": 1, "c": 2.0}
+
+    # Members missing from the data decode as None.
+    data = MessageEncoder(old, kind=kind).encode({"a": 1, "c": 2.0})
+    assert MessageDecoder(new).decode(data) == {"a": 1, "b": None, "c": 2.0}
+
+
+@pytest.mark.parametrize(
+    "kind", [EncapsulationKind.PL_CDR_LE, EncapsulationKind.PL_CDR2_LE]
+)
+def test_unknown_must_understand_member_raises(kind: EncapsulationKind) -> None:
+    old = parse_idl("@mutable struct A { long a; };")
+    new = parse_idl("@mutable struct A { long a; @key long b; };")
+    data = MessageEncoder(new, kind=kind).encode({"a": 1, "b": 2})
+    with pytest.raises(ValueError, match="must understand"):
+        MessageDecoder(old).decode(data)
+
+
+def test_large_parameter_uses_extended_header() -> None:
+    schema = parse_idl("@mutable struct A { sequence<octet> data; long after; };")
+    message = {"data": bytes(70000), "after": 5}
+    data, decoded = roundtrip(schema, None, message, EncapsulationKind.PL_CDR_LE)
+    assert bytes(decoded["data"]) == message["data"] and decoded["after"] == 5
+    assert index_members(CdrReader(data))[0][1] == 70004
+
+
+def test_struct_arrays_skip_delimiter_header() -> None:
+    pytest.importorskip("numpy")
+    schema = parse_idl(SHAPES_IDL, "shapes::Named")
+    data = MessageEncoder(schema, kind=EncapsulationKind.DELIMITED_CDR2_LE).encode(
+        NAMED
+    )
+    decoded = MessageDecoder(schema, struct_arrays=True).decode(data)
+    assert decoded["path"]["y"].tolist() == [2.0, 4.0]
+    assert decoded["color"] == 6
+
+
+def test_views_reject_xtypes_headers() -> None:
+    schema = parse_idl(SHAPES_IDL, "shapes::Named")
+    data = MessageEncoder(schema, kind=EncapsulationKind.DELIMITED_CDR2_LE).encode(
+        NAMED
+    )
+    with pytest.raises(ValueError, match="XTypes"):
+        MessageView(data, schema)
+    assert fixed_layout(schema, "shapes::Point") is not None
+    assert fixed_layout(schema, "shapes::Named") is None
+
+
+def test_encapsulation_kind() -> None:
+    schema = parse_idl(SHAPES_IDL, "shapes::Shape")
+    assert encapsulation_kind(schema) == EncapsulationKind.PL_CDR2_LE
+    assert (
+        encapsulation_kind(schema, "shapes::Named", little_endian=False)
+        == EncapsulationKind.DELIMITED_CDR2_BE
+    )
+    assert encapsulation_kind(schema, "shapes::Point") == EncapsulationKind.CDR2_LE
+    assert encapsulation_kind(schema, xcdr2=False) == EncapsulationKind.PL_CDR_LE
+    assert (
+        encapsulation_kind(schema, "shapes::Named", xcdr2=False)
+        == EncapsulationKind.CDR_LE
+    )
@@ -0,0 +1,134 @@
+"""Tests for :mod:`cdr.instrumentation`."""
+
+from __future__ import annotations
+
+from array import array
+
+import pytest
+
+from cdr.decoder import MessageDecoder
+from cdr.encapsulation_kind import EncapsulationKind
+from cdr.instrumentation import CdrStats, InstrumentedCdrReader, InstrumentedCdrWriter
+from cdr.reader import CdrReader
+from cdr.schema import parse_message_definition
+from cdr.writer import CdrWriter
+
+
+def test_writer_counts_operations_bytes_and_padding() -> None:
+    writer = InstrumentedCdrWriter()
+    writer.uint8(1).float64(2.0).string("abc")
+
+    stats = writer.stats
+    assert stats.operations == {"uint8": 1, "float64": 1, "string": 1}
+    assert stats.bytes == {"uint8": 1, "float64": 15, "string": 8}
+    assert stats.padding_bytes == 7
+    assert stats.resizes == 1
+    assert writer.size == 4 + 1 + 15 + 8
+    assert stats.resized_bytes == writer.capacity - CdrWriter.DEFAULT_CAPACITY
+    assert not stats.fallbacks
+
+
+def test_writer_output_matches_plain_writer() -> None:
+    plain = CdrWriter(kind=EncapsulationKind.CDR_BE)
+    instrumented = InstrumentedCdrWriter(kind=EncapsulationKind.CDR_BE)
+    for writer in (plain, instrumented):
+        writer.int16(-2).uint64(5).float32Array([1.0, 2.0], True).emHeader(True, 5, 4)
+    assert instrumented.data == plain.data
+
+
+def test_writer_records_array_fallbacks() -> None:
+    writer = InstrumentedCdrWriter()
+    writer.float32Array([1.0, 2.0, 3.0])
+    writer.float32Array(array("f", [1.0]))
+    writer.int32Array(array("H", [1]))
+    writer.uint8Array([1, 2])
+    writer.uint8Array(b"\x01\x02")
+
+    big_endian = InstrumentedCdrWriter(kind=EncapsulationKind.CDR_BE)
+    big_endian.float64Array(array("d", [1.0]))
+
+    assert writer.stats.fallbacks == {
+        "float32Array: per element (not a buffer)": 1,
+        "int32Array: per element (element type)": 1,
+        "uint8Array: per element (not bytes)": 1,
+    }
+    assert big_endian.stats.fallbacks == {"float64Array: array pack (byte order)": 1}
+    # The per-element loop is counted as one array operation.
+    assert writer.stats.operations["float32Array"] == 2
+    assert "float32" not in writer.stats.operations
+
+
+def test_writer_records_numpy_conversions() -> None:
+    np = pytest.importorskip("numpy")
+    writer = InstrumentedCdrWriter()
+    writer.float64Array(np.arange(4, dtype=np.float64))
+    writer.float64Array(np.arange(4, dtype=">f8"))
+    writer.uint8Array(np.arange(4, dtype=np.uint8))
+    assert writer.stats.fallbacks == {"float64Array: numpy conversion (byte order)": 1}
+
+
+def test_reader_records_list_fallbacks() -> None:
+    for kind in (EncapsulationKind.CDR_LE, EncapsulationKind.CDR_BE):
+        writer = CdrWriter(kind=kind)
+        writer.uint8(0).float64Array([1.0, 2.0], True).int16Array([], True)
+        reader = InstrumentedCdrReader(writer.data)
+        assert list(reader.uint8_array(1)) == [0]
+        assert list(reader.float64_array()) == [1.0, 2.0]
+        assert list(reader.int16_array()) == []
+
+        stats = reader.stats
+        assert stats.operations == {
+            "uint8_array": 1,
+            "float64_array": 1,
+            "int16_array": 1,
+        }
+        assert stats.bytes["float64_array"] == 3 + 4 + 16
+        assert stats.padding_bytes == 3
+        expected = (
+            {
+                "uint8_array: list (byte order)": 1,
+                "float64_array: list (byte order)": 1,
+            }
+            if kind == EncapsulationKind.CDR_BE
+            else {}
+        )
+        assert stats.fallbacks == expected
+
+
+def test_reader_counts_manual_walk() -> None:
+    writer = CdrWriter()
+    writer.int32(1).string("a").float64(2.0).stringArray(["b", "cd"], True)
+    stats = CdrStats()
+    reader = InstrumentedCdrReader(writer.data, stats=stats)
+    reader.int32()
+    reader.string()
+    reader.float64()
+    reader.string_array()
+    assert dict(stats.operations) == {
+        "int32": 1,
+        "string": 1,
+        "float64": 1,
+        "string_array": 1,
+    }
+    assert sum(stats.bytes.values()) == len(writer.data) - 4
+
+
+def test_reader_stats_are_shared_with_clones_and_decoders() -> None:
+    schema = parse_message_definition("string name\nfloat64[] values\n", "pkg/Msg")
+    writer = CdrWriter(kind=EncapsulationKind.CDR_BE)
+    writer.string("abc").float64Array([1.0, 2.0], True)
+    stats = CdrStats()
+    reader = InstrumentedCdrReader(writer.data, stats=stats)
+    clone = reader.clone()
+    assert isinstance(clone, InstrumentedCdrReader)
+    assert clone.stats is stats
+
+    decoded = MessageDecoder(schema).read(clone)
+    assert decoded == MessageDecoder(schema).read(CdrReader(writer.data))
+    # Compiled decoders read strings straight from the buffer.
+    assert dict(stats.operations) == {"float64_array": 1}
+    assert stats.fallbacks == {"float64_array: list (byte order)": 1}
+    assert "float64_array: list (byte order): 1" in stats.report()
+
+    stats.reset()
+    assert stats == CdrStats()
@@ -0,0 +1,115 @@
+"""Tests for :mod:`cdr.member_index`."""
+
+from __future__ import annotations
+
+import pytest
+
+from cdr.encapsulation_kind import EncapsulationKind
+from cdr.member_index import index_members
+from cdr.reader import CdrReader
+from cdr.writer import CdrWriter
+
+PL_KINDS = [
+    EncapsulationKind.PL_CDR_LE,
+    EncapsulationKind.PL_CDR_BE,
+    EncapsulationKind.PL_CDR2_LE,
+    EncapsulationKind.PL_CDR2_BE,
+]
+
+
+def write_struct(kind: EncapsulationKind) -> bytes:
+    """Write a mutable struct with members of various sizes."""
+
+    writer = CdrWriter(kind=kind)
+    cdr2 = kind in (EncapsulationKind.PL_CDR2_LE, EncapsulationKind.PL_CDR2_BE)
+    if cdr2:
+        writer.dHeader(60)
+    writer.emHeader(True, 1, 1).uint8(7)
+    writer.emHeader(False, 2, 8).float64(1.5)
+    writer.emHeader(False, 3, 10, 4 if cdr2 else None).string("hello")
+    writer.emHeader(False, 4, 4).int32(-3)
+    writer.emHeader(False, 0x10000, 8).uint64(42)
+    writer.sentinelHeader()
+    writer.uint32(0xDEADBEEF)
+    return bytes(writer.data)
+
+
+@pytest.mark.parametrize("kind", PL_KINDS)
+def test_index_members_reads_members_in_any_order(kind: EncapsulationKind) -> None:
+    reader = CdrReader(write_struct(kind))
+    index = index_members(reader)
+
+    assert list(index) == [1, 2, 3, 4, 0x10000]
+    assert index[3][1] == 10
+    assert index.reader(0x10000).uint64() == 42
+    assert index.reader(4).int32() == -3
+    assert index.reader(3).string() == "hello"
+    assert index.reader(2).float64() == 1.5
+    assert index.reader(1).uint8() == 7
+    assert reader.offset == index.end
+    assert reader.uint32() == 0xDEADBEEF
+
+
+@pytest.mark.parametrize("kind", PL_KINDS)
+def test_index_members_matches_em_header(kind: EncapsulationKind) -> None:
+    index = index_members(CdrReader(write_struct(kind)))
+    reader = CdrReader(write_struct(kind))
+    if reader.is_cdr2:
+        reader.d_header()
+    for member_id, (offset, size) in index.items():
+        header = reader.em_header()
+        assert (header.id, header.object_size) == (member_id, size)
+        assert reader.offset == offset
+        reader.seek(size)
+
+
+def test_index_members_extended_pid() -> None:
+    writer = CdrWriter(kind=EncapsulationKind.PL_CDR_LE)
+    writer.emHeader(False, 5, 0x10000).uint8Array(bytes(0x10000))
+    writer.emHeader(False, 6, 2).uint16(9)
+    writer.sentinelHeader()
+
+    index = index_members(CdrReader(writer.data))
+
+    assert index[5] == (4 + 12, 0x10000)
+    assert index.reader(6).uint16() == 9
+
+
+def test_member_reader_is_limited_to_the_member() -> None:
+    index = index_members(CdrReader(write_struct(EncapsulationKind.PL_CDR_LE)))
+    reader = index.reader(4)
+    reader.int32()
+
+    assert reader.is_at_end()
+    with pytest.raises(KeyError):
+        index.reader(99)
+
+
+def test_empty_struct() -> None:
+    writer = CdrWriter(kind=EncapsulationKind.PL_CDR_LE)
+    writer.sentinelHeader()
+    index = index_members(CdrReader(writer.data))
+
+    assert len(index) == 0
+    assert index.end == 8
+
+
+def test_index_members_rejects_reserved_pid() -> None:
+    writer = CdrWriter(kind=EncapsulationKind.PL_CDR_LE)
+    writer.uint16(0x3F03).uint16(0)
+
+    with pytest.raises(ValueError, match="Unsupported parameter ID header 3f03"):
+        index_members(CdrReader(writer.data))
+
+
+def test_index_members_rejects_overrun() -> None:
+    writer = CdrWriter(kind=EncapsulationKind.PL_CDR2_LE)
+    writer.dHeader(8).emHeader(False, 1, 8).float64(0.0)
+
+    with pytest.raises(ValueError, match="extends past the end of its struct"):
+        index_members(CdrReader(writer.data))
+
+
+def test_index_members_requires_member_headers() -> None:
+    with pytest.raises(ValueError, match="do not use member headers"):
+        index_members(CdrReader(CdrWriter().uint32(1).data))
@@ -0,0 +1,106 @@
+"""Tests for :mod:`cdr.parallel`."""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+
+import pytest
+
+from cdr.encapsulation_kind import EncapsulationKind
+from cdr.encoder import MessageEncoder
+from cdr.parallel import decode_parallel
+from cdr.reader import CdrReader
+from cdr.schema import parse_message_definition
+from cdr.writer import CdrWriter
+
+LABELLED_DEFINITION = """
+builtin_interfaces/Time stamp
+string label
+float64 value
+int32[] samples
+"""
+
+
+def _labelled_message(i: int) -> dict:
+    return {
+        "stamp": {"sec": i, "nanosec": i + 1},
+        "label": f"item {i}",
+        "value": i / 4,
+        "samples": list(range(i % 5)),
+    }
+
+
+def _read_string_and_uint32(reader: CdrReader) -> tuple[str, int]:
+    return reader.string(), reader.uint32()
+
+
+@pytest.fixture(scope="module")
+def pool() -> Iterator[ProcessPoolExecutor]:
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        yield executor
+
+
+@pytest.mark.parametrize("kind", [EncapsulationKind.CDR_LE, EncapsulationKind.CDR2_BE])
+def test_schema_decoding_preserves_order(
+    pool: ProcessPoolExecutor, kind: EncapsulationKind
+) -> None:
+    schema = parse_message_definition(LABELLED_DEFINITION, "pkg/Labelled")
+    encoder = MessageEncoder(schema, kind=kind)
+    payloads = [encoder.encode(_labelled_message(i)) for i in range(25)]
+
+    decoded = decode_parallel(payloads, schema, executor=pool, chunks_per_worker=3)
+
+    assert len(decoded) == 25
+    for i, message in enumerate(decoded):
+        expected = _labelled_message(i)
+        assert message["stamp"] == expected["stamp"]
+        assert message["label"] == expected["label"]
+        assert message["value"] == expected["value"]
+        assert list(message["samples"]) == expected["samples"]
+
+
+def test_custom_decode_function(pool: ProcessPoolExecutor) -> None:
+    payloads = []
+    for i in range(10):
+        writer = CdrWriter()
+        writer.string(f"msg{i}")
+        writer.uint32(i * 7)
+        payloads.append(writer.data)
+
+    decoded = decode_parallel(payloads, decode=_read_string_and_uint32, executor=pool)
+    assert decoded == [(f"msg{i}", i * 7) for i in range(10)]
+
+
+def test_single_worker_decodes_in_process() -> None:
+    schema = parse_message_definition(LABELLED_DEFINITION, "pkg/Labelled")
+    encoder = MessageEncoder(schema)
+    payloads = [encoder.encode(_labelled_message(i)) for i in range(3)]
+
+    decoded = decode_parallel(payloads, schema, max_workers=1)
+    assert [message["label"] for message in decoded] == ["item 0", "item 1", "item 2"]
+
+
+def test_single_worker_matches_pool(pool: ProcessPoolExecutor) -> None:
+    schema = parse_message_definition(LABELLED_DEFINITION, "pkg/Labelled")
+    encoder = MessageEncoder(schema)
+    payloads = [encoder.encode(_labelled_message(i)) for i in range(6)]
+
+    in_process = decode_parallel(payloads, schema, max_workers=1)
+    pooled = decode_parallel(payloads, schema, executor=pool)
+    for local, remote in zip(in_process, pooled):
+        assert type(local["samples"]) is type(remote["samples"])
+        assert not isinstance(local["samples"], memoryview)
+        assert list(local["samples"]) == list(remote["samples"])
+
+
+def test_empty_batch() -> None:
+    assert decode_parallel([], decode=_read_string_and_uint32) == []
+
+
+def test_requires_exactly_one_decoder() -> None:
+    schema = parse_message_definition(LABELLED_DEFINITION, "pkg/Labelled")
+    with pytest.raises(ValueError):
+        decode_parallel([b"\x00\x01\x00\x00"])
+    with pytest.raises(ValueError):
+        decode_parallel([], schema, decode=_read_string_and_uint32)
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
 import math
+import mmap
+from pathlib import Path
 from typing import Sequence
 
 import pytest
 
 from cdr.encapsulation_kind import EncapsulationKind
+from cdr.encoder import MessageEncoder
+from cdr.idl import parse_idl
 from cdr.reader import CdrReader
+from cdr.schema import parse_message_definition
 from cdr.writer import CdrWriter
 
 TF2_MSG_TFMESSAGE = (
@@ -161,6 +166,25 @@ def test_reads_string_array() -> None:
     assert reader.offset == len(writer.data)
 
 
+@pytest.mark.parametrize("kind", [EncapsulationKind.CDR_LE, EncapsulationKind.CDR_BE])
+def test_string_array_matches_string_reads(kind: EncapsulationKind) -> None:
+    values = ["joint_1", "", "ünïcode", "x" * 2000, "a"]
+    writer = CdrWriter(kind=kind)
+    writer.uint8(1)
+    for value in values:
+        writer.string(value)
+    writer.uint8(2)
+
+    reader = CdrReader(writer.data)
+    assert reader.uint8() == 1
+    assert reader.string_array(len(values)) == values
+    assert reader.uint8() == 2
+    assert reader.is_at_end()
+    reader.seek_to(5)
+    assert reader.string_array(0) == []
+    assert reader.offset == 5
+
+
 @pytest.mark.parametrize(
     "writer_key,reader_key",
     [
@@ -227,6 +251,84 @@ def test_array_falls_back_on_endian_mismatch() -> None:
     assert arr == [1, 2, 3]
 
 
+@pytest.mark.parametrize("kind", [EncapsulationKind.CDR_LE, EncapsulationKind.CDR_BE])
+@pytest.mark.parametrize(
+    "getter,setter,values,dtype",
+    [
+        ("int8_array", "int8", [-1, 2, 3], "i1"),
+        ("uint8_array", "uint8", [1, 2, 3], "u1"),
+        ("int16_array", "int16", [-1, 2, 3], "i2"),
+        ("uint16_array", "uint16", [1, 2, 3], "u2"),
+        ("int32_array", "int32", [-1, 2, 3], "i4"),
+        ("uint32_array", "uint32", [1, 2, 3], "u4"),
+        ("int64_array", "int64", [-1, 2, 3], "i8"),
+        ("uint64_array", "uint64", [1, 2, 3], "u8"),
+        ("float32_array", "float32", [1.5, 2.5, 3.5], "f4"),
+        ("float64_array", "float64", [1.5, 2.5, 3.5], "f8"),
+    ],
+)
+def test_array_returns_numpy_view_in_stream_byte_order(
+    kind: EncapsulationKind,
+    getter: str,
+    setter: str,
+    values: list[int | float],
+    dtype: str,
+) -> None:
+    np = pytest.importorskip("numpy")
+    writer = CdrWriter(kind=kind)
+    _write_array(writer, setter, values)
+    # CDR aligns relative to the end of the 4-byte header, so place the header
+    # at an address that is 4 modulo 8 to make the payload aligned in memory.
+    backing = np.zeros(len(writer.data) + 4, dtype=np.uint8)
+    backing[4:] = np.frombuffer(writer.data, dtype=np.uint8)
+
+    reader = CdrReader(memoryview(backing)[4:])
+    result = getattr(reader, getter)(as_numpy=True)
+    assert isinstance(result, np.ndarray)
+    assert result.dtype.newbyteorder("=") == np.dtype(dtype)
+    if result.dtype.itemsize > 1:
+        expected_order = "<" if kind == EncapsulationKind.CDR_LE else ">"
+        assert result.dtype.str[0] == expected_order
+    assert np.shares_memory(result, backing)
+    assert result.tolist() == values
+    assert reader.offset == len(writer.data)
+
+
+def test_numpy_reader_flag_and_override() -> None:
+    np = pytest.importorskip("numpy")
+    writer = CdrWriter(kind=EncapsulationKind.CDR_BE)
+    writer.float32Array([1.0, 2.0], True)
+    writer.float32Array([3.0], True)
+
+    reader = CdrReader(writer.data, as_numpy=True)
+    assert isinstance(reader.float32_array(), np.ndarray)
+    assert reader.float32_array(as_numpy=False) == [3.0]
+    assert reader.clone().as_numpy is True
+
+
+def test_numpy_copies_misaligned_data_once() -> None:
+    pytest.importorskip("numpy")
+    writer = CdrWriter()
+    writer.float64Array([1.0, 2.0, 3.0], True)
+    # Shift the payload by one byte so the elements are misaligned in memory.
+    data = memoryview(b"\x00" + writer.data)[1:]
+
+    result = CdrReader(data).float64_array(as_numpy=True)
+    assert result.flags.aligned
+    assert result.tolist() == [1.0, 2.0, 3.0]
+
+
+def test_numpy_empty_array() -> None:
+    np = pytest.importorskip("numpy")
+    writer = CdrWriter()
+    writer.float64Array([], True)
+    reader = CdrReader(writer.data)
+    result = reader.float64_array(as_numpy=True)
+    assert result.shape == (0,)
+    assert result.dtype == np.dtype("<f8")
+    assert reader.offset == len(writer.data)
+
+
 @pytest.mark.parametrize(
     "must_understand,pid,object_size",
     [
@@ -411,6 +513,148 @@ def test_is_at_end() -> None:
     assert reader.is_at_end() is True
 
 
+def test_skip_string() -> None:
+    writer = CdrWriter()
+    writer.uint8(1).string("hello").string("").uint32(7)
+    reader = CdrReader(writer.data)
+    reader.uint8()
+    reader.skip_string()
+    reader.skip_string()
+    assert reader.uint32() == 7
+
+
+@pytest.mark.parametrize("kind", [EncapsulationKind.CDR_LE, EncapsulationKind.CDR2_BE])
+def test_skip_sequence(kind: EncapsulationKind) -> None:
+    writer = CdrWriter(kind=kind)
+    writer.uint8(1).float64Array([1.0, 2.0, 3.0], True).uint8(2)
+    writer.uint16Array([], True).int16Array([4, 5], False).uint8(3)
+    reader = CdrReader(writer.data)
+    reader.uint8()
+    reader.skip_sequence(8)
+    assert reader.uint8() == 2
+    reader.skip_sequence(2)
+    reader.skip_sequence(2, 2)
+    assert reader.uint8() == 3
+
+
+def test_skip_sequence_rejects_invalid_element_size() -> None:
+    reader = CdrReader(CdrWriter().uint32(1).data)
+    with pytest.raises(ValueError, match="Invalid element size 3"):
+        reader.skip_sequence(3)
+
+
+def test_skip_delimited() -> None:
+    writer = CdrWriter(kind=EncapsulationKind.DELIMITED_CDR2_LE)
+    writer.dHeader(16).uint64(1).string("abc").uint32(5)
+    reader = CdrReader(writer.data)
+    reader.skip_delimited()
+    assert reader.uint32() == 5
+
+
+def test_skip_message() -> None:
+    schema = parse_message_definition(
+        """
+string name
+string[] tags
+Point[] points
+float32[] values
+uint8 flag
+================================================================================
+MSG: geometry_msgs/Point
+float64 x
+float64 y
+float64 z
+""",
+        "pkg/Tagged",
+    )
+    writer = CdrWriter()
+    writer.string("name").stringArray(["a", "bc"], True)
+    writer.sequenceLength(2)
+    for value in range(6):
+        writer.float64(value)
+    writer.float32Array([1.0], True).uint8(1).uint32(77)
+    reader = CdrReader(writer.data)
+    reader.skip(schema)
+    assert reader.uint32() == 77
+
+    reader = CdrReader(writer.data)
+    reader.skip_string()
+    reader.skip_sequence(1, 0)
+    reader.string_array()
+    reader.sequence_length()
+    reader.skip(schema, "geometry_msgs/Point")
+    assert reader.float64() == 3.0
+
+
+XTYPES_IDL = """
+@final struct Point { double x; double y; };
+@appendable struct Named { string name; sequence<Point> path; @optional long n; };
+@mutable struct Shape {
+  long id;
+  @optional double weight;
+  Named named;
+  sequence<octet> data;
+  @optional string label;
+};
+@final struct Outer { Shape shape; Named named[2]; @optional Point p; };
+"""
+
+XTYPES_NAMED = {"name": "a", "path": [{"x": 1.0, "y": 2.0}], "n": None}
+XTYPES_SHAPE = {
+    "id": 1,
+    "weight": 2.5,
+    "named": XTYPES_NAMED,
+    "data": bytes(70000),
+    "label": None,
+}
+
+
+@pytest.mark.parametrize(
+    "kind",
+    [
+        EncapsulationKind.CDR_LE,
+        EncapsulationKind.PL_CDR_BE,
+        EncapsulationKind.CDR2_LE,
+        EncapsulationKind.DELIMITED_CDR2_BE,
+        EncapsulationKind.PL_CDR2_LE,
+    ],
+)
+@pytest.mark.parametrize(
+    "type_name, message",
+    [
+        ("Named", XTYPES_NAMED),
+        ("Shape", XTYPES_SHAPE),
+        (
+            "Outer",
+            {
+                "shape": XTYPES_SHAPE,
+                "named": [XTYPES_NAMED, {**XTYPES_NAMED, "n": 3}],
+                "p": {"x": 0.0, "y": 1.0},
+            },
+        ),
+    ],
+)
+def test_skip_xtypes_message(
+    kind: EncapsulationKind, type_name: str, message: dict
+) -> None:
+    schema = parse_idl(XTYPES_IDL, type_name)
+    data = MessageEncoder(schema, kind=kind).encode(message) + bytes(8)
+    reader = CdrReader(data)
+    reader.skip(schema)
+    assert reader.offset == len(data) - 8
+
+    with pytest.raises(ValueError):
+        CdrReader(data[: len(data) // 2]).skip(schema)
+
+
+def test_skip_raises_past_end() -> None:
+    writer = CdrWriter()
+    writer.uint32(100).uint8(0)
+    reader = CdrReader(writer.data)
+    with pytest.raises(ValueError, match="exceeds the data of 9 bytes"):
+        reader.skip_string()
+
+
 def _write_array(writer: CdrWriter, setter: str, values: list[int | float]) -> None:
     writer.sequenceLength(len(values))
     for value in values:
@@ -430,3 +674,42 @@ def _approx_list(
 ) -> bool:
     _assert_close_list(actual, expected, digits)
     return True
+
+
+def test_from_file_maps_payload_zero_copy(tmp_path: Path) -> None:
+    writer = CdrWriter()
+    writer.uint32(7)
+    writer.float32Array([1.5, 2.5], True)
+    path = tmp_path / "payload.bin"
+    # Place the payload past the first allocation granule of the file.
+    offset = mmap.ALLOCATIONGRANULARITY + 3
+    path.write_bytes(bytes(offset) + writer.data + b"trailing")
+
+    reader = CdrReader.from_file(path, offset, len(writer.data))
+    assert reader.byte_length == len(writer.data)
+    assert reader.uint32() == 7
+    values = reader.float32_array()
+    assert isinstance(values, memoryview)
+    assert isinstance(values.obj, mmap.mmap)
+    assert list(values) == [1.5, 2.5]
+    assert reader.is_at_end()
+
+
+def test_from_file_defaults_to_rest_of_file(tmp_path: Path) -> None:
+    path = tmp_path / "payload.bin"
+    path.write_bytes(bytes.fromhex(TF2_MSG_TFMESSAGE))
+
+    reader = CdrReader.from_file(path, as_numpy=True)
+    assert reader.as_numpy is True
+    assert reader.sequence_length() == 1
+    assert reader.byte_length == len(bytes.fromhex(TF2_MSG_TFMESSAGE))
+
+
+def test_from_file_rejects_out_of_range(tmp_path: Path) -> None:
+    path = tmp_path / "payload.bin"
+    path.write_bytes(bytes.fromhex(TF2_MSG_TFMESSAGE))
+
+    with pytest.raises(ValueError, match="outside"):
+        CdrReader.from_file(path, 8, 1000)
+    with pytest.raises(ValueError, match="at least a 4-byte header"):
+        CdrReader.from_file(path, 0, 2)
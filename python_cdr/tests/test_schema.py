@@ -0,0 +1,104 @@
+"""Tests for :mod:`cdr.schema`."""
+
+from __future__ import annotations
+
+import pytest
+
+from cdr.schema import parse_message_definition
+
+TF2_MSG_DEFINITION = """
+geometry_msgs/TransformStamped[] transforms
+================================================================================
+MSG: geometry_msgs/TransformStamped
+std_msgs/Header header
+string child_frame_id # the frame id of the child frame
+Transform transform
+================================================================================
+MSG: std_msgs/Header
+builtin_interfaces/Time stamp
+string frame_id
+================================================================================
+MSG: geometry_msgs/Transform
+Vector3 translation
+Quaternion rotation
+================================================================================
+MSG: geometry_msgs/Vector3
+float64 x
+float64 y
+float64 z
+================================================================================
+MSG: geometry_msgs/Quaternion
+float64 x 0
+float64 y 0
+float64 z 0
+float64 w 1
+"""
+
+
+def test_parses_concatenated_definitions() -> None:
+    schema = parse_message_definition(TF2_MSG_DEFINITION, "tf2_msgs/msg/TFMessage")
+    assert schema.root == "tf2_msgs/TFMessage"
+
+    (transforms,) = schema.root_definition.fields
+    assert transforms.type == "geometry_msgs/TransformStamped"
+    assert transforms.is_complex and transforms.is_sequence
+
+    stamped = schema["geometry_msgs/TransformStamped"]
+    assert [f.name for f in stamped.fields] == [
+        "header",
+        "child_frame_id",
+        "transform",
+    ]
+    assert stamped.fields[2].type == "geometry_msgs/Transform"
+    # builtin_interfaces/Time is provided even though it is not listed
+    assert [f.name for f in schema["builtin_interfaces/Time"].fields] == [
+        "sec",
+        "nanosec",
+    ]
+    assert [f.name for f in schema["geometry_msgs/Quaternion"].fields] == [
+        "x",
+        "y",
+        "z",
+        "w",
+    ]
+
+
+def test_parses_arrays_bounds_and_constants() -> None:
+    schema = parse_message_definition(
+        """
+        # comment line
+        int32 FOO=42 # trailing comment
+        string BAR="a # b"
+        uint8[4] fixed
+        float32[] dynamic
+        int16[<=3] bounded
+        string<=10 name
+        string<=5[<=2] names
+        """
+    )
+    definition = schema.root_definition
+    assert [(c.name, c.value) for c in definition.constants] == [
+        ("FOO", "42"),
+        ("BAR", '"a # b"'),
+    ]
+    fixed, dynamic, bounded, name, names = definition.fields
+    assert fixed.array_length == 4 and not fixed.is_sequence
+    assert dynamic.is_sequence and dynamic.array_length is None
+    assert bounded.is_sequence and bounded.array_upper_bound == 3
+    assert not name.is_array and name.string_upper_bound == 10
+    assert names.is_sequence and names.string_upper_bound == 5
+
+
+@pytest.mark.parametrize(
+    "definition",
+    [
+        "int32",
+        "int32 1abc",
+        "unknown_pkg/Missing field",
+        "float64<=3 bounded_float",
+        "int32[<=] x",
+    ],
+)
+def test_rejects_invalid_definitions(definition: str) -> None:
+    with pytest.raises(ValueError):
+        parse_message_definition(definition)
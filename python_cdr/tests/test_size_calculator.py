@@ -2,7 +2,12 @@
 
 from __future__ import annotations
 
+import pytest
+
+from cdr.encapsulation_kind import EncapsulationKind
+from cdr.length_codes import LengthCode
 from cdr.size_calculator import CdrSizeCalculator
+from cdr.writer import CdrWriter
 
 
 def test_calculates_example_message() -> None:
@@ -105,3 +110,88 @@ def test_all_data_types_with_padding() -> None:
     assert calc.float32() == 44
     assert calc.uint8() == 45
     assert calc.float64() == 60
+
+
+@pytest.mark.parametrize("kind", list(EncapsulationKind))
+def test_matches_writer_for_every_kind(kind: EncapsulationKind) -> None:
+    writer = CdrWriter(kind=kind)
+    calc = CdrSizeCalculator(kind)
+
+    steps = [
+        (lambda: writer.uint8(1), calc.uint8),
+        (lambda: writer.float64(2.0), calc.float64),
+        (lambda: writer.int16(3), calc.int16),
+        (lambda: writer.uint64(4), calc.uint64),
+        (lambda: writer.string("abc"), lambda: calc.string(3)),
+        (lambda: writer.int64(5), calc.int64),
+        (
+            lambda: writer.float32Array([1.0, 2.0], True),
+            lambda: calc.float32_array(2, True),
+        ),
+        (lambda: writer.uint8(6), calc.uint8),
+        (lambda: writer.float64Array([1.0] * 3), lambda: calc.float64_array(3)),
+        (lambda: writer.uint8Array(bytes(5), True), lambda: calc.uint8_array(5, True)),
+        (lambda: writer.int64Array([1, 2], True), lambda: calc.int64_array(2, True)),
+        (lambda: writer.int16Array([], True), lambda: calc.int16_array(0, True)),
+        (lambda: writer.uint16Array([1]), lambda: calc.uint16_array(1)),
+        (lambda: writer.uint64Array([7]), lambda: calc.uint64_array(1)),
+        (lambda: writer.dHeader(12), calc.d_header),
+        (lambda: writer.int8Array([1, 2, 3]), lambda: calc.int8_array(3)),
+        (lambda: writer.uint32Array([1, 2], True), lambda: calc.uint32_array(2, True)),
+        (lambda: writer.int32Array([3]), lambda: calc.int32_array(1)),
+    ]
+    for write, account in steps:
+        write()
+        assert account() == writer.size
+
+
+@pytest.mark.parametrize(
+    "kind",
+    [
+        EncapsulationKind.PL_CDR_LE,
+        EncapsulationKind.PL_CDR2_BE,
+        EncapsulationKind.DELIMITED_CDR2_LE,
+    ],
+)
+@pytest.mark.parametrize(
+    "must_understand, id, object_size, length_code",
+    [
+        (True, 100, 1, None),
+        (False, 200, 8, None),
+        (False, 0x3F01, 4, None),
+        (False, 5, 0x10000, None),
+        (True, 63, 9, 4),
+        (False, 65, 12, 6),
+        (False, 65, 32, 7),
+        (False, 65, 4, 2),
+    ],
+)
+def test_member_headers_match_writer(
+    kind: EncapsulationKind,
+    must_understand: bool,
+    id: int,
+    object_size: int,
+    length_code: LengthCode | None,
+) -> None:
+    writer = CdrWriter(kind=kind)
+    calc = CdrSizeCalculator(kind)
+    writer.uint8(1)
+    calc.uint8()
+
+    writer.emHeader(must_understand, id, object_size, length_code)
+    assert calc.em_header(must_understand, id, object_size, length_code) == writer.size
+    # Parameter list headers reset the alignment origin.
+    writer.uint8(2)
+    writer.float64(3.0)
+    calc.uint8()
+    assert calc.float64() == writer.size
+    writer.sentinelHeader()
+    assert calc.sentinel_header() == writer.size
+
+
+def test_xcdr2_aligns_eight_byte_values_to_four() -> None:
+    calc = CdrSizeCalculator(EncapsulationKind.CDR2_LE)
+    assert calc.eight_byte_alignment == 4
+    calc.uint8()
+    assert calc.float64() == 16
+    assert calc.float64_array(1000) == 8016
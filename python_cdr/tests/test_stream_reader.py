@@ -0,0 +1,183 @@
+"""Tests for :mod:`cdr.stream_reader`."""
+
+from __future__ import annotations
+
+import io
+import os
+import socket
+import threading
+
+import pytest
+
+from cdr.encapsulation_kind import EncapsulationKind
+from cdr.reader import CdrReader
+from cdr.stream_reader import CdrStreamReader
+from cdr.writer import CdrWriter
+
+TF2_MSG_TFMESSAGE = (
+    "0001000001000000cce0d158f08cf9060a000000626173655f6c696e6b0000000600000072616461"
+    "72000000ae47e17a14ae0e4000000000000000000000000000000000000000000000000000000000"
+    "000000000000000000000000000000000000f03f"
+)
+
+
+class _ReadOnlyStream:
+    """A stream offering only ``read``, returning few bytes at a time."""
+
+    def __init__(self, data: bytes) -> None:
+        self._data = io.BytesIO(data)
+
+    def read(self, size: int) -> bytes:
+        return self._data.read(min(size, 3))
+
+
+def _write_mixed(writer: CdrWriter) -> None:
+    writer.uint8(1)
+    writer.int64(-2)
+    writer.string("a label")
+    writer.float32Array([0.5, 1.5, 2.5], True)
+    writer.uint16(7)
+    writer.float64Array([1.0, 2.0], True)
+    writer.uint8Array(bytes(range(200)), True)
+    writer.sequenceLength(2)
+    writer.string("x" * 40)
+    writer.string("")
+    writer.int32Array([], True)
+    writer.float64(9.5)
+
+
+def _read_mixed(reader: CdrReader | CdrStreamReader) -> list:
+    return [
+        reader.uint8(),
+        reader.int64(),
+        reader.string(),
+        list(reader.float32_array()),
+        reader.uint16(),
+        list(reader.float64_array()),
+        bytes(reader.uint8_array()),
+        reader.string_array(),
+        list(reader.int32_array()),
+        reader.float64(),
+    ]
+
+
+def test_parses_example_tf2_message() -> None:
+    data = bytes.fromhex(TF2_MSG_TFMESSAGE)
+    reader = CdrStreamReader(io.BytesIO(data), buffer_size=16)
+
+    assert reader.kind == EncapsulationKind.CDR_LE
+    assert reader.sequence_length() == 1
+    assert reader.uint32() == 1490149580
+    assert reader.uint32() == 117017840
+    assert reader.string() == "base_link"
+    assert reader.string() == "radar"
+    assert reader.float64() == pytest.approx(3.835)
+    for expected in (0, 0, 0, 0, 0, 1):
+        assert reader.float64() == pytest.approx(expected)
+    assert reader.decoded_bytes == len(data)
+
+
+@pytest.mark.parametrize("kind", list(EncapsulationKind))
+@pytest.mark.parametrize("buffer_size", [16, 37, 4096])
+def test_matches_in_memory_reader(kind: EncapsulationKind, buffer_size: int) -> None:
+    writer = CdrWriter(kind=kind)
+    _write_mixed(writer)
+    data = writer.data
+
+    reader = CdrStreamReader(io.BytesIO(data), buffer_size=buffer_size)
+    assert _read_mixed(reader) == _read_mixed(CdrReader(data))
+    assert reader.offset == len(data)
+
+
+def test_reads_from_read_only_stream() -> None:
+    writer = CdrWriter()
+    _write_mixed(writer)
+    reader = CdrStreamReader(_ReadOnlyStream(writer.data), buffer_size=16)
+    assert _read_mixed(reader) == _read_mixed(CdrReader(writer.data))
+
+
+def test_reads_from_socket() -> None:
+    writer = CdrWriter()
+    _write_mixed(writer)
+    data = writer.data
+
+    receiver, sender = socket.socketpair()
+    with receiver, sender:
+        thread = threading.Thread(target=sender.sendall, args=(data,))
+        thread.start()
+        reader = CdrStreamReader(receiver, buffer_size=32)
+        assert _read_mixed(reader) == _read_mixed(CdrReader(data))
+        thread.join()
+
+
+def test_reads_available_bytes_from_pipe() -> None:
+    writer = CdrWriter()
+    _write_mixed(writer)
+    data = writer.data
+    results = []
+
+    read_fd, write_fd = os.pipe()
+
+    def read() -> None:
+        with os.fdopen(read_fd, "rb") as source:
+            results.append(_read_mixed(CdrStreamReader(source)))
+
+    thread = threading.Thread(target=read, daemon=True)
+    thread.start()
+    try:
+        for start in range(0, len(data), 50):
+            os.write(write_fd, data[start : start + 50])
+        # The payload is complete while the pipe is still open.
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+    finally:
+        os.close(write_fd)
+    assert results == [_read_mixed(CdrReader(data))]
+
+
+def test_reads_consecutive_payloads() -> None:
+    first = CdrWriter()
+    first.string("first")
+    second = CdrWriter(kind=EncapsulationKind.CDR_BE)
+    second.uint32(42)
+
+    reader = CdrStreamReader(io.BytesIO(first.data + second.data))
+    assert reader.string() == "first"
+    reader.next_payload()
+    assert reader.kind == EncapsulationKind.CDR_BE
+    assert reader.uint32() == 42
+
+
+def test_round_trip_emheader() -> None:
+    writer = CdrWriter(kind=EncapsulationKind.PL_CDR2_LE)
+    writer.emHeader(True, 100, 12, 6)
+    writer.sentinelHeader()
+
+    reader = CdrStreamReader(io.BytesIO(writer.data))
+    header = reader.em_header()
+    assert (header.id, header.object_size, header.must_understand) == (100, 12, True)
+
+
+def test_numpy_arrays_do_not_alias_the_buffer() -> None:
+    np = pytest.importorskip("numpy")
+    writer = CdrWriter(kind=EncapsulationKind.CDR_BE)
+    writer.float64Array([1.0, 2.0, 3.0], True)
+
+    reader = CdrStreamReader(io.BytesIO(writer.data), as_numpy=True)
+    array = reader.float64_array()
+    assert array.dtype == np.dtype(">f8")
+    assert array.tolist() == [1.0, 2.0, 3.0]
+    assert not np.shares_memory(array, np.frombuffer(reader._buffer, dtype=np.uint8))
+
+
+def test_raises_on_truncated_stream() -> None:
+    writer = CdrWriter()
+    writer.uint8Array(bytes(100), True)
+    reader = CdrStreamReader(io.BytesIO(writer.data[:50]), buffer_size=16)
+    with pytest.raises(ValueError, match="Unexpected end of stream"):
+        reader.uint8_array()
+
+
+def test_rejects_tiny_buffer() -> None:
+    with pytest.raises(ValueError):
+        CdrStreamReader(io.BytesIO(b"\x00\x01\x00\x00"), buffer_size=4)
@@ -0,0 +1,83 @@
+"""Tests for :mod:`cdr.string_cache`."""
+
+from __future__ import annotations
+
+import pytest
+
+from cdr.decoder import MessageDecoder
+from cdr.encoder import MessageEncoder
+from cdr.reader import CdrReader
+from cdr.schema import parse_message_definition
+from cdr.string_cache import COPY_FREE_LENGTH, StringCache
+from cdr.writer import CdrWriter
+
+DEFINITION = """
+string frame_id
+string[] names
+string[2] pair
+"""
+
+
+def test_cache_returns_shared_strings_and_evicts_oldest() -> None:
+    cache = StringCache(maxsize=2)
+    first = cache.decode(b"base_link")
+    assert first == "base_link"
+    assert cache.decode(bytes(b"base_link")) is first
+    cache.decode("grüße".encode())
+    cache.decode(b"odom")
+    assert len(cache) == 2
+    assert cache.decode(b"base_link") is not first
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.maxsize == 2
+    with pytest.raises(ValueError):
+        StringCache(maxsize=0)
+
+
+def test_reader_interns_strings() -> None:
+    long_text = "x" * COPY_FREE_LENGTH
+    writer = CdrWriter()
+    writer.string("map").string("map").string("").string(long_text)
+    writer.string("ünïcode")
+
+    cache = StringCache()
+    reader = CdrReader(writer.data, string_cache=cache)
+    first = reader.string()
+    assert reader.clone().string() is first
+    assert reader.string() is first
+    assert reader.string() == ""
+    assert reader.string() == long_text
+    assert reader.string() == "ünïcode"
+    assert reader.is_at_end()
+    # Long strings are decoded from the buffer without being cached.
+    assert len(cache) == 2
+
+
+@pytest.mark.parametrize("interned", [False, True])
+def test_decoder_strings(interned: bool) -> None:
+    schema = parse_message_definition(DEFINITION, "pkg/Strings")
+    message = {
+        "frame_id": "base_link",
+        "names": ["a", "", "ß" * COPY_FREE_LENGTH, "base_link"],
+        "pair": ["base_link", "b"],
+    }
+    data = MessageEncoder(schema).encode(message)
+    cache = StringCache() if interned else None
+    decoder = MessageDecoder(schema, string_cache=cache)
+
+    first = decoder.decode(data)
+    second = decoder.decode(data)
+    assert first == second == message
+    assert (first["frame_id"] is second["frame_id"]) is interned
+    if interned:
+        assert first["names"][3] is first["frame_id"]
+        assert first["pair"][0] is first["frame_id"]
+
+
+def test_invalid_utf8_raises() -> None:
+    writer = CdrWriter()
+    writer.uint32(3).uint8Array(b"\xff\xfe\x00")
+    for cache in (None, StringCache()):
+        with pytest.raises(UnicodeDecodeError):
+            CdrReader(writer.data, string_cache=cache).string()
@@ -0,0 +1,192 @@
+"""Tests for :mod:`cdr.struct_array`."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from cdr.decoder import MessageDecoder
+from cdr.encapsulation_kind import EncapsulationKind
+from cdr.encoder import MessageEncoder
+from cdr.reader import CdrReader
+from cdr.schema import parse_message_definition
+from cdr.struct_array import is_struct_array_type, read_struct_array
+
+np = pytest.importorskip("numpy")
+
+DEFINITION = """
+uint8 flag
+Point[] points
+Pose[] poses
+Triangle[2] triangles
+Odd[] odd
+Label[] labels
+Gapped[] gapped
+================================================================================
+MSG: geometry_msgs/Point
+float64 x
+float64 y
+float64 z
+================================================================================
+MSG: geometry_msgs/Quaternion
+float64 x
+float64 y
+float64 z
+float64 w
+================================================================================
+MSG: geometry_msgs/Pose
+Point position
+Quaternion orientation
+================================================================================
+MSG: pkg/Triangle
+uint8 id
+float32[2] weights
+Point[3] corners
+================================================================================
+MSG: pkg/Odd
+uint8 a
+float64 b
+uint8 c
+================================================================================
+MSG: pkg/Label
+string text
+================================================================================
+MSG: pkg/Gapped
+Odd[2] pair
+"""
+
+
+def _point(index: int) -> dict[str, float]:
+    return {"x": index + 0.5, "y": -index, "z": 2.0 * index}
+
+
+def _message() -> dict[str, Any]:
+    return {
+        "flag": 1,
+        "points": [_point(i) for i in range(5)],
+        "poses": [
+            {
+                "position": _point(i),
+                "orientation": {"x": 0.0, "y": 0.0, "z": float(i), "w": 1.0},
+            }
+            for i in range(3)
+        ],
+        "triangles": [
+            {"id": i, "weights": [1.0, 2.0], "corners": [_point(j) for j in range(3)]}
+            for i in range(2)
+        ],
+        "odd": [{"a": i, "b": i / 4, "c": 255 - i} for i in range(4)],
+        "labels": [{"text": "a"}],
+        "gapped": [{"pair": [{"a": 1, "b": 2.0, "c": 3}] * 2}],
+    }
+
+
+def _records(array: Any) -> list[Any]:
+    """Convert a structured array to the decoder's list of dicts."""
+
+    def convert(value: Any) -> Any:
+        if value.dtype.names is not None:
+            if value.ndim:
+                return [convert(item) for item in value]
+            return {name: convert(value[name]) for name in value.dtype.names}
+        return value.tolist()
+
+    return [convert(item) for item in array]
+
+
+@pytest.mark.parametrize(
+    "kind",
+    [EncapsulationKind.CDR_LE, EncapsulationKind.CDR_BE, EncapsulationKind.CDR2_LE],
+)
+def test_reads_sequences_of_fixed_size_messages(kind: EncapsulationKind) -> None:
+    schema = parse_message_definition(DEFINITION, "pkg/Shapes")
+    message = _message()
+    data = MessageEncoder(schema, kind=kind).encode(message)
+    reader = CdrReader(data)
+    assert reader.uint8() == 1
+
+    points = read_struct_array(reader, schema, "geometry_msgs/Point")
+    poses = read_struct_array(reader, schema, "geometry_msgs/Pose")
+    triangles = read_struct_array(reader, schema, "pkg/Triangle", 2)
+    odd = read_struct_array(reader, schema, "pkg/Odd")
+
+    assert _records(points) == message["points"]
+    assert _records(poses) == message["poses"]
+    assert _records(triangles) == message["triangles"]
+    assert _records(odd) == message["odd"]
+    assert poses["position"]["x"].tolist() == [0.5, 1.5, 2.5]
+    assert triangles["corners"].shape == (2, 3)
+
+    # The reader continues after the last element.
+    assert reader.sequence_length() == 1
+
+    native = kind != EncapsulationKind.CDR_BE
+    assert np.shares_memory(points, np.frombuffer(data, np.uint8)) == native
+    assert np.shares_memory(triangles, np.frombuffer(data, np.uint8)) == native
+    assert points.dtype.isnative
+
+
+def test_first_element_with_other_padding_is_copied() -> None:
+    schema = parse_message_definition(DEFINITION, "pkg/Shapes")
+    data = MessageEncoder(schema).encode(_message())
+    reader = CdrReader(data)
+    reader.uint8()
+    for type_name in ("geometry_msgs/Point", "geometry_msgs/Pose"):
+        read_struct_array(reader, schema, type_name)
+    read_struct_array(reader, schema, "pkg/Triangle", 2)
+
+    # The first pkg/Odd starts four bytes before an eight byte boundary,
+    # the others one byte after one, so ``b`` is padded differently.
+    odd = read_struct_array(reader, schema, "pkg/Odd")
+    assert odd["b"].tolist() == [0.0, 0.25, 0.5, 0.75]
+    assert not np.shares_memory(odd, np.frombuffer(data, np.uint8))
+
+
+def test_empty_sequence_and_truncated_data() -> None:
+    schema = parse_message_definition(DEFINITION, "pkg/Shapes")
+    message = {**_message(), "points": []}
+    data = MessageEncoder(schema).encode(message)
+    reader = CdrReader(data)
+    reader.uint8()
+    points = read_struct_array(reader, schema, "geometry_msgs/Point")
+    assert points.shape == (0,)
+    assert points.dtype.names == ("x", "y", "z")
+
+    reader = CdrReader(data[:40])
+    reader.uint8()
+    with pytest.raises(ValueError):
+        read_struct_array(reader, schema, "geometry_msgs/Point", 2)
+
+
+def test_rejects_unsupported_types() -> None:
+    schema = parse_message_definition(DEFINITION, "pkg/Shapes")
+    assert is_struct_array_type(schema, "geometry_msgs/Pose")
+    assert is_struct_array_type(schema, "pkg/Odd", 4)
+    assert not is_struct_array_type(schema, "pkg/Label")
+    # Elements of ``pair`` are followed by padding, so they are not a
+    # contiguous subarray.
+    assert not is_struct_array_type(schema, "pkg/Gapped")
+
+    data = MessageEncoder(schema).encode(_message())
+    with pytest.raises(ValueError):
+        read_struct_array(CdrReader(data), schema, "pkg/Label", 1)
+
+
+@pytest.mark.parametrize("kind", [EncapsulationKind.CDR_LE, EncapsulationKind.CDR_BE])
+def test_decoder_returns_structured_arrays(kind: EncapsulationKind) -> None:
+    schema = parse_message_definition(DEFINITION, "pkg/Shapes")
+    message = _message()
+    data = MessageEncoder(schema, kind=kind).encode(message)
+
+    decoded = MessageDecoder(schema, struct_arrays=True).decode(data)
+    for name in ("points", "poses", "odd"):
+        assert isinstance(decoded[name], np.ndarray)
+        assert _records(decoded[name]) == message[name]
+    # Fixed-size arrays and unsupported element types are still decoded to
+    # dictionaries.
+    assert decoded["triangles"] == message["triangles"]
+    assert decoded["labels"] == message["labels"]
+    assert decoded["gapped"] == message["gapped"]
+
+    assert MessageDecoder(schema).decode(data)["points"] == message["points"]
@@ -0,0 +1,219 @@
+"""Tests for :mod:`cdr.transcoder`."""
+
+from __future__ import annotations
+
+import math
+import struct
+
+import pytest
+
+from cdr.decoder import MessageDecoder
+from cdr.encapsulation_kind import EncapsulationKind
+from cdr.encoder import MessageEncoder
+from cdr.idl import parse_idl
+from cdr.schema import parse_message_definition
+from cdr.transcoder import MessageTranscoder
+
+DEFINITION = """
+std_msgs/Header header
+uint8 flag
+float64[] ranges
+int16[3] triple
+string[] names
+Point[] points
+Point[2] pair
+uint8[] blob
+================================================================================
+MSG: std_msgs/Header
+builtin_interfaces/Time stamp
+string frame_id
+================================================================================
+MSG: pkg/Point
+int32 id
+float64 x
+"""
+
+MESSAGE = {
+    "header": {"stamp": {"sec": 1, "nanosec": 2}, "frame_id": "base_link"},
+    "flag": 1,
+    "ranges": [0.5, -1.25, 3.0],
+    "triple": [1, -2, 3],
+    "names": ["a", "", "joint"],
+    "points": [{"id": 1, "x": 1.5}, {"id": -2, "x": 2.5}],
+    "pair": [{"id": 3, "x": 3.5}, {"id": 4, "x": 4.5}],
+    "blob": b"\x00\x01\x02",
+}
+
+KINDS = [
+    EncapsulationKind.CDR_LE,
+    EncapsulationKind.CDR_BE,
+    EncapsulationKind.CDR2_LE,
+    EncapsulationKind.CDR2_BE,
+]
+
+
+def normalized(message: dict) -> dict:
+    return {
+        **message,
+        "ranges": list(message["ranges"]),
+        "triple": list(message["triple"]),
+        "blob": bytes(message["blob"]),
+    }
+
+
+@pytest.mark.parametrize("source", KINDS)
+@pytest.mark.parametrize("target", KINDS)
+def test_transcode_matches_encoder(
+    source: EncapsulationKind, target: EncapsulationKind
+) -> None:
+    schema = parse_message_definition(DEFINITION, "pkg/Scan")
+    data = MessageEncoder(schema, kind=source).encode(MESSAGE)
+    transcoded = MessageTranscoder(schema, kind=target).transcode(data)
+    assert transcoded == MessageEncoder(schema, kind=target).encode(MESSAGE)
+    assert normalized(MessageDecoder(schema).decode(transcoded)) == MESSAGE
+
+
+def test_transcode_preserves_float_bits() -> None:
+    schema = parse_message_definition("float32 a\nfloat32[] b")
+    nan = struct.unpack("<f", b"\x01\x00\x80\x7f")[0]
+    data = MessageEncoder(schema, kind=EncapsulationKind.CDR_BE).encode(
+        {"a": 0.0, "b": [0.0]}
+    )
+    data[4:8] = b"\x7f\x80\x00\x01"  # a signalling NaN
+    data[12:16] = b"\x7f\x80\x00\x01"
+    transcoded = MessageTranscoder(schema).transcode(data)
+    assert transcoded[4:8] == transcoded[12:16] == b"\x01\x00\x80\x7f"
+    assert math.isnan(nan)
+
+
+def test_transcode_final_idl_type() -> None:
+    schema = parse_idl("@final struct A { long a; double b; sequence<double> c; };")
+    message = {"a": 1, "b": 2.0, "c": [3.0]}
+    data = MessageEncoder(schema, kind=EncapsulationKind.CDR2_BE).encode(message)
+    transcoded = MessageTranscoder(schema).transcode(data)
+    assert transcoded == MessageEncoder(schema).encode(message)
+
+
+def test_transcode_rejects_xtypes_headers() -> None:
+    schema = parse_idl("@appendable struct A { long a; };")
+    data = MessageEncoder(schema, kind=EncapsulationKind.CDR_BE).encode({"a": 1})
+    transcoder = MessageTranscoder(schema, kind=EncapsulationKind.CDR_LE)
+    assert transcoder.transcode(data) == MessageEncoder(schema).encode({"a": 1})
+    with pytest.raises(ValueError, match="XTypes"):
+        MessageTranscoder(schema, kind=EncapsulationKind.CDR2_LE).transcode(data)
+
+
+XTYPES_IDL = """
+@final struct Point { double x; double y; };
+@appendable struct Named {
+  string name;
+  sequence<Point> path;
+  sequence<string> tags;
+  @optional long n;
+};
+@mutable struct Shape {
+  long id;
+  @optional double weight;
+  Named named;
+  sequence<octet> data;
+  @optional string label;
+  sequence<Named> shapes;
+};
+"""
+
+NAMED = {
+    "name": "a",
+    "path": [{"x": 1.0, "y": 2.0}],
+    "tags": ["b", "cd"],
+    "n": 7,
+}
+SHAPE = {
+    "id": 1,
+    "weight": 2.5,
+    "named": NAMED,
+    "data": bytes(70000),
+    "label": None,
+    "shapes": [NAMED, {**NAMED, "n": None}],
+}
+
+
+@pytest.mark.parametrize(
+    "source, target",
+    [
+        (EncapsulationKind.DELIMITED_CDR2_BE, EncapsulationKind.DELIMITED_CDR2_LE),
+        (EncapsulationKind.PL_CDR2_BE, EncapsulationKind.PL_CDR2_LE),
+        (EncapsulationKind.CDR2_LE, EncapsulationKind.CDR2_BE),
+        (EncapsulationKind.PL_CDR_LE, EncapsulationKind.PL_CDR_BE),
+        (EncapsulationKind.CDR_BE, EncapsulationKind.CDR_LE),
+    ],
+)
+@pytest.mark.parametrize("type_name, message", [("Named", NAMED), ("Shape", SHAPE)])
+def test_transcode_xtypes_byte_order(
+    source: EncapsulationKind,
+    target: EncapsulationKind,
+    type_name: str,
+    message: dict,
+) -> None:
+    schema = parse_idl(XTYPES_IDL, type_name)
+    data = MessageEncoder(schema, kind=source).encode(message)
+    transcoded = MessageTranscoder(schema, kind=target).transcode(data)
+    assert transcoded == MessageEncoder(schema, kind=target).encode(message)
+
+
+@pytest.mark.parametrize(
+    "kind, swapped, same_order",
+    [
+        (
+            EncapsulationKind.PL_CDR_BE,
+            EncapsulationKind.PL_CDR_LE,
+            EncapsulationKind.CDR_BE,
+        ),
+        (
+            EncapsulationKind.PL_CDR2_BE,
+            EncapsulationKind.PL_CDR2_LE,
+            EncapsulationKind.DELIMITED_CDR2_BE,
+        ),
+    ],
+)
+def test_transcode_unknown_members(
+    kind: EncapsulationKind,
+    swapped: EncapsulationKind,
+    same_order: EncapsulationKind,
+) -> None:
+    old = parse_idl("@mutable struct A { long a; };")
+    new = parse_idl("@mutable struct A { long a; @optional double b; };")
+    data = MessageEncoder(new, kind=kind).encode({"a": 1, "b": 2.0})
+    with pytest.raises(ValueError, match="unknown member 1 of A"):
+        MessageTranscoder(old, kind=swapped).transcode(data)
+
+    # Without a byte order change the unknown member is copied.
+    transcoded = MessageTranscoder(old, kind=same_order).transcode(data)
+    assert transcoded[4:] == data[4:]
+    assert MessageDecoder(new).decode(transcoded) == {"a": 1, "b": 2.0}
+
+
+def test_transcode_appended_members() -> None:
+    old = parse_idl("@appendable struct A { long a; };")
+    new = parse_idl("@appendable struct A { long a; string b; };")
+    kind = EncapsulationKind.DELIMITED_CDR2_BE
+    data = MessageEncoder(new, kind=kind).encode({"a": 1, "b": "x"})
+    with pytest.raises(ValueError, match="appended to A"):
+        MessageTranscoder(old, kind=EncapsulationKind.CDR2_LE).transcode(data)
+    transcoded = MessageTranscoder(old, kind=EncapsulationKind.CDR2_BE).transcode(data)
+    assert MessageDecoder(new).decode(transcoded) == {"a": 1, "b": "x"}
+
+
+def test_transcode_same_kind_copies() -> None:
+    schema = parse_message_definition("int32 a")
+    data = MessageEncoder(schema).encode({"a": 1})
+    transcoded = MessageTranscoder(schema).transcode(bytes(data))
+    assert transcoded == data and isinstance(transcoded, bytearray)
+
+
+def test_transcode_truncated_payload() -> None:
+    schema = parse_message_definition("string a\nint32 b")
+    data = MessageEncoder(schema, kind=EncapsulationKind.CDR_BE).encode(
+        {"a": "hello", "b": 1}
+    )
+    with pytest.raises(ValueError, match="truncated"):
+        MessageTranscoder(schema).transcode(data[:10])
@@ -0,0 +1,142 @@
+"""Tests for :mod:`cdr.view`."""
+
+from __future__ import annotations
+
+import pytest
+
+from cdr.decoder import MessageDecoder
+from cdr.encapsulation_kind import EncapsulationKind
+from cdr.encoder import MessageEncoder
+from cdr.reader import CdrReader
+from cdr.schema import parse_message_definition
+from cdr.view import MessageView
+
+TF2_MSG_TFMESSAGE = (
+    "0001000001000000cce0d158f08cf9060a000000626173655f6c696e6b0000000600000072616461"
+    "72000000ae47e17a14ae0e4000000000000000000000000000000000000000000000000000000000"
+    "000000000000000000000000000000000000f03f"
+)
+
+TF2_MSG_DEFINITION = """
+geometry_msgs/TransformStamped[] transforms
+================================================================================
+MSG: geometry_msgs/TransformStamped
+std_msgs/Header header
+string child_frame_id # the frame id of the child frame
+Transform transform
+================================================================================
+MSG: std_msgs/Header
+builtin_interfaces/Time stamp
+string frame_id
+================================================================================
+MSG: geometry_msgs/Transform
+Vector3 translation
+Quaternion rotation
+================================================================================
+MSG: geometry_msgs/Vector3
+float64 x
+float64 y
+float64 z
+================================================================================
+MSG: geometry_msgs/Quaternion
+float64 x 0
+float64 y 0
+float64 z 0
+float64 w 1
+"""
+
+MIXED_DEFINITION = """
+uint8 a
+float64 b
+bool flag
+int16[3] small
+string label
+uint8 c
+int64 d
+float32[] samples
+string[] names
+Point[2] corners
+Point[] points
+bool[] flags
+uint8[100] blob
+Point last
+================================================================================
+MSG: pkg/Point
+float32 x
+float64 y
+"""
+
+MIXED_MESSAGE = {
+    "a": 1,
+    "b": 2.5,
+    "flag": True,
+    "small": [-1, 2, -3],
+    "label": "label",
+    "c": 7,
+    "d": -9,
+    "samples": [0.5, 1.5],
+    "names": ["a", "bc"],
+    "corners": [{"x": 1.0, "y": 2.0}, {"x": 3.0, "y": 4.0}],
+    "points": [{"x": 5.0, "y": 6.0}],
+    "flags": [True, False, True],
+    "blob": bytes(range(100)),
+    "last": {"x": 7.0, "y": 8.0},
+}
+
+
+def test_reads_example_tf2_message_lazily() -> None:
+    schema = parse_message_definition(TF2_MSG_DEFINITION, "tf2_msgs/TFMessage")
+    view = MessageView(bytes.fromhex(TF2_MSG_TFMESSAGE), schema)
+
+    (transform,) = view["transforms"]
+    assert isinstance(transform, MessageView)
+    assert transform.type_name == "geometry_msgs/TransformStamped"
+    assert transform["header"]["stamp"] == {"sec": 1490149580, "nanosec": 117017840}
+    assert transform["transform"]["rotation"]["w"] == 1
+    assert transform["transform"]["translation"]["x"] == pytest.approx(3.835)
+    assert transform["child_frame_id"] == "radar"
+    assert view.end == len(bytes.fromhex(TF2_MSG_TFMESSAGE))
+
+
+@pytest.mark.parametrize("kind", list(EncapsulationKind))
+def test_matches_decoder(kind: EncapsulationKind) -> None:
+    schema = parse_message_definition(MIXED_DEFINITION, "pkg/Mixed")
+    data = MessageEncoder(schema, kind=kind).encode(MIXED_MESSAGE)
+    expected = MessageDecoder(schema).decode(data)
+
+    # Access the fields back to front so that every step start is found by
+    # skipping the preceding steps.
+    view = MessageView(data, schema)
+    for name in reversed(list(expected)):
+        assert view[name] == expected[name], name
+    assert list(view) == list(expected)
+    assert view == expected
+    assert view.to_dict() == expected
+    assert view.end == len(data)
+
+    # A fresh view only materialises what is asked for.
+    view = MessageView(data, schema)
+    assert view["last"] == {"x": 7.0, "y": 8.0}
+    assert view["corners"][1]["y"] == 4.0
+
+
+def test_reader_is_not_moved() -> None:
+    schema = parse_message_definition(MIXED_DEFINITION, "pkg/Mixed")
+    data = MessageEncoder(schema).encode(MIXED_MESSAGE)
+    reader = CdrReader(data)
+
+    view = MessageView(reader, schema)
+    assert view["label"] == "label"
+    assert reader.offset == 4
+    reader.offset = view.end
+    assert reader.is_at_end()
+
+
+def test_missing_field_raises_key_error() -> None:
+    schema = parse_message_definition(MIXED_DEFINITION, "pkg/Mixed")
+    view = MessageView(MessageEncoder(schema).encode(MIXED_MESSAGE), schema)
+    with pytest.raises(KeyError):
+        view["missing"]
+    assert view.get("missing") is None
+    assert "label" in view
+    assert len(view) == len(MIXED_MESSAGE)
@@ -171,6 +171,51 @@ def test_array_bulk_and_fallback_paths(
     assert result == values
 
 
+@pytest.mark.parametrize("kind", [EncapsulationKind.CDR_LE, EncapsulationKind.CDR_BE])
+@pytest.mark.parametrize("byteorder", ["<", ">"])
+@pytest.mark.parametrize(
+    "method, values, dtype",
+    [
+        ("int8Array", [-128, 0, 127], "i1"),
+        ("uint8Array", [0, 1, 255], "u1"),
+        ("int16Array", [-32768, 0, 32767], "i2"),
+        ("uint16Array", [0, 1, 65535], "u2"),
+        ("int32Array", [-2147483648, 0, 2147483647], "i4"),
+        ("uint32Array", [0, 1, 0xFFFFFFFF], "u4"),
+        ("int64Array", [-9223372036854775808, 0, 9223372036854775807], "i8"),
+        ("uint64Array", [0, 1, 0xFFFFFFFFFFFFFFFF], "u8"),
+        ("float32Array", [0.0, 1.5, -2.25], "f4"),
+        ("float64Array", [0.0, 1.5, -2.25], "f8"),
+    ],
+)
+def test_array_writes_numpy_any_byte_order(
+    kind: EncapsulationKind, byteorder: str, method: str, values: list, dtype: str
+) -> None:
+    np = pytest.importorskip("numpy")
+    data = np.array(values, dtype=byteorder + dtype)
+    writer = CdrWriter(kind=kind)
+    writer.uint8(1)  # force alignment padding before the array
+    getattr(writer, method)(data, True)
+
+    reference = CdrWriter(kind=kind)
+    reference.uint8(1)
+    getattr(reference, method)(list(values), True)
+    assert writer.data == reference.data
+
+
+def test_array_converts_numpy_dtype() -> None:
+    np = pytest.importorskip("numpy")
+    writer = CdrWriter(kind=EncapsulationKind.CDR_BE)
+    writer.float64Array(np.arange(4, dtype=np.int32).reshape(2, 2), True)
+    writer.int32Array(np.array([1, 2], dtype=np.int8))
+
+    reader = CdrReader(writer.data)
+    assert list(reader.float64_array()) == [0.0, 1.0, 2.0, 3.0]
+    assert list(reader.int32_array(2)) == [1, 2]
+    with pytest.raises(TypeError):
+        writer.int32Array(np.array([1.5]))
+
+
 def test_writes_parameter_list_and_sentinel_header() -> None:
     writer = CdrWriter(kind=EncapsulationKind.PL_CDR_LE)
     writer.uint8(0x42)
@@ -216,3 +261,216 @@ def test_emheader_resets_origin_for_alignment() -> None:
     writer.emHeader(True, 5, 8)
     writer.uint64(0x0F)
     assert writer.data.hex() == "00030000054008000f00000000000000"
+
+
+def test_view_and_detach_do_not_copy() -> None:
+    writer = CdrWriter(size=64)
+    writer.uint32(7)
+    writer.string("abc")
+    expected = writer.data
+
+    view = writer.view
+    assert view == expected
+    assert view.obj is writer._buffer
+    view.release()
+
+    buffer = writer._buffer
+    detached = writer.detach()
+    assert detached is buffer
+    assert detached == expected
+
+    # The writer starts a new payload of the same kind.
+    assert writer.size == 4
+    assert writer.data == expected[:4]
+    writer.uint8(1)
+    assert detached == expected
+
+
+@pytest.mark.parametrize("kind", [EncapsulationKind.CDR_LE, EncapsulationKind.CDR2_LE])
+def test_segments_reference_large_arrays(kind: EncapsulationKind) -> None:
+    image = bytes(range(256)) * 4
+    samples = array("d", [1.5] * 64)
+
+    def write(writer: CdrWriter) -> None:
+        writer.uint8(1)
+        writer.uint8Array(image, True)
+        writer.uint8(2)
+        writer.float64Array(memoryview(samples))
+        writer.float64Array(memoryview(samples))
+        writer.float64(3.5)
+        writer.uint8Array(b"small", True)
+
+    writer = CdrWriter(kind=kind, segment_threshold=512)
+    write(writer)
+    reference = CdrWriter(kind=kind)
+    write(reference)
+
+    segments = writer.segments()
+    # header + uint8 + length, image, uint8 + padding, samples twice, rest
+    assert len(segments) == 6
+    assert segments[1].obj is image
+    assert segments[3].obj is segments[4].obj is samples
+    assert b"".join(segments) == reference.data
+    assert writer.data == reference.data
+    assert writer.size == reference.size
+    with pytest.raises(ValueError, match="segments"):
+        writer.view
+    with pytest.raises(ValueError, match="segments"):
+        writer.detach()
+
+
+def test_segments_without_references() -> None:
+    writer = CdrWriter(segment_threshold=1024)
+    writer.uint32(5)
+    assert writer.segments() == [writer.data]
+
+
+def test_align_writes_zero_padding_over_existing_bytes() -> None:
+    writer = CdrWriter(buffer=b"\xff" * 32)
+    writer.uint8(1)
+    writer.float64(2.0)
+    writer.uint8(3)
+    writer.align(8)
+    assert writer.data == bytes.fromhex(
+        "00010000" "01000000000000000000000000000040" "0300000000000000"
+    )
+
+
+def test_reserve_grows_once() -> None:
+    writer = CdrWriter()
+    writer.reserve(1000)
+    assert writer.capacity == 1004
+    buffer = writer._buffer
+    writer.uint8Array(bytes(1000))
+    assert writer._buffer is buffer
+    assert writer.capacity == 1004
+
+
+@pytest.mark.parametrize("kind", list(EncapsulationKind))
+def test_write_fields_matches_individual_writes(kind: EncapsulationKind) -> None:
+    fused = CdrWriter(kind=kind)
+    fused.uint8(1)
+    fused.write_fields("?IdhqBf", True, 2, 3.5, -4, -5, 6, 7.5)
+    fused.write_fields("Q", 8)
+
+    reference = CdrWriter(kind=kind)
+    reference.uint8(1)
+    reference.uint8(1)
+    reference.uint32(2)
+    reference.float64(3.5)
+    reference.int16(-4)
+    reference.int64(-5)
+    reference.uint8(6)
+    reference.float32(7.5)
+    reference.uint64(8)
+    assert fused.data == reference.data
+
+
+def test_write_fields_rejects_unknown_format() -> None:
+    with pytest.raises(ValueError, match="Unsupported format character 's'"):
+        CdrWriter().write_fields("Is", 1, b"x")
+
+
+@pytest.mark.parametrize("kind", list(EncapsulationKind))
+def test_string_array_matches_individual_strings(kind: EncapsulationKind) -> None:
+    values = ["base_link", "", "ünïcode", "odom" * 100]
+    expected = CdrWriter(kind=kind)
+    expected.uint8(7).sequenceLength(len(values))
+    for value in values:
+        expected.string(value)
+
+    # A reused buffer must not leak stale bytes into padding or terminators.
+    writer = CdrWriter(kind=kind, buffer=b"\xff" * 16)
+    writer.uint8(7).stringArray(values, True)
+    assert writer.data == expected.data
+
+    reader = CdrReader(writer.data)
+    assert reader.uint8() == 7
+    assert reader.string_array() == values
+    assert CdrWriter(kind=kind).stringArray([]).size == 4
+
+
+def _write_cdr2_members(writer: CdrWriter, deferred: bool) -> None:
+    members = [
+        (1, 1, lambda: writer.uint8(7)),
+        (2, 2, lambda: writer.uint16(9)),
+        (3, 4, lambda: writer.int32(-1)),
+        (4, 8, lambda: writer.float64(1.5)),
+        (5, 3, lambda: writer.uint8Array(b"abc")),
+        (6, 10, lambda: writer.string("hello")),
+    ]
+    for member_id, size, write in members:
+        if deferred:
+            writer.beginEmHeader(member_id == 1, member_id)
+            write()
+            writer.endEmHeader()
+        else:
+            writer.emHeader(member_id == 1, member_id, size)
+            write()
+    if deferred:
+        writer.beginEmHeader(False, 7).beginDHeader().uint8(1).uint32(2)
+        writer.endDHeader().endEmHeader()
+    else:
+        writer.emHeader(False, 7, 12).dHeader(8).uint8(1).uint32(2)
+
+
+@pytest.mark.parametrize(
+    "kind", [EncapsulationKind.PL_CDR2_LE, EncapsulationKind.PL_CDR2_BE]
+)
+def test_deferred_headers_match_sized_headers_cdr2(kind: EncapsulationKind) -> None:
+    sized = CdrWriter(kind=kind).dHeader(88)
+    _write_cdr2_members(sized, deferred=False)
+    deferred = CdrWriter(kind=kind).beginDHeader()
+    _write_cdr2_members(deferred, deferred=True)
+    deferred.endDHeader()
+
+    assert deferred.data == sized.data
+
+
+@pytest.mark.parametrize(
+    "kind", [EncapsulationKind.PL_CDR_LE, EncapsulationKind.PL_CDR_BE]
+)
+@pytest.mark.parametrize("segment_threshold", [None, 1024])
+def test_deferred_headers_match_sized_headers_cdr1(
+    kind: EncapsulationKind, segment_threshold: int | None
+) -> None:
+    large = bytes(range(256)) * 256
+    sized = CdrWriter(kind=kind, segment_threshold=segment_threshold)
+    sized.emHeader(True, 1, 1).uint8(7)
+    sized.emHeader(False, 2, 8).float64(1.5)
+    sized.emHeader(False, 0x3F10, 4).uint32(3)
+    sized.emHeader(False, 3, len(large)).uint8Array(large)
+    sized.emHeader(False, 4, 2).uint16(5)
+    sized.sentinelHeader()
+
+    deferred = CdrWriter(kind=kind, segment_threshold=segment_threshold)
+    deferred.beginEmHeader(True, 1).uint8(7).endEmHeader()
+    deferred.beginEmHeader(False, 2).float64(1.5).endEmHeader()
+    deferred.beginEmHeader(False, 0x3F10).uint32(3).endEmHeader()
+    deferred.beginEmHeader(False, 3).uint8Array(large).endEmHeader()
+    deferred.beginEmHeader(False, 4).uint16(5).endEmHeader()
+    deferred.sentinelHeader()
+
+    assert deferred.data == sized.data
+
+
+def test_deferred_emheader_keeps_nextint_for_referenced_segments() -> None:
+    writer = CdrWriter(kind=EncapsulationKind.PL_CDR2_LE, segment_threshold=4)
+    writer.beginEmHeader(False, 1).uint8Array(b"abcd").endEmHeader().uint8(9)
+
+    reader = CdrReader(writer.data)
+    header = reader.em_header()
+    assert (header.id, header.object_size, header.length_code) == (1, 4, 4)
+    assert bytes(reader.uint8_array(4)) == b"abcd"
+    assert reader.uint8() == 9
+
+
+def test_deferred_headers_must_be_balanced() -> None:
+    writer = CdrWriter(kind=EncapsulationKind.PL_CDR2_LE)
+    with pytest.raises(ValueError, match="endDHeader\\(\\) without"):
+        writer.endDHeader()
+    writer.beginDHeader()
+    with pytest.raises(ValueError, match="endEmHeader\\(\\) without"):
+        writer.endEmHeader()
+    with pytest.raises(ValueError, match="Member ID"):
+        writer.beginEmHeader(False, 0x10000000)
@@ -0,0 +1,95 @@
+"""Tests for :mod:`cdr.writer_pool`."""
+
+from __future__ import annotations
+
+import threading
+
+from cdr.encapsulation_kind import EncapsulationKind
+from cdr.reader import CdrReader
+from cdr.writer import CdrWriter
+from cdr.writer_pool import CdrWriterPool
+
+
+def _write(writer: CdrWriter, label: str) -> bytes:
+    writer.uint8(1)
+    writer.float64(2.5)
+    writer.string(label)
+    writer.uint16(3)
+    return writer.data
+
+
+def test_reset_reuses_buffer_and_overwrites_old_data() -> None:
+    writer = CdrWriter()
+    first = _write(writer, "a much longer label than the next one")
+    buffer = writer._buffer
+
+    writer.reset(EncapsulationKind.CDR_BE)
+    second = _write(writer, "x")
+    assert writer._buffer is buffer
+    assert writer.kind == EncapsulationKind.CDR_BE
+    assert second == _write(CdrWriter(kind=EncapsulationKind.CDR_BE), "x")
+    assert second != first
+
+    reader = CdrReader(second)
+    assert (reader.uint8(), reader.float64(), reader.string()) == (1, 2.5, "x")
+
+
+def test_reset_handles_dirty_padding() -> None:
+    writer = CdrWriter()
+    writer.uint8Array(b"\xff" * 32)
+    writer.reset()
+    writer.uint8(1)
+    writer.uint32(2)
+    assert writer.data == bytes.fromhex("00010000" "01000000" "02000000")
+
+
+def test_pool_reuses_released_writers() -> None:
+    pool = CdrWriterPool()
+    with pool.writer() as writer:
+        _write(writer, "warm up the buffer" * 10)
+        capacity = writer.capacity
+
+    with pool.writer(EncapsulationKind.CDR2_LE) as reused:
+        assert reused is writer
+        assert reused.capacity == capacity
+        assert reused.size == 4
+        assert reused.kind == EncapsulationKind.CDR2_LE
+
+
+def test_pool_honours_size_hint() -> None:
+    pool = CdrWriterPool()
+    small = pool.acquire()
+    large = pool.acquire(size=1000)
+    assert large.capacity >= 1000
+    pool.release(small)
+    pool.release(large)
+
+    assert pool.acquire(size=600) is large
+    assert pool.acquire(size=2000) is not small
+    assert pool.acquire() is small
+
+
+def test_pool_drops_oversized_and_surplus_writers() -> None:
+    pool = CdrWriterPool(max_retained_capacity=256, max_writers_per_class=1)
+    huge = CdrWriter(size=1024)
+    pool.release(huge)
+    assert pool.acquire(size=1024) is not huge
+
+    first, second = CdrWriter(), CdrWriter()
+    pool.release(first)
+    pool.release(second)
+    assert pool.acquire() is first
+    assert pool.acquire() is not second
+
+
+def test_pool_free_lists_are_per_thread() -> None:
+    pool = CdrWriterPool()
+    writer = CdrWriter()
+    pool.release(writer)
+
+    acquired = []
+    thread = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    thread.start()
+    thread.join()
+    assert acquired[0] is not writer
+    assert pool.acquire() is writer